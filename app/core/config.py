@@ -1,4 +1,7 @@
 from functools import lru_cache
+from typing import Any
+
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -15,14 +18,138 @@ class Settings(BaseSettings):
     # OpenAI / LLM 설정
     openai_api_key: str | None = None
     openai_model: str = "gpt-4o"
+    openai_temperature: float = 0.3
+    openai_base_url: str | None = None
+
+    # LLM 백엔드: "openai" | "fake" (부하 테스트용 로컬 가짜 모델, OpenAI 호출 없음)
+    llm_backend: str = "openai"
+    fake_llm_latency_ms_median: float = 800.0
+    fake_llm_latency_sigma: float = 0.4
+    fake_llm_ttft_ms: float = 200.0  # 지연이 중앙값일 때의 첫 토큰 시간 (스트리밍은 같은 지연 분포에서 비례해 늘어남)
+
+    # LLM 클라이언트 풀 (프로세스 단위로 공유, lifespan에서 생성/종료)
+    llm_max_connections: int = 100
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry_seconds: float = 60.0
+    llm_connect_timeout_seconds: float = 5.0
+    llm_timeout_seconds: float = 60.0
+    llm_max_retries: int = 2
+    # 작업(question/draft/final/rolling)별 ChatOpenAI 설정 덮어쓰기
+    # 예: WINEAR_LLM_TASK_OVERRIDES='{"final": {"temperature": 0.2, "max_tokens": 800}}'
+    llm_task_overrides: dict[str, dict[str, Any]] = {}
+
+    # 모델별 1K 토큰당 [입력, 출력, 캐시 적중 입력(선택)] 가격 (USD, 비용 집계용)
+    llm_pricing_per_1k_tokens: dict[str, list[float]] = {
+        "gpt-4o": [0.0025, 0.01, 0.00125],
+        "gpt-4o-mini": [0.00015, 0.0006, 0.000075],
+    }
+
+    # LLM 응답 캐시 (Redis, (model, temperature, prompt) 해시 키)
+    llm_cache_enabled: bool = True
+    llm_cache_ttl_seconds: int = 60 * 60 * 24
+    llm_cache_max_entries: int = 10_000
+
+    # 채팅 컨텍스트 예산 (임계치 초과 시 오래된 턴을 누적 요약으로 대체)
+    chat_context_budget_enabled: bool = False
+    chat_context_token_threshold: int = 1500
+    chat_context_keep_turns: int = 2
+
+    # 채팅 종료 백그라운드 작업 (/chat/end?background=true)
+    chat_end_worker_enabled: bool = True
+    chat_end_worker_concurrency: int = 2
+    chat_end_job_lease_seconds: int = 120  # 처리 중에는 1/3 주기로 연장되므로 워커가 죽은 경우의 회수 지연에 해당
+    chat_end_worker_poll_interval_seconds: float = 0.5  # 대기열이 비었을 때 다음 확인까지 대기
+    chat_end_job_max_attempts: int = 3
+    # 실패한 작업의 재시도 대기 (지수 백오프 + jitter, attempts번째 실패 후 base * 2^(attempts-1)의 1/2~1배, max로 제한)
+    chat_end_job_retry_backoff_base_seconds: float = 10.0
+    chat_end_job_retry_backoff_max_seconds: float = 300.0
+    chat_end_job_ttl_seconds: int = 60 * 60 * 24
+
+    # 초안/최종 요약 선계산 (사용자 답변 count가 기준 이상일 때)
+    chat_speculative_enabled: bool = False
+    chat_speculative_min_count: int = 3
+
+    # 만료 직전 세션 수거 (이탈한 사용자의 답변을 요약으로 저장)
+    chat_harvest_enabled: bool = False
+    chat_harvest_interval_seconds: float = 60.0
+    chat_harvest_window_seconds: float = 300.0
+    chat_harvest_min_answers: int = 2
+    chat_harvest_concurrency: int = 4
+    chat_harvest_batch_size: int = 50
+
+    # 채팅 엔드포인트 rate limit (토큰 버킷, user_id / session_id 단위)
+    rate_limit_enabled: bool = True
+    # 토큰 버킷: 대기 시간(Retry-After) 계산에 refill 속도로 나누므로 0 이하는 허용하지 않음
+    rate_limit_user_capacity: float = Field(20, gt=0)
+    rate_limit_user_refill_per_second: float = Field(0.2, gt=0)
+    rate_limit_session_capacity: float = Field(10, gt=0)
+    rate_limit_session_refill_per_second: float = Field(0.2, gt=0)
+    rate_limit_bucket_ttl_seconds: int = 60 * 10
+
+    # 질문 주제 추적 (남은 주제 + 직전 대화만으로 질문 생성, 모든 주제를 다루면 자동 종료)
+    chat_theme_tracking_enabled: bool = False
+
+    # 세션 메시지 인코딩: "json"(이전 형식) | "compact"(msgpack + 임계값 초과 시 zlib)
+    # 어느 쪽이든 기존 JSON 메시지는 그대로 읽을 수 있습니다
+    chat_session_codec: str = "compact"
+    chat_session_compress_threshold_bytes: int = 512
 
     # Redis 설정
     redis_url: str = "redis://localhost:6379/0"
+    # 연결이 끊겼거나 기동 시 연결하지 못했을 때 재연결을 시도하는 주기
+    redis_reconnect_interval_seconds: float = 5.0
+
+    # 채팅 세션 저장소: "redis" | "memory"(프로세스 내, 단일 워커용) | "tiered"(L1 + Redis, sticky routing 필요)
+    chat_session_store: str = "redis"
+    chat_session_l1_max_entries: int = 10_000
 
     # 외부 AI 백엔드 설정 (SNZ_RecSys)
     ai_backend_url: str = "http://winear-recsys-agent:8000"  # SNZ_RecSys 서버 (Docker Compose)
     ai_backend_recommendations_path: str = "/agent/recommend"
-    ai_backend_timeout_seconds: float = 30.0
+    ai_backend_timeout_seconds: float = 30.0  # 응답 읽기 타임아웃
+    ai_backend_connect_timeout_seconds: float = 5.0
+    ai_backend_write_timeout_seconds: float = 10.0
+    ai_backend_pool_timeout_seconds: float = 5.0  # 풀에서 커넥션을 기다리는 최대 시간
+    # 공유 커넥션 풀 (lifespan에서 생성/종료)
+    ai_backend_max_connections: int = 50
+    ai_backend_max_keepalive_connections: int = 20
+    ai_backend_keepalive_expiry_seconds: float = 30.0
+    ai_backend_http2: bool = False  # TLS(ALPN)로 HTTP/2를 지원하는 백엔드에서만 효과가 있습니다
+    # 동일 user_id 동시 요청 합치기: 워커 안에서는 항상, 워커 간에는 짧은 Redis 락으로 (선택)
+    ai_backend_coalesce_across_workers: bool = False
+    # 락 보유 / 다른 워커의 호출 결과를 기다리는 최대 시간. 비우면 백엔드 타임아웃과 재시도 횟수로 계산
+    ai_backend_coalesce_lock_seconds: float | None = None
+    ai_backend_coalesce_poll_interval_seconds: float = 0.05
+    # 서킷 브레이커: 연속 실패 threshold 회 → reset_timeout 동안 즉시 거절 → 시험 호출(half-open)
+    ai_backend_breaker_failure_threshold: int = 5
+    ai_backend_breaker_reset_timeout_seconds: float = 30.0
+    ai_backend_breaker_half_open_max_calls: int = 1
+    # 재시도 (연결 실패 / 5xx만, 읽기 타임아웃은 재시도하지 않음. 지수 백오프 + jitter, 최근 요청 대비 비율 예산)
+    ai_backend_max_retries: int = 2
+    ai_backend_retry_backoff_base_seconds: float = 0.2
+    ai_backend_retry_backoff_max_seconds: float = 2.0
+    ai_backend_retry_budget_ratio: float = 0.2
+    ai_backend_retry_budget_min_per_second: float = 0.5
+    ai_backend_retry_budget_window_seconds: float = 10.0
+
+    # 추천 결과 캐시 (Redis, user_id 키, stale-while-revalidate)
+    recommend_cache_enabled: bool = True
+    recommend_cache_fresh_ttl_seconds: int = 300  # 이 시간 안에는 캐시 그대로 응답
+    recommend_cache_stale_ttl_seconds: int = 3600  # 이 시간까지는 캐시로 응답하며 백그라운드 갱신
+    recommend_cache_refresh_lock_seconds: int = 60
+    # stale 이후에도 이 시간 동안 보관해, 백엔드 장애 시 마지막 결과로 응답 (cache_status="fallback")
+    recommend_cache_fallback_ttl_seconds: int = 86400
+    # /recommend/full: 추천 백엔드 호출 마감 시간 (초과 시 캐시된 fallback이 있으면 그 결과, 없으면 503)
+    recommend_full_recommend_timeout_seconds: float = 3.0
+    # /recommend/full: 추천 이후 프로필 / 여행 패키지 조회의 파트별 마감 시간 (초과 시 해당 파트만 비워서 응답)
+    recommend_full_profiles_timeout_seconds: float = 1.5
+    recommend_full_travel_timeout_seconds: float = 1.5
+
+    # 여행 패키지 인메모리 카탈로그 (워커별, change stream 또는 폴링으로 갱신)
+    travel_catalog_enabled: bool = True
+    travel_catalog_poll_interval_seconds: float = 300.0  # change stream을 쓸 수 없는 배포(단일 노드)에서의 재로드 주기
+    travel_catalog_reload_debounce_seconds: float = 1.0  # 몰려오는 변경을 모아 한 번만 재로드
+    travel_catalog_retry_interval_seconds: float = 10.0  # 로드 / 스트림 오류 후 재시도 간격
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -3,6 +3,8 @@ from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorCollection
 from typing import Optional
 from redis.asyncio import Redis
 
+from ..repositories.session_store import SessionStore
+
 
 def get_db(request: Request) -> AsyncIOMotorDatabase:
     db = getattr(request.app.state, "mongo_db", None)
@@ -18,6 +20,14 @@ def get_redis(request: Request) -> Optional[Redis]:
     return redis_client
 
 
+def get_session_store(request: Request) -> SessionStore:
+    """채팅 세션 저장소. memory/tiered 백엔드는 Redis 장애 중에도 사용할 수 있습니다."""
+    store: Optional[SessionStore] = getattr(request.app.state, "session_store", None)
+    if store is None or not store.available:
+        raise HTTPException(status_code=503, detail="Session store is unavailable")
+    return store
+
+
 def get_user_features_collection(db: AsyncIOMotorDatabase = Depends(get_db)) -> AsyncIOMotorCollection:
     """user_features 컬렉션 반환"""
     return db["user_features"]
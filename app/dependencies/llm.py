@@ -1,7 +1,101 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
-from ..core.config import get_settings
+
+from ..core.config import Settings, get_settings
+from ..services.fake_llm import FakeChatModel
+
+
+logger = logging.getLogger(__name__)
+
+LLM_TASKS = ("question", "draft", "final", "rolling")
+
+
+class LLMRegistry:
+    """작업별 ChatOpenAI 인스턴스를 하나의 HTTP 커넥션 풀 위에서 공유하는 레지스트리"""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+        )
+        timeout = httpx.Timeout(settings.llm_timeout_seconds, connect=settings.llm_connect_timeout_seconds)
+        self._http_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._llms: Dict[str, BaseChatModel] = {}
+
+    def get(self, task: str = "question") -> BaseChatModel:
+        llm = self._llms.get(task)
+        if llm is None:
+            llm = self._build(task)
+            self._llms[task] = llm
+        return llm
+
+    def _build(self, task: str) -> BaseChatModel:
+        if self.settings.llm_backend == "fake":
+            return self._build_fake(task)
+        params: Dict[str, Any] = {
+            "model": self.settings.openai_model,
+            "temperature": self.settings.openai_temperature,
+            "api_key": self.settings.openai_api_key,
+            "base_url": self.settings.openai_base_url,
+            "timeout": self.settings.llm_timeout_seconds,
+            "max_retries": self.settings.llm_max_retries,
+            # 스트리밍에서도 토큰 사용량(usage_metadata)을 받기 위함
+            "stream_usage": True,
+        }
+        params.update(self.settings.llm_task_overrides.get(task, {}))
+        return ChatOpenAI(http_async_client=self._http_client, **params)
+
+    def _build_fake(self, task: str) -> FakeChatModel:
+        overrides = self.settings.llm_task_overrides.get(task, {})
+        return FakeChatModel(
+            model_name=overrides.get("model", "fake-chat"),
+            temperature=overrides.get("temperature", self.settings.openai_temperature),
+            latency_ms_median=self.settings.fake_llm_latency_ms_median,
+            latency_sigma=self.settings.fake_llm_latency_sigma,
+            ttft_ms=self.settings.fake_llm_ttft_ms,
+        )
+
+    async def aclose(self) -> None:
+        self._llms.clear()
+        await self._http_client.aclose()
+
+
+_registry: Optional[LLMRegistry] = None
+
+
+def init_llm_registry(settings: Settings) -> LLMRegistry:
+    """lifespan 시작 시 호출. 프로세스 전역 레지스트리를 생성합니다."""
+    global _registry
+    _registry = LLMRegistry(settings)
+    for task in LLM_TASKS:
+        _registry.get(task)
+    return _registry
+
+
+async def close_llm_registry() -> None:
+    """lifespan 종료 시 호출. 커넥션 풀을 닫습니다."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+
+
+def get_llm_registry() -> LLMRegistry:
+    global _registry
+    if _registry is None:
+        # lifespan 밖(스크립트 등)에서 호출된 경우 지연 생성
+        logger.info("LLM registry not initialized; creating lazily")
+        _registry = LLMRegistry(get_settings())
+    return _registry
 
 
-def get_llm() -> ChatOpenAI:
-    settings = get_settings()
-    return ChatOpenAI(model=settings.openai_model, temperature=0.3, api_key=settings.openai_api_key)
+def get_llm(task: str = "question") -> BaseChatModel:
+    return get_llm_registry().get(task)
@@ -0,0 +1,164 @@
+"""LLM을 호출하는 채팅 엔드포인트용 토큰 버킷 rate limiter
+
+user_id 단위와 session_id 단위 버킷을 함께 검사하며, 둘 다 토큰이 있을 때만 요청을 통과시키고
+두 버킷에서 동시에 토큰을 차감합니다. 기본은 Redis(Lua, 워커 공통)이며, Redis가 없거나
+오류가 나면 프로세스 내 버킷으로 대체합니다. 초과 시 429 + Retry-After를 반환합니다.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from ..core import metrics
+from ..core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS: 버킷 키들 / ARGV: (capacity, refill_per_second) * len(KEYS), ttl
+# 반환: {허용 여부(1/0), 대기 필요 시간(ms), 거부한 버킷 index(1-based, 허용 시 0)}
+_TOKEN_BUCKET_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local ttl = tonumber(ARGV[#ARGV])
+local tokens = {}
+local wait_ms = 0
+local denied = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    current = math.min(capacity, current + math.max(0, now - ts) * rate)
+    tokens[i] = current
+    if current < 1 then
+        local need = math.ceil((1 - current) / rate * 1000)
+        if need > wait_ms then
+            wait_ms = need
+            denied = i
+        end
+    end
+end
+local allowed = denied == 0 and 1 or 0
+for i, key in ipairs(KEYS) do
+    local remaining = tokens[i]
+    if allowed == 1 then
+        remaining = remaining - 1
+    end
+    redis.call('HSET', key, 'tokens', remaining, 'ts', now)
+    redis.call('EXPIRE', key, ttl)
+end
+return {allowed, wait_ms, denied}
+"""
+
+
+class LocalTokenBuckets:
+    """Redis를 쓸 수 없을 때 사용하는 프로세스 내 토큰 버킷 (워커별로 따로 집계됨)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, buckets: List[Tuple[str, float, float]]) -> Tuple[bool, float, int]:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > self.max_keys:
+                self._buckets.clear()
+            current: List[float] = []
+            wait_seconds, denied = 0.0, 0
+            for i, (key, capacity, rate) in enumerate(buckets, start=1):
+                tokens, ts = self._buckets.get(key, (capacity, now))
+                tokens = min(capacity, tokens + (now - ts) * rate)
+                current.append(tokens)
+                if tokens < 1:
+                    need = (1 - tokens) / rate
+                    if need > wait_seconds:
+                        wait_seconds, denied = need, i
+            allowed = denied == 0
+            for (key, _, _), tokens in zip(buckets, current):
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        return allowed, wait_seconds, denied
+
+
+_local_buckets = LocalTokenBuckets()
+
+
+async def _request_identity(request: Request) -> Tuple[Optional[str], Optional[str]]:
+    if request.method != "POST":
+        return None, None
+    try:
+        body: Any = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None, None
+    if not isinstance(body, dict):
+        return None, None
+    user_id = body.get("user_id")
+    session_id = body.get("session_id")
+    return (str(user_id) if user_id is not None else None), (str(session_id) if session_id is not None else None)
+
+
+async def _acquire_redis(redis: Any, buckets: List[Tuple[str, float, float]], ttl_seconds: int) -> Tuple[bool, float, int]:
+    script = redis.register_script(_TOKEN_BUCKET_LUA)
+    args: List[Any] = []
+    for _, capacity, rate in buckets:
+        args.extend([capacity, rate])
+    args.append(ttl_seconds)
+    allowed, wait_ms, denied = await script(keys=[f"rate_limit:{key}" for key, _, _ in buckets], args=args)
+    return bool(int(allowed)), int(wait_ms) / 1000, int(denied)
+
+
+async def chat_rate_limit(request: Request) -> None:
+    """채팅 라우터 의존성. 요청 본문의 user_id / session_id 기준으로 토큰을 차감합니다."""
+    settings = get_settings()
+    if not settings.rate_limit_enabled:
+        return
+    user_id, session_id = await _request_identity(request)
+    redis = getattr(request.app.state, "redis", None)
+    store = getattr(request.app.state, "session_store", None)
+    if user_id is None and session_id is not None and store is not None:
+        try:
+            user_id = await store.get_user_id(session_id)
+        except Exception:
+            user_id = None
+
+    buckets: List[Tuple[str, float, float]] = []
+    scopes: List[str] = []
+    if user_id is not None:
+        buckets.append((f"user:{user_id}", settings.rate_limit_user_capacity, settings.rate_limit_user_refill_per_second))
+        scopes.append("user")
+    if session_id is not None:
+        buckets.append((f"session:{session_id}", settings.rate_limit_session_capacity, settings.rate_limit_session_refill_per_second))
+        scopes.append("session")
+    if not buckets:
+        return
+
+    backend = "redis"
+    try:
+        if redis is None:
+            raise ConnectionError("Redis is unavailable")
+        allowed, wait_seconds, denied = await _acquire_redis(redis, buckets, settings.rate_limit_bucket_ttl_seconds)
+    except Exception as exc:
+        if redis is not None:
+            logger.warning(f"Redis rate limiter failed; using local buckets. error={exc}")
+        backend = "local"
+        allowed, wait_seconds, denied = _local_buckets.acquire(buckets)
+
+    if allowed:
+        metrics.incr("rate_limit_requests_total", result="allowed", backend=backend)
+        return
+    scope = scopes[denied - 1] if denied else "unknown"
+    metrics.incr("rate_limit_requests_total", result="throttled", backend=backend)
+    metrics.incr("rate_limit_throttled_total", scope=scope, backend=backend)
+    raise HTTPException(
+        status_code=429,
+        detail="요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+        headers={"Retry-After": str(max(1, math.ceil(wait_seconds)))},
+    )
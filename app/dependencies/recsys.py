@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+import httpx
+
+from ..core.config import Settings, get_settings
+
+
+logger = logging.getLogger(__name__)
+
+
+def build_recsys_http_client(settings: Settings) -> httpx.AsyncClient:
+    """SNZ_RecSys 호출용 커넥션 풀 (keep-alive / 풀 크기 / HTTP/2 / 단계별 타임아웃은 Settings에서)"""
+    limits = httpx.Limits(
+        max_connections=settings.ai_backend_max_connections,
+        max_keepalive_connections=settings.ai_backend_max_keepalive_connections,
+        keepalive_expiry=settings.ai_backend_keepalive_expiry_seconds,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.ai_backend_connect_timeout_seconds,
+        read=settings.ai_backend_timeout_seconds,
+        write=settings.ai_backend_write_timeout_seconds,
+        pool=settings.ai_backend_pool_timeout_seconds,
+    )
+    return httpx.AsyncClient(
+        base_url=settings.ai_backend_url.rstrip("/"),
+        limits=limits,
+        timeout=timeout,
+        http2=settings.ai_backend_http2,
+    )
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def init_recsys_client(settings: Settings) -> httpx.AsyncClient:
+    """lifespan 시작 시 호출. 프로세스 전역 RecSys 클라이언트를 생성합니다."""
+    global _client
+    _client = build_recsys_http_client(settings)
+    return _client
+
+
+async def close_recsys_client() -> None:
+    """lifespan 종료 시 호출. 커넥션 풀을 닫습니다."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_recsys_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        # lifespan 밖(스크립트 등)에서 호출된 경우 지연 생성
+        logger.info("RecSys HTTP client not initialized; creating lazily")
+        _client = build_recsys_http_client(get_settings())
+    return _client
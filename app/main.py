@@ -7,13 +7,23 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
-import redis.asyncio as aioredis
 
 from .core.config import get_settings
+from .dependencies.llm import init_llm_registry, close_llm_registry
+from .dependencies.recsys import init_recsys_client, close_recsys_client
+from .services.llm_cache import init_llm_cache
+from .services.recommend_cache import init_recommend_cache
+from .services.ai_recommend_client import get_ai_recommend_client
+from .services.chat_end_worker import ChatEndWorker
+from .services.session_harvester import SessionHarvester
+from .services.redis_supervisor import RedisSupervisor
+from .services.travel_catalog import init_travel_catalog
+from .repositories.session_store import TieredSessionStore, build_session_store
 from .routers.user_features import router as user_features_router
 from .routers.chat import router as chat_router
 from .routers.user_summary import router as user_summary_router
 from .routers.recommend import router as recommend_router
+from .routers.metrics import router as metrics_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -43,16 +53,56 @@ async def lifespan(app: FastAPI):
     app.state.mongo_client = client
     app.state.mongo_db = client[settings.mongodb_db]
 
-    # Redis 연결 생성 (실패해도 앱은 기동되도록 처리)
-    redis_client = aioredis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
-    try:
-        await redis_client.ping()
-        app.state.redis = redis_client
-        logger.info("Connected to Redis")
-    except Exception as exc:
-        logger.warning(f"Redis connection failed; continuing without Redis. error={exc}")
-        app.state.redis = None
+    # LLM 클라이언트 레지스트리 (커넥션 풀을 모든 채팅 서비스가 공유)
+    app.state.llm_registry = init_llm_registry(settings)
+    # SNZ_RecSys 클라이언트 (추천 라우터와 채팅 종료 후 추천 요청이 커넥션 풀을 공유)
+    app.state.recsys_client = init_recsys_client(settings)
+    # 여행 패키지 카탈로그 (기동 시 로드, 이후 change stream / 폴링으로 갱신)
+    app.state.travel_catalog = init_travel_catalog(app.state.mongo_db, settings)
+    if app.state.travel_catalog is not None:
+        await app.state.travel_catalog.start()
+    app.state.llm_cache = None
+    app.state.recommend_cache = None
+    app.state.chat_end_worker = None
+    app.state.redis = None
+    # 채팅 세션 저장소 (재연결 시 바뀌는 app.state.redis를 매번 참조)
+    app.state.session_store = build_session_store(settings, lambda: app.state.redis)
+
+    async def on_redis_connected(redis_client) -> None:
+        # LLM 응답 캐시 (Redis 미연결 시 캐시 없이 동작)
+        app.state.llm_cache = init_llm_cache(redis_client, settings)
+        # 추천 결과 캐시
+        app.state.recommend_cache = init_recommend_cache(redis_client, settings)
+        # 추천 요청 워커 간 합치기
+        get_ai_recommend_client().redis = redis_client
+        # 채팅 종료 백그라운드 워커 (Redis 큐 기반)
+        if app.state.chat_end_worker is None and settings.chat_end_worker_enabled:
+            app.state.chat_end_worker = ChatEndWorker(redis_client, app.state.session_store, app.state.mongo_db, settings)
+            app.state.chat_end_worker.start()
+        # tiered 저장소: 장애 중 L1에만 기록된 세션을 Redis에 다시 반영
+        if isinstance(app.state.session_store, TieredSessionStore):
+            await app.state.session_store.resync()
+
+    # Redis 연결 (실패해도 앱은 기동되고, 감시 태스크가 백그라운드에서 재연결)
+    app.state.redis_supervisor = RedisSupervisor(app.state, settings, on_redis_connected)
+    await app.state.redis_supervisor.connect()
+    app.state.redis_supervisor.start()
+
+    # 만료 직전 세션 수거기
+    app.state.session_harvester = None
+    if settings.chat_harvest_enabled:
+        app.state.session_harvester = SessionHarvester(app.state.session_store, app.state.mongo_db, settings)
+        app.state.session_harvester.start()
     yield
+    if app.state.session_harvester is not None:
+        await app.state.session_harvester.stop()
+    if app.state.chat_end_worker is not None:
+        await app.state.chat_end_worker.stop()
+    await app.state.redis_supervisor.stop()
+    if app.state.travel_catalog is not None:
+        await app.state.travel_catalog.stop()
+    await close_llm_registry()
+    await close_recsys_client()
     client.close()
     try:
         if getattr(app.state, "redis", None) is not None:
@@ -89,4 +139,5 @@ def health() -> dict[str, str]:
 app.include_router(user_features_router)
 app.include_router(chat_router)
 app.include_router(user_summary_router)
-app.include_router(recommend_router)
\ No newline at end of file
+app.include_router(recommend_router)
+app.include_router(metrics_router)
\ No newline at end of file
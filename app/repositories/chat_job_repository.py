@@ -0,0 +1,175 @@
+"""채팅 종료(최종 요약) 백그라운드 작업 Redis 큐
+
+- chat_job:{job_id}              (hash) status / session_id / user_id / final_summary / error / attempts / lease_until / not_before
+- chat_job:by_session:{session}  (string) 세션당 하나의 작업만 만들기 위한 인덱스
+- chat_jobs:queue                (list) 대기 중인 job_id
+- chat_jobs:processing           (list) 처리 중인 job_id (워커가 죽으면 lease 만료 후 다시 queue로)
+- chat_jobs:delayed              (zset) 실패 후 재시도 대기 중인 job_id (score: not_before). take 시 시각이 지난 것만 queue로 옮김
+
+queue → processing 이동과 lease 설정은 하나의 Lua 스크립트로 처리하고, 워커는 처리하는 동안 lease를 주기적으로 연장합니다.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import Redis
+
+
+QUEUE_KEY = "chat_jobs:queue"
+PROCESSING_KEY = "chat_jobs:processing"
+DELAYED_KEY = "chat_jobs:delayed"
+# take 한 번에 delayed → queue 로 옮기는 최대 개수
+_PROMOTE_BATCH = 100
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# KEYS: queue, processing, delayed / ARGV: job key prefix, lease_until, now, promote batch
+# 재시도 시각(not_before)이 지난 작업을 대기열로 옮긴 뒤, 대기열에서 꺼내 processing으로 옮기는 것과 lease 설정을 한 번에
+# (lease 없는 처리 중 작업이 생기지 않도록)
+_TAKE_JOB_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', ARGV[3], 'LIMIT', 0, tonumber(ARGV[4]))
+for _, due_id in ipairs(due) do
+    redis.call('ZREM', KEYS[3], due_id)
+    redis.call('LPUSH', KEYS[1], due_id)
+end
+local job_id = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+if not job_id then
+    return false
+end
+local job_key = ARGV[1] .. job_id
+redis.call('HSET', job_key, 'status', 'running', 'lease_until', ARGV[2], 'updated_at', ARGV[3])
+redis.call('HDEL', job_key, 'not_before')
+redis.call('HINCRBY', job_key, 'attempts', 1)
+return job_id
+"""
+
+# KEYS: job, processing / ARGV: job_id, lease_until, now
+# 아직 processing에 있는 작업만 lease 연장
+_RENEW_LEASE_LUA = """
+if not redis.call('LPOS', KEYS[2], ARGV[1]) then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'lease_until', ARGV[2], 'updated_at', ARGV[3])
+return 1
+"""
+
+# KEYS: job, processing, queue / ARGV: job_id, now
+# lease 확인과 회수를 한 번에 (확인 직후 다른 워커가 lease를 연장하는 경우를 막음)
+_REQUEUE_IF_EXPIRED_LUA = """
+local lease_until = redis.call('HGET', KEYS[1], 'lease_until')
+if lease_until and tonumber(lease_until) > tonumber(ARGV[2]) then
+    return 0
+end
+if redis.call('LREM', KEYS[2], 1, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'status', 'queued', 'updated_at', ARGV[2])
+redis.call('HDEL', KEYS[1], 'lease_until')
+redis.call('LPUSH', KEYS[3], ARGV[1])
+return 1
+"""
+
+
+def _job_key(job_id: str) -> str:
+    return f"chat_job:{job_id}"
+
+
+def _session_index_key(session_id: str) -> str:
+    return f"chat_job:by_session:{session_id}"
+
+
+async def enqueue_end_job(redis: Redis, session_id: str, user_id: str, ttl_seconds: int) -> str:
+    """세션 종료 작업을 등록하고 job_id를 반환합니다. 이미 등록된 세션이면 기존 job_id를 반환합니다."""
+    job_id = str(uuid.uuid4())
+    created = await redis.set(_session_index_key(session_id), job_id, nx=True, ex=ttl_seconds)
+    if not created:
+        existing = await redis.get(_session_index_key(session_id))
+        if existing is not None:
+            return existing
+    now = time.time()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            _job_key(job_id),
+            mapping={
+                "status": JOB_QUEUED,
+                "session_id": session_id,
+                "user_id": user_id,
+                "attempts": 0,
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+        pipe.expire(_job_key(job_id), ttl_seconds)
+        pipe.lpush(QUEUE_KEY, job_id)
+        await pipe.execute()
+    return job_id
+
+
+async def get_job(redis: Redis, job_id: str) -> Optional[Dict[str, Any]]:
+    job = await redis.hgetall(_job_key(job_id))
+    if not job:
+        return None
+    job["job_id"] = job_id
+    return job
+
+
+async def take_job(redis: Redis, lease_seconds: float) -> Optional[str]:
+    """대기열에서 작업을 하나 꺼내 processing 목록으로 옮기고 lease를 설정합니다 (원자적, 대기 없음).
+
+    재시도 대기 중(delayed)인 작업은 not_before 시각이 지난 뒤에만 대기열로 옮겨 꺼냅니다.
+    """
+    script = redis.register_script(_TAKE_JOB_LUA)
+    now = time.time()
+    job_id = await script(
+        keys=[QUEUE_KEY, PROCESSING_KEY, DELAYED_KEY],
+        args=[_job_key(""), now + lease_seconds, now, _PROMOTE_BATCH],
+    )
+    return job_id or None
+
+
+async def renew_lease(redis: Redis, job_id: str, lease_seconds: float) -> bool:
+    """처리 중인 작업의 lease를 연장합니다. 이미 회수/완료된 작업이면 False."""
+    script = redis.register_script(_RENEW_LEASE_LUA)
+    now = time.time()
+    renewed = await script(keys=[_job_key(job_id), PROCESSING_KEY], args=[job_id, now + lease_seconds, now])
+    return bool(int(renewed))
+
+
+async def complete_job(redis: Redis, job_id: str, final_summary: str) -> None:
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(_job_key(job_id), mapping={"status": JOB_DONE, "final_summary": final_summary, "updated_at": time.time()})
+        pipe.hdel(_job_key(job_id), "lease_until", "error")
+        pipe.lrem(PROCESSING_KEY, 0, job_id)
+        await pipe.execute()
+
+
+async def fail_job(redis: Redis, job_id: str, error: str, retry: bool, retry_delay_seconds: float = 0.0) -> None:
+    """실패 기록. retry=True면 retry_delay_seconds 뒤에 다시 꺼낼 수 있도록 재시도 대기(delayed)에 넣습니다."""
+    now = time.time()
+    async with redis.pipeline(transaction=True) as pipe:
+        mapping: Dict[str, Any] = {"status": JOB_QUEUED if retry else JOB_FAILED, "error": error, "updated_at": now}
+        if retry:
+            mapping["not_before"] = now + retry_delay_seconds
+        pipe.hset(_job_key(job_id), mapping=mapping)
+        pipe.hdel(_job_key(job_id), "lease_until")
+        pipe.lrem(PROCESSING_KEY, 0, job_id)
+        if retry:
+            pipe.zadd(DELAYED_KEY, {job_id: now + retry_delay_seconds})
+        await pipe.execute()
+
+
+async def requeue_expired_jobs(redis: Redis) -> List[str]:
+    """lease가 만료된 처리 중 작업(워커 재시작/중단)을 다시 대기열로 돌립니다."""
+    script = redis.register_script(_REQUEUE_IF_EXPIRED_LUA)
+    requeued: List[str] = []
+    now = time.time()
+    for job_id in await redis.lrange(PROCESSING_KEY, 0, -1):
+        # 다른 워커가 먼저 회수했거나 lease가 살아 있으면 0
+        if int(await script(keys=[_job_key(job_id), PROCESSING_KEY, QUEUE_KEY], args=[job_id, now])):
+            requeued.append(job_id)
+    return requeued
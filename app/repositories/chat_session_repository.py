@@ -1,34 +1,323 @@
+"""채팅 세션 Redis 저장소
+
+세션은 두 개의 키로 나누어 저장합니다.
+- chat_session:{id}:meta     (hash)  user_id / count / draft_summary / final_summary 등 스칼라 필드
+- chat_session:{id}:messages (list)  메시지를 RPUSH로 추가만 함 (session_codec으로 인코딩)
+- chat_session:expiry        (zset)  session_id별 만료 예정 시각 (만료 직전 세션 수거용)
+
+턴마다 전체 세션을 다시 쓰지 않고, 메시지 추가 + count 증가 + TTL 갱신을 Lua 스크립트로
+한 번의 왕복에 원자적으로 처리합니다. hash 필드 값은 모두 JSON(UTF-8, 이스케이프 없음)으로 인코딩합니다.
+메시지 목록은 바이너리일 수 있으므로 NEVER_DECODE로 읽습니다.
+이전 버전의 단일 JSON 문자열 세션(chat_session:{id})도 읽기는 지원합니다.
+"""
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, Optional
+import time
+from typing import Any, Dict, List, Optional
 
 from redis.asyncio import Redis
+from redis.client import NEVER_DECODE
+
+from ..core import metrics
+from ..core.config import get_settings
+from .session_codec import BYTES_BUCKETS, SessionCodec, build_codec, decode_message, encode_message
+
+
+DEFAULT_TTL_SECONDS = 60 * 60
+
+# 공통 인자: KEYS = meta, messages, 만료 인덱스 / ARGV[1..3] = ttl, 만료 시각, session_id
+# ARGV[first]부터: 설정할 필드 개수 n, (field, value) * n, 이후 (field, 증가량) 쌍은 HINCRBYFLOAT
+_COMMON_LUA = """
+local function refresh_ttl()
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    redis.call('EXPIRE', KEYS[2], ARGV[1])
+    redis.call('ZADD', KEYS[3], ARGV[2], ARGV[3])
+end
+
+local function apply_fields(first)
+    local i = first + 1
+    for _ = 1, tonumber(ARGV[first]) do
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+        i = i + 2
+    end
+    while i <= #ARGV do
+        redis.call('HINCRBYFLOAT', KEYS[1], ARGV[i], ARGV[i + 1])
+        i = i + 2
+    end
+end
+"""
+
+# ARGV[4..5] = message json, count 증가량 / ARGV[6..] = 필드 인자
+_APPEND_MESSAGE_LUA = _COMMON_LUA + """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+redis.call('RPUSH', KEYS[2], ARGV[4])
+redis.call('HINCRBY', KEYS[1], 'message_bytes', string.len(ARGV[4]))
+local count = redis.call('HINCRBY', KEYS[1], 'count', ARGV[5])
+apply_fields(6)
+refresh_ttl()
+return count
+"""
+
+# ARGV[4..] = 필드 인자
+_SET_FIELDS_LUA = _COMMON_LUA + """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+apply_fields(4)
+refresh_ttl()
+return 1
+"""
+
+# ARGV[4] = expected count / ARGV[5..] = 필드 인자
+_SET_FIELDS_IF_COUNT_LUA = _COMMON_LUA + """
+local count = redis.call('HGET', KEYS[1], 'count')
+if not count or tonumber(count) ~= tonumber(ARGV[4]) then
+    return 0
+end
+apply_fields(5)
+refresh_ttl()
+return 1
+"""
+
+# 만료 인덱스에서 [min, max] 구간의 세션을 최대 ARGV[3]개 꺼내고 인덱스에서 제거 (워커 간 중복 처리 방지)
+_CLAIM_EXPIRING_LUA = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[1], ARGV[2], 'LIMIT', 0, ARGV[3])
+if #ids > 0 then
+    redis.call('ZREM', KEYS[1], unpack(ids))
+end
+return ids
+"""
+
+# 세션 만료 시각 인덱스 (sorted set, score = 만료 예정 unix time)
+EXPIRY_INDEX_KEY = "chat_session:expiry"
+
+
+_codec: Optional[SessionCodec] = None
 
 
-def _session_key(session_id: str) -> str:
+def _get_codec() -> SessionCodec:
+    global _codec
+    if _codec is None:
+        settings = get_settings()
+        _codec = build_codec(settings.chat_session_codec, settings.chat_session_compress_threshold_bytes)
+    return _codec
+
+
+def _legacy_session_key(session_id: str) -> str:
     return f"chat_session:{session_id}"
 
 
-async def create_session(redis: Redis, session_id: str, data: Dict[str, Any], ttl_seconds: int = 60 * 60) -> None:
-    await redis.set(_session_key(session_id), json.dumps(data), ex=ttl_seconds)
+def _meta_key(session_id: str) -> str:
+    return f"chat_session:{session_id}:meta"
+
+
+def _messages_key(session_id: str) -> str:
+    return f"chat_session:{session_id}:messages"
+
+
+def _script_keys(session_id: str) -> List[str]:
+    return [_meta_key(session_id), _messages_key(session_id), EXPIRY_INDEX_KEY]
+
+
+def _ttl_args(session_id: str, ttl_seconds: int) -> List[Any]:
+    return [ttl_seconds, time.time() + ttl_seconds, session_id]
+
+
+def _encode_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    return {k: json.dumps(v, ensure_ascii=False) for k, v in fields.items()}
+
+
+def _field_args(fields: Optional[Dict[str, Any]], increments: Optional[Dict[str, float]]) -> List[Any]:
+    encoded = _encode_fields(fields or {})
+    args: List[Any] = [len(encoded)]
+    for k, v in encoded.items():
+        args.extend([k, v])
+    for k, delta in (increments or {}).items():
+        args.extend([k, delta])
+    return args
+
+
+def _decode_fields(raw: Dict[str, str]) -> Dict[str, Any]:
+    decoded: Dict[str, Any] = {}
+    for k, v in raw.items():
+        try:
+            decoded[k] = json.loads(v)
+        except json.JSONDecodeError:
+            decoded[k] = v
+    return decoded
+
+
+async def create_session(redis: Redis, session_id: str, data: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+    # "_"로 시작하는 키는 요청 처리 중에만 쓰는 임시 상태이므로 저장하지 않습니다
+    fields = {k: v for k, v in data.items() if k != "messages" and not k.startswith("_")}
+    fields.setdefault("count", 0)
+    codec = _get_codec()
+    encoded_messages = [encode_message(codec, m) for m in data.get("messages", [])]
+    fields["message_bytes"] = sum(len(m) for m in encoded_messages)
+    meta_key, messages_key = _meta_key(session_id), _messages_key(session_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(meta_key, messages_key)
+        pipe.hset(meta_key, mapping=_encode_fields(fields))
+        if encoded_messages:
+            pipe.rpush(messages_key, *encoded_messages)
+        pipe.expire(meta_key, ttl_seconds)
+        pipe.expire(messages_key, ttl_seconds)
+        pipe.zadd(EXPIRY_INDEX_KEY, {session_id: time.time() + ttl_seconds})
+        await pipe.execute()
 
 
 async def get_session(redis: Redis, session_id: str) -> Optional[Dict[str, Any]]:
-    raw = await redis.get(_session_key(session_id))
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hgetall(_meta_key(session_id))
+        pipe.execute_command("LRANGE", _messages_key(session_id), 0, -1, **{NEVER_DECODE: True})
+        meta, raw_messages = await pipe.execute()
+    if not meta:
+        return await _get_legacy_session(redis, session_id)
+    session = _decode_fields(meta)
+    session["messages"] = [decode_message(m) for m in raw_messages]
+    return session
+
+
+async def get_session_user_id(redis: Redis, session_id: str) -> Optional[str]:
+    raw = await redis.hget(_meta_key(session_id), "user_id")
+    if raw is None:
+        return None
+    return str(json.loads(raw))
+
+
+async def _get_legacy_session(redis: Redis, session_id: str) -> Optional[Dict[str, Any]]:
+    """이전 단일 JSON 세션을 읽고, 이후 턴부터 새 레이아웃을 쓰도록 이관합니다."""
+    raw = await redis.get(_legacy_session_key(session_id))
     if raw is None:
         return None
     try:
-        return json.loads(raw)
+        session = json.loads(raw)
     except json.JSONDecodeError:
         return None
+    await create_session(redis, session_id, session)
+    await redis.delete(_legacy_session_key(session_id))
+    return session
+
+
+async def append_message(
+    redis: Redis,
+    session_id: str,
+    role: str,
+    content: str,
+    fields: Optional[Dict[str, Any]] = None,
+    increments: Optional[Dict[str, float]] = None,
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+) -> Optional[int]:
+    """메시지를 추가하고 갱신된 count를 반환합니다. 사용자 메시지만 count를 증가시킵니다.
+
+    fields(덮어쓰기)/increments(누적)가 있으면 같은 왕복에서 세션 필드도 함께 갱신합니다.
+    세션이 없으면 None을 반환합니다.
+    """
+    script = redis.register_script(_APPEND_MESSAGE_LUA)
+    message = encode_message(_get_codec(), {"role": role, "content": content})
+    args: List[Any] = [
+        *_ttl_args(session_id, ttl_seconds),
+        message,
+        1 if role == "user" else 0,
+        *_field_args(fields, increments),
+    ]
+    count = await script(keys=_script_keys(session_id), args=args)
+    return None if int(count) < 0 else int(count)
+
+
+async def update_session_fields(
+    redis: Redis,
+    session_id: str,
+    fields: Dict[str, Any],
+    increments: Optional[Dict[str, float]] = None,
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+) -> bool:
+    """메시지를 제외한 세션 필드만 갱신합니다. 세션이 없으면 False를 반환합니다."""
+    if not fields and not increments:
+        return True
+    script = redis.register_script(_SET_FIELDS_LUA)
+    args: List[Any] = [*_ttl_args(session_id, ttl_seconds), *_field_args(fields, increments)]
+    updated = await script(keys=_script_keys(session_id), args=args)
+    return bool(int(updated))
+
+
+async def update_session_fields_if_count(
+    redis: Redis,
+    session_id: str,
+    expected_count: int,
+    fields: Dict[str, Any],
+    ttl_seconds: int = DEFAULT_TTL_SECONDS,
+) -> bool:
+    """세션 count가 expected_count와 같을 때만 필드를 갱신합니다 (그 사이 새 답변이 오면 버림)."""
+    script = redis.register_script(_SET_FIELDS_IF_COUNT_LUA)
+    args: List[Any] = [*_ttl_args(session_id, ttl_seconds), expected_count, *_field_args(fields, None)]
+    updated = await script(keys=_script_keys(session_id), args=args)
+    return bool(int(updated))
+
+
+async def touch_session(redis: Redis, session_id: str, ttl_seconds: int) -> None:
+    """세션 TTL만 연장합니다 (예: 백그라운드 종료 작업이 끝날 때까지 보존)."""
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.expire(_meta_key(session_id), ttl_seconds)
+        pipe.expire(_messages_key(session_id), ttl_seconds)
+        pipe.zadd(EXPIRY_INDEX_KEY, {session_id: time.time() + ttl_seconds})
+        await pipe.execute()
+
+
+async def get_session_stats(redis: Redis, session_id: str) -> Optional[Dict[str, Any]]:
+    """세션 저장 크기 통계: 메시지 인코딩 바이트 합계와 Redis가 보고하는 실제 메모리 사용량"""
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.hmget(_meta_key(session_id), ["count", "message_bytes"])
+        pipe.llen(_messages_key(session_id))
+        pipe.memory_usage(_meta_key(session_id))
+        pipe.memory_usage(_messages_key(session_id))
+        (count, message_bytes), length, meta_mem, messages_mem = await pipe.execute()
+    if count is None:
+        return None
+    return {
+        "codec": _get_codec().name,
+        "count": int(count),
+        "messages": length,
+        "message_bytes": int(message_bytes or 0),
+        "redis_memory_bytes": (meta_mem or 0) + (messages_mem or 0),
+    }
 
 
-async def update_session(redis: Redis, session_id: str, data: Dict[str, Any], ttl_seconds: int = 60 * 60) -> None:
-    await redis.set(_session_key(session_id), json.dumps(data), ex=ttl_seconds)
+def observe_session_size(session: Dict[str, Any]) -> None:
+    """세션 종료 시 전체 메시지 바이트를 히스토그램에 기록합니다."""
+    message_bytes = session.get("message_bytes")
+    if message_bytes is not None:
+        metrics.observe("chat_session_bytes", float(message_bytes), buckets=BYTES_BUCKETS, codec=_get_codec().name)
 
 
 async def delete_session(redis: Redis, session_id: str) -> None:
-    await redis.delete(_session_key(session_id))
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.delete(_meta_key(session_id), _messages_key(session_id), _legacy_session_key(session_id))
+        pipe.zrem(EXPIRY_INDEX_KEY, session_id)
+        await pipe.execute()
+
+
+async def claim_expiring_sessions(redis: Redis, within_seconds: float, limit: int) -> List[str]:
+    """within_seconds 안에 만료될 세션 ID를 최대 limit개 가져오고 만료 인덱스에서 제거합니다.
+
+    이미 만료된 항목은 함께 정리합니다. 가져간 세션에 다시 턴이 추가되면 인덱스에 다시 등록됩니다.
+    """
+    now = time.time()
+    await redis.zremrangebyscore(EXPIRY_INDEX_KEY, "-inf", now)
+    script = redis.register_script(_CLAIM_EXPIRING_LUA)
+    return list(await script(keys=[EXPIRY_INDEX_KEY], args=[now, now + within_seconds, limit]))
+
+
+async def get_session_ttl(redis: Redis, session_id: str) -> int:
+    """세션의 남은 TTL(초). 세션이 없으면 음수를 반환합니다."""
+    return int(await redis.ttl(_meta_key(session_id)))
 
 
+async def release_expiring_session(redis: Redis, session_id: str) -> None:
+    """claim했지만 처리하지 못한 세션을 남은 TTL 기준으로 만료 인덱스에 되돌립니다."""
+    ttl = await get_session_ttl(redis, session_id)
+    if ttl > 0:
+        await redis.zadd(EXPIRY_INDEX_KEY, {session_id: time.time() + ttl})
@@ -0,0 +1,82 @@
+"""채팅 세션 메시지 인코딩
+
+- JsonCodec    : 이전 형식. json.dumps 기본값이라 한글이 \\uXXXX(6바이트)로 이스케이프됩니다.
+- CompactCodec : 헤더(MAGIC + flags) + msgpack 본문. 한글은 UTF-8 그대로(3바이트) 저장되고,
+                 compress_threshold 바이트를 넘는 항목은 zlib으로 압축합니다.
+
+decode_message()는 헤더를 보고 형식을 판별하므로, 설정을 바꿔도 기존(JSON) 항목을 그대로 읽을 수 있습니다.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from typing import Any, Dict, Protocol
+
+import msgpack
+
+from ..core import metrics
+
+
+# JSON 텍스트는 NUL 바이트로 시작할 수 없으므로 형식 구분자로 사용
+MAGIC = b"\x00W"
+FLAG_ZLIB = 0x01
+
+BYTES_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+
+class SessionCodec(Protocol):
+    name: str
+
+    def encode(self, obj: Dict[str, Any]) -> bytes:
+        ...
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, obj: Dict[str, Any]) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+
+class CompactCodec:
+    name = "compact"
+
+    def __init__(self, compress_threshold: int = 512, compress_level: int = 6):
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+
+    def encode(self, obj: Dict[str, Any]) -> bytes:
+        payload = msgpack.packb(obj, use_bin_type=True)
+        flags = 0
+        if len(payload) > self.compress_threshold:
+            compressed = zlib.compress(payload, self.compress_level)
+            if len(compressed) < len(payload):
+                payload, flags = compressed, FLAG_ZLIB
+        return MAGIC + bytes([flags]) + payload
+
+
+def decode_message(raw: bytes | str) -> Dict[str, Any]:
+    if isinstance(raw, str):
+        return json.loads(raw)
+    if not raw.startswith(MAGIC):
+        return json.loads(raw.decode("utf-8"))
+    flags = raw[len(MAGIC)]
+    payload = raw[len(MAGIC) + 1:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return msgpack.unpackb(payload, raw=False)
+
+
+def encode_message(codec: SessionCodec, message: Dict[str, Any]) -> bytes:
+    encoded = codec.encode(message)
+    metrics.observe("chat_session_message_bytes", len(encoded), buckets=BYTES_BUCKETS, codec=codec.name)
+    metrics.incr("chat_session_message_bytes_total", len(encoded), codec=codec.name)
+    return encoded
+
+
+def build_codec(name: str, compress_threshold: int) -> SessionCodec:
+    if name == "json":
+        return JsonCodec()
+    if name == "compact":
+        return CompactCodec(compress_threshold=compress_threshold)
+    raise ValueError(f"Unknown session codec: {name}")
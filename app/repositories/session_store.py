@@ -0,0 +1,451 @@
+"""채팅 세션 저장소 백엔드
+
+chat_session_repository의 함수들을 같은 시그니처의 메서드로 감싼 저장소 추상화입니다.
+설정(chat_session_store)에 따라 다음 중 하나를 사용합니다.
+
+- redis  : RedisSessionStore. 모든 워커가 같은 세션을 봅니다 (기본값).
+- memory : MemorySessionStore. 프로세스 내 TTL-LRU. Redis 없이 단일 워커로 실행할 때 사용합니다.
+- tiered : TieredSessionStore. 프로세스 내 L1 + Redis(write-through).
+           읽기는 L1에서 바로 응답해 턴마다 Redis 왕복 하나를 줄이고, Redis 장애 중에는 L1만으로
+           계속 동작합니다. 장애 중 변경된 세션은 Redis가 돌아오면 resync()로 다시 기록합니다.
+
+tiered 모드의 L1은 워커별로 따로 존재하므로, 한 세션의 요청이 항상 같은 워커로 가도록
+로드밸런서에서 session_id 기준 sticky routing을 설정해야 합니다. 그렇지 않으면 다른 워커가
+갱신한 세션을 L1에서 오래된 상태로 읽을 수 있습니다.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from ..core import metrics
+from ..core.config import Settings
+from . import chat_session_repository as repo
+from .chat_session_repository import DEFAULT_TTL_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStoreUnavailable(Exception):
+    """저장소 백엔드에 연결할 수 없음"""
+
+
+# Redis 장애로 보고 L1으로 대체할 예외
+_REDIS_DOWN = (SessionStoreUnavailable, RedisConnectionError, RedisTimeoutError, OSError)
+
+
+class RedisSessionStore:
+    name = "redis"
+
+    def __init__(self, client_provider: Callable[[], Optional[Redis]]):
+        # 재연결 시 app.state.redis가 바뀌므로 클라이언트를 매번 provider로 가져옵니다
+        self._client_provider = client_provider
+
+    @property
+    def available(self) -> bool:
+        return self._client_provider() is not None
+
+    def _redis(self) -> Redis:
+        client = self._client_provider()
+        if client is None:
+            raise SessionStoreUnavailable("Redis is unavailable")
+        return client
+
+    async def create(self, session_id: str, data: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        await repo.create_session(self._redis(), session_id, data, ttl_seconds)
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return await repo.get_session(self._redis(), session_id)
+
+    async def get_user_id(self, session_id: str) -> Optional[str]:
+        return await repo.get_session_user_id(self._redis(), session_id)
+
+    async def append_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        fields: Optional[Dict[str, Any]] = None,
+        increments: Optional[Dict[str, float]] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> Optional[int]:
+        return await repo.append_message(self._redis(), session_id, role, content, fields, increments, ttl_seconds)
+
+    async def update_fields(
+        self,
+        session_id: str,
+        fields: Dict[str, Any],
+        increments: Optional[Dict[str, float]] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> bool:
+        return await repo.update_session_fields(self._redis(), session_id, fields, increments, ttl_seconds)
+
+    async def update_fields_if_count(
+        self,
+        session_id: str,
+        expected_count: int,
+        fields: Dict[str, Any],
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> bool:
+        return await repo.update_session_fields_if_count(self._redis(), session_id, expected_count, fields, ttl_seconds)
+
+    async def touch(self, session_id: str, ttl_seconds: int) -> None:
+        await repo.touch_session(self._redis(), session_id, ttl_seconds)
+
+    async def delete(self, session_id: str) -> None:
+        await repo.delete_session(self._redis(), session_id)
+
+    async def claim_expiring(self, within_seconds: float, limit: int) -> List[str]:
+        return await repo.claim_expiring_sessions(self._redis(), within_seconds, limit)
+
+    async def get_ttl(self, session_id: str) -> int:
+        return await repo.get_session_ttl(self._redis(), session_id)
+
+    async def release_expiring(self, session_id: str) -> None:
+        await repo.release_expiring_session(self._redis(), session_id)
+
+
+class _Entry:
+    __slots__ = ("fields", "messages", "expire_at", "claimed")
+
+    def __init__(self, fields: Dict[str, Any], messages: List[Dict[str, str]], expire_at: float):
+        self.fields = fields
+        self.messages = messages
+        self.expire_at = expire_at
+        self.claimed = False
+
+
+class MemorySessionStore:
+    """프로세스 내 TTL-LRU 세션 저장소. 이벤트 루프 안에서만 접근하므로 별도 락이 없습니다."""
+
+    name = "memory"
+    available = True
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    def _entry(self, session_id: str) -> Optional[_Entry]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        if entry.expire_at <= time.time():
+            del self._entries[session_id]
+            return None
+        self._entries.move_to_end(session_id)
+        return entry
+
+    def _refresh(self, entry: _Entry, ttl_seconds: int) -> None:
+        # Redis의 만료 인덱스 ZADD와 같이, 갱신된 세션은 다시 수거 대상이 됩니다
+        entry.expire_at = time.time() + ttl_seconds
+        entry.claimed = False
+
+    @staticmethod
+    def _apply(entry: _Entry, fields: Optional[Dict[str, Any]], increments: Optional[Dict[str, float]]) -> None:
+        if fields:
+            entry.fields.update(fields)
+        for field, delta in (increments or {}).items():
+            entry.fields[field] = (entry.fields.get(field) or 0) + delta
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def create(self, session_id: str, data: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        fields = {k: v for k, v in data.items() if k != "messages" and not k.startswith("_")}
+        fields.setdefault("count", 0)
+        messages = [dict(m) for m in data.get("messages", [])]
+        self._entries[session_id] = _Entry(fields, messages, time.time() + ttl_seconds)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.incr("session_store_l1_evictions_total")
+        metrics.set_gauge("session_store_l1_entries", len(self._entries))
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._entry(session_id)
+        if entry is None:
+            return None
+        # 호출 측이 상태를 수정하므로 복사본을 반환
+        return {**entry.fields, "messages": [dict(m) for m in entry.messages]}
+
+    async def get_user_id(self, session_id: str) -> Optional[str]:
+        entry = self._entry(session_id)
+        if entry is None or entry.fields.get("user_id") is None:
+            return None
+        return str(entry.fields["user_id"])
+
+    async def append_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        fields: Optional[Dict[str, Any]] = None,
+        increments: Optional[Dict[str, float]] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> Optional[int]:
+        entry = self._entry(session_id)
+        if entry is None:
+            return None
+        entry.messages.append({"role": role, "content": content})
+        if role == "user":
+            entry.fields["count"] = int(entry.fields.get("count") or 0) + 1
+        self._apply(entry, fields, increments)
+        self._refresh(entry, ttl_seconds)
+        return int(entry.fields["count"])
+
+    async def update_fields(
+        self,
+        session_id: str,
+        fields: Dict[str, Any],
+        increments: Optional[Dict[str, float]] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> bool:
+        entry = self._entry(session_id)
+        if entry is None:
+            return False
+        self._apply(entry, fields, increments)
+        self._refresh(entry, ttl_seconds)
+        return True
+
+    async def update_fields_if_count(
+        self,
+        session_id: str,
+        expected_count: int,
+        fields: Dict[str, Any],
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> bool:
+        entry = self._entry(session_id)
+        if entry is None or int(entry.fields.get("count") or 0) != expected_count:
+            return False
+        self._apply(entry, fields, None)
+        self._refresh(entry, ttl_seconds)
+        return True
+
+    async def touch(self, session_id: str, ttl_seconds: int) -> None:
+        entry = self._entry(session_id)
+        if entry is not None:
+            self._refresh(entry, ttl_seconds)
+
+    async def delete(self, session_id: str) -> None:
+        self._entries.pop(session_id, None)
+
+    async def claim_expiring(self, within_seconds: float, limit: int) -> List[str]:
+        now = time.time()
+        deadline = now + within_seconds
+        claimed: List[str] = []
+        for session_id, entry in list(self._entries.items()):
+            if entry.expire_at <= now:
+                del self._entries[session_id]
+            elif not entry.claimed and entry.expire_at <= deadline and len(claimed) < limit:
+                entry.claimed = True
+                claimed.append(session_id)
+        return claimed
+
+    async def get_ttl(self, session_id: str) -> int:
+        entry = self._entry(session_id)
+        if entry is None:
+            return -2
+        return int(entry.expire_at - time.time())
+
+    async def release_expiring(self, session_id: str) -> None:
+        entry = self._entry(session_id)
+        if entry is not None:
+            entry.claimed = False
+
+
+class TieredSessionStore:
+    """L1(프로세스 내) + Redis. 쓰기는 Redis에 먼저 반영한 뒤 L1에 같은 변경을 적용합니다."""
+
+    name = "tiered"
+    available = True
+
+    def __init__(self, l1: MemorySessionStore, l2: RedisSessionStore):
+        self.l1 = l1
+        self.l2 = l2
+        # Redis 장애 중 L1에만 반영된 세션 (재연결 후 resync 대상)
+        self._dirty: Set[str] = set()
+
+    def _fallback(self, op: str, exc: BaseException) -> None:
+        metrics.incr("session_store_fallback_total", op=op)
+        logger.warning(f"Session store degraded to L1: op={op}, error={exc}")
+
+    async def _sync_count(self, session_id: str, local: Optional[int], remote: Optional[int]) -> None:
+        # L1이 Redis와 어긋났으면 (다른 워커의 쓰기 등) 버리고 다음 읽기에서 다시 채웁니다
+        if local is not None and local != remote:
+            await self.l1.delete(session_id)
+
+    async def create(self, session_id: str, data: Dict[str, Any], ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        try:
+            await self.l2.create(session_id, data, ttl_seconds)
+        except _REDIS_DOWN as exc:
+            self._fallback("create", exc)
+            self._dirty.add(session_id)
+        await self.l1.create(session_id, data, ttl_seconds)
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = await self.l1.get(session_id)
+        if session is not None:
+            metrics.incr("session_store_l1_lookups_total", result="hit")
+            return session
+        metrics.incr("session_store_l1_lookups_total", result="miss")
+        try:
+            session = await self.l2.get(session_id)
+        except _REDIS_DOWN as exc:
+            self._fallback("get", exc)
+            return None
+        if session is not None:
+            ttl = await self.l2.get_ttl(session_id)
+            if ttl > 0:
+                await self.l1.create(session_id, session, ttl)
+        return session
+
+    async def get_user_id(self, session_id: str) -> Optional[str]:
+        user_id = await self.l1.get_user_id(session_id)
+        if user_id is not None:
+            return user_id
+        try:
+            return await self.l2.get_user_id(session_id)
+        except _REDIS_DOWN as exc:
+            self._fallback("get_user_id", exc)
+            return None
+
+    async def append_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        fields: Optional[Dict[str, Any]] = None,
+        increments: Optional[Dict[str, float]] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> Optional[int]:
+        try:
+            count = await self.l2.append_message(session_id, role, content, fields, increments, ttl_seconds)
+        except _REDIS_DOWN as exc:
+            self._fallback("append_message", exc)
+            count = await self.l1.append_message(session_id, role, content, fields, increments, ttl_seconds)
+            if count is not None:
+                self._dirty.add(session_id)
+            return count
+        if count is None:
+            await self.l1.delete(session_id)
+            return None
+        local = await self.l1.append_message(session_id, role, content, fields, increments, ttl_seconds)
+        await self._sync_count(session_id, local, count)
+        return count
+
+    async def update_fields(
+        self,
+        session_id: str,
+        fields: Dict[str, Any],
+        increments: Optional[Dict[str, float]] = None,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> bool:
+        try:
+            updated = await self.l2.update_fields(session_id, fields, increments, ttl_seconds)
+        except _REDIS_DOWN as exc:
+            self._fallback("update_fields", exc)
+            updated = await self.l1.update_fields(session_id, fields, increments, ttl_seconds)
+            if updated:
+                self._dirty.add(session_id)
+            return updated
+        if updated:
+            await self.l1.update_fields(session_id, fields, increments, ttl_seconds)
+        else:
+            await self.l1.delete(session_id)
+        return updated
+
+    async def update_fields_if_count(
+        self,
+        session_id: str,
+        expected_count: int,
+        fields: Dict[str, Any],
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ) -> bool:
+        try:
+            updated = await self.l2.update_fields_if_count(session_id, expected_count, fields, ttl_seconds)
+        except _REDIS_DOWN as exc:
+            self._fallback("update_fields_if_count", exc)
+            updated = await self.l1.update_fields_if_count(session_id, expected_count, fields, ttl_seconds)
+            if updated:
+                self._dirty.add(session_id)
+            return updated
+        if updated:
+            await self.l1.update_fields_if_count(session_id, expected_count, fields, ttl_seconds)
+        return updated
+
+    async def touch(self, session_id: str, ttl_seconds: int) -> None:
+        try:
+            await self.l2.touch(session_id, ttl_seconds)
+        except _REDIS_DOWN as exc:
+            self._fallback("touch", exc)
+            self._dirty.add(session_id)
+        await self.l1.touch(session_id, ttl_seconds)
+
+    async def delete(self, session_id: str) -> None:
+        await self.l1.delete(session_id)
+        self._dirty.discard(session_id)
+        try:
+            await self.l2.delete(session_id)
+        except _REDIS_DOWN as exc:
+            self._fallback("delete", exc)
+
+    async def claim_expiring(self, within_seconds: float, limit: int) -> List[str]:
+        try:
+            return await self.l2.claim_expiring(within_seconds, limit)
+        except _REDIS_DOWN as exc:
+            self._fallback("claim_expiring", exc)
+            return await self.l1.claim_expiring(within_seconds, limit)
+
+    async def get_ttl(self, session_id: str) -> int:
+        try:
+            return await self.l2.get_ttl(session_id)
+        except _REDIS_DOWN as exc:
+            self._fallback("get_ttl", exc)
+            return await self.l1.get_ttl(session_id)
+
+    async def release_expiring(self, session_id: str) -> None:
+        try:
+            await self.l2.release_expiring(session_id)
+        except _REDIS_DOWN as exc:
+            self._fallback("release_expiring", exc)
+            await self.l1.release_expiring(session_id)
+
+    async def resync(self) -> int:
+        """Redis 장애 중 L1에만 반영된 세션을 Redis에 다시 기록하고 기록한 수를 반환합니다."""
+        synced = 0
+        for session_id in list(self._dirty):
+            session = await self.l1.get(session_id)
+            ttl = await self.l1.get_ttl(session_id)
+            try:
+                if session is not None and ttl > 0:
+                    await self.l2.create(session_id, session, ttl)
+                    synced += 1
+            except _REDIS_DOWN as exc:
+                self._fallback("resync", exc)
+                break
+            self._dirty.discard(session_id)
+        if synced:
+            metrics.incr("session_store_resynced_total", synced)
+            logger.info(f"Resynced {synced} chat sessions to Redis")
+        return synced
+
+
+SessionStore = RedisSessionStore | MemorySessionStore | TieredSessionStore
+
+
+def build_session_store(settings: Settings, redis_provider: Callable[[], Optional[Redis]]) -> SessionStore:
+    backend = settings.chat_session_store
+    if backend == "redis":
+        return RedisSessionStore(redis_provider)
+    if backend == "memory":
+        return MemorySessionStore(settings.chat_session_l1_max_entries)
+    if backend == "tiered":
+        return TieredSessionStore(MemorySessionStore(settings.chat_session_l1_max_entries), RedisSessionStore(redis_provider))
+    raise ValueError(f"Unknown chat session store: {backend}")
@@ -0,0 +1,56 @@
+from __future__ import annotations
+from typing import Any, Iterable
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.schemas.recommend import TravelInfo
+
+INFO_COLLECTION = "travel_info"
+URL_COLLECTION = "travel_url"
+
+
+def _hydration_pipeline(match: dict[str, Any]) -> list[dict[str, Any]]:
+    # travel_info + travel_url 을 한 번의 aggregate로 결합하고, 응답에 필요한 필드만 가져옵니다.
+    # ($lookup localField/foreignField + pipeline 형식은 MongoDB 5.0 이상)
+    return [
+        {"$match": match},
+        {"$project": {"_id": 0, "product_code": 1, "title": 1, "hashtags": 1}},
+        {"$lookup": {
+            "from": URL_COLLECTION,
+            "localField": "product_code",
+            "foreignField": "product_code",
+            "pipeline": [{"$project": {"_id": 0, "url": 1}}, {"$limit": 1}],
+            "as": "url_docs",
+        }},
+        {"$project": {
+            "product_code": 1,
+            "title": 1,
+            "hashtags": 1,
+            "url": {"$ifNull": [{"$arrayElemAt": ["$url_docs.url", 0]}, ""]},
+        }},
+    ]
+
+
+def _serialize(doc: dict[str, Any]) -> TravelInfo:
+    return TravelInfo(
+        product_code=doc["product_code"],
+        title=doc.get("title", ""),
+        hashtags=doc.get("hashtags", []),
+        url=doc.get("url") or "",
+    )
+
+
+async def get_travel_packages(db: AsyncIOMotorDatabase, travel_ids: Iterable[str]) -> list[TravelInfo]:
+    """travel_ids 순서대로 여행 패키지를 반환합니다. travel_info에 없는 ID는 건너뜁니다."""
+    travel_ids = list(travel_ids)
+    if not travel_ids:
+        return []
+    cursor = db[INFO_COLLECTION].aggregate(_hydration_pipeline({"product_code": {"$in": list(dict.fromkeys(travel_ids))}}))
+    by_code = {doc["product_code"]: _serialize(doc) async for doc in cursor}
+    return [by_code[travel_id] for travel_id in travel_ids if travel_id in by_code]
+
+
+async def list_travel_packages(db: AsyncIOMotorDatabase) -> list[TravelInfo]:
+    """전체 여행 패키지 (인메모리 카탈로그 로드용)"""
+    cursor = db[INFO_COLLECTION].aggregate(_hydration_pipeline({"product_code": {"$exists": True}}))
+    return [_serialize(doc) async for doc in cursor]
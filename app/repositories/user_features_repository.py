@@ -1,3 +1,4 @@
+import logging
 from datetime import datetime, timezone
 from typing import Any
 
@@ -5,6 +6,8 @@ from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import ReturnDocument
 
+from ..services.keyword_engine import MAPPING_VERSION, build_analysis_payload
+from ..services.recommend_cache import invalidate_recommendations
 from ..schemas.user_features import (
     UserFeaturesCreate,
     UserFeaturesListResponse,
@@ -14,6 +17,11 @@ from ..schemas.user_features import (
 
 
 COLLECTION = "user_features"
+# 쓰기 시점에 계산해 문서에 함께 저장하는 분석 결과 (mapping_version + payload 또는 error)
+ANALYSIS_FIELD = "Analysis"
+ANALYSIS_PROJECTION = {"ID": 1, ANALYSIS_FIELD: 1}
+
+logger = logging.getLogger(__name__)
 
 
 def _to_object_id(id_str: str) -> ObjectId:
@@ -66,6 +74,43 @@ def _serialize(doc: dict[str, Any]) -> UserFeaturesResponse:
     )
 
 
+def build_analysis_document(doc: dict[str, Any]) -> dict[str, Any]:
+    """조회 경로(_serialize)가 보는 features(소문자 필드) 그대로 분석 결과를 계산합니다. 매핑 실패도 그대로 저장해 두었다가 읽을 때 같은 오류로 응답합니다."""
+    analysis: dict[str, Any] = {"mapping_version": MAPPING_VERSION, "computedAt": datetime.now(timezone.utc)}
+    try:
+        analysis["payload"] = build_analysis_payload(doc.get("features", {}))
+    except ValueError as exc:
+        analysis["error"] = str(exc)
+    return analysis
+
+
+def analysis_update_filter(doc: dict[str, Any]) -> dict[str, Any]:
+    # 계산하는 사이 features가 다시 바뀌었으면 덮어쓰지 않음 (그 쓰기가 자기 결과를 저장)
+    return {"_id": doc["_id"], "features": doc.get("features")}
+
+
+def _with_analysis(update: dict[str, Any]) -> dict[str, Any]:
+    """features를 통째로 바꾸는 쓰기는 분석 결과를 같은 $set에 담고, 그 밖의 쓰기는 기존 분석 결과를 $unset 합니다.
+
+    어느 쪽이든 features 쓰기와 분석 결과가 한 번의 원자적 쓰기로 바뀌므로, 이전 features로 계산된 결과가 남지 않습니다.
+    """
+    set_doc = update.get("$set", {})
+    if "features" in set_doc:
+        return {**update, "$set": {**set_doc, ANALYSIS_FIELD: build_analysis_document(set_doc)}}
+    return {**update, "$unset": {ANALYSIS_FIELD: ""}}
+
+
+async def _materialize_analysis(db: AsyncIOMotorDatabase, doc: dict[str, Any]) -> None:
+    """_with_analysis 가 분석 결과를 지운 문서에 다시 계산해 저장합니다 (best-effort)."""
+    if ANALYSIS_FIELD in doc:
+        return
+    try:
+        await db[COLLECTION].update_one(analysis_update_filter(doc), {"$set": {ANALYSIS_FIELD: build_analysis_document(doc)}})
+    except Exception as exc:
+        # 앞선 쓰기에서 Analysis를 지웠으므로 저장에 실패해도 조회 시 원본 features로 계산됨
+        logger.warning(f"Analysis materialization failed: _id={doc.get('_id')}, error={exc}")
+
+
 async def create_user_features(db: AsyncIOMotorDatabase, payload: UserFeaturesCreate) -> str:
     now = datetime.now(timezone.utc)
     doc: dict[str, Any] = {
@@ -74,7 +119,9 @@ async def create_user_features(db: AsyncIOMotorDatabase, payload: UserFeaturesCr
         "createdAt": now,
         "updated_at": now,
     }
+    doc[ANALYSIS_FIELD] = build_analysis_document(doc)
     result = await db[COLLECTION].insert_one(doc)
+    await invalidate_recommendations(doc["ID"])
     return str(result.inserted_id)
 
 
@@ -91,6 +138,41 @@ async def get_user_features_by_user_id(db: AsyncIOMotorDatabase, user_id: str) -
     return _serialize(doc) if doc else None
 
 
+async def _find_by_user_ids(
+    db: AsyncIOMotorDatabase,
+    user_ids: list[str],
+    projection: dict[str, Any] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """여러 user_id를 한 번의 $in 쿼리로 조회합니다. {요청한 user_id: 원본 문서} (없는 user_id는 빠짐)"""
+    # 저장된 ID가 문자열 / 정수일 수 있으므로 변형값 → 요청 user_id 역매핑을 만들어 둡니다
+    requested_by_variant: dict[Any, list[str]] = {}
+    for user_id in dict.fromkeys(user_ids):
+        for variant in _id_variants(user_id):
+            requested_by_variant.setdefault(variant, []).append(user_id)
+    if not requested_by_variant:
+        return {}
+
+    found: dict[str, dict[str, Any]] = {}
+    async for doc in db[COLLECTION].find({"ID": {"$in": list(requested_by_variant)}}, projection):
+        for user_id in requested_by_variant.get(doc.get("ID"), []):
+            found.setdefault(user_id, doc)
+    return found
+
+
+async def get_user_features_by_user_ids(db: AsyncIOMotorDatabase, user_ids: list[str]) -> dict[str, UserFeaturesResponse]:
+    """여러 user_id를 한 번의 $in 쿼리로 조회합니다. {요청한 user_id: 문서} (없는 user_id는 빠짐)"""
+    return {user_id: _serialize(doc) for user_id, doc in (await _find_by_user_ids(db, user_ids)).items()}
+
+
+async def get_user_analysis_doc(db: AsyncIOMotorDatabase, user_id: str) -> dict[str, Any] | None:
+    """저장된 분석 결과만 가져옵니다 (ID, Analysis 프로젝션)."""
+    return await db[COLLECTION].find_one({"ID": {"$in": _id_variants(user_id)}}, ANALYSIS_PROJECTION)
+
+
+async def get_user_analysis_docs(db: AsyncIOMotorDatabase, user_ids: list[str]) -> dict[str, dict[str, Any]]:
+    return await _find_by_user_ids(db, user_ids, ANALYSIS_PROJECTION)
+
+
 async def list_user_features(
     db: AsyncIOMotorDatabase,
     *,
@@ -123,9 +205,12 @@ async def update_user_features_by_oid(
 
     doc = await db[COLLECTION].find_one_and_update(
         {"_id": oid},
-        {"$set": update_doc},
+        _with_analysis({"$set": update_doc}),
         return_document=ReturnDocument.AFTER,
     )
+    if doc:
+        await _materialize_analysis(db, doc)
+        await invalidate_recommendations(doc.get("ID"))
     return _serialize(doc) if doc else None
 
 
@@ -142,9 +227,12 @@ async def update_user_features_by_user_id(
 
     doc = await db[COLLECTION].find_one_and_update(
         {"ID": {"$in": _id_variants(user_id)}},
-        {"$set": update_doc},
+        _with_analysis({"$set": update_doc}),
         return_document=ReturnDocument.AFTER,
     )
+    if doc:
+        await _materialize_analysis(db, doc)
+        await invalidate_recommendations(user_id, doc.get("ID"))
     return _serialize(doc) if doc else None
 
 async def upsert_user_features(db: AsyncIOMotorDatabase, payload: UserFeaturesCreate) -> str:
@@ -158,7 +246,7 @@ async def upsert_user_features(db: AsyncIOMotorDatabase, payload: UserFeaturesCr
 
     doc = await col.find_one_and_update(
         {"ID": {"$in": _id_variants(user_id)}},
-        {
+        _with_analysis({
             "$setOnInsert": {
                 "ID": user_id,
                 "createdAt": datetime.now(timezone.utc),
@@ -167,21 +255,27 @@ async def upsert_user_features(db: AsyncIOMotorDatabase, payload: UserFeaturesCr
                 **_payload_to_update_dict(payload),
                 "updatedAt": datetime.now(timezone.utc),
             },
-        },
+        }),
         upsert=True,
         return_document=ReturnDocument.AFTER,
     )
+    await _materialize_analysis(db, doc)
+    await invalidate_recommendations(user_id)
 
     return str(doc["_id"])
 
 
 async def delete_user_features_by_oid(db: AsyncIOMotorDatabase, document_id: str) -> bool:
     oid = _to_object_id(document_id)
-    result = await db[COLLECTION].delete_one({"_id": oid})
-    return result.deleted_count == 1
+    doc = await db[COLLECTION].find_one_and_delete({"_id": oid}, projection={"ID": 1})
+    if doc:
+        await invalidate_recommendations(doc.get("ID"))
+    return doc is not None
 
 
 async def delete_user_features_by_user_id(db: AsyncIOMotorDatabase, user_id: str) -> bool:
     result = await db[COLLECTION].delete_one({"ID": {"$in": _id_variants(user_id)}})
+    if result.deleted_count:
+        await invalidate_recommendations(user_id)
     return result.deleted_count == 1
 
@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Iterable, Tuple
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
 
 from app.schemas.user_summary import UserSummaryResponse
+from app.services.recommend_cache import invalidate_recommendations
 
 COLLECTION = "user_summary"
 
@@ -23,6 +25,18 @@ async def upsert_user_summary(db: AsyncIOMotorDatabase, user_id: str, summary_te
         {"$set": {"Summary": summary_text}},
         upsert=True,
     )
+    await invalidate_recommendations(user_id)
+
+
+async def bulk_upsert_user_summaries(db: AsyncIOMotorDatabase, items: Iterable[Tuple[str, str]]) -> int:
+    """(user_id, summary_text) 목록을 한 번의 bulk_write로 upsert하고 반영된 문서 수를 반환합니다."""
+    items = list(items)
+    requests = [UpdateOne({"ID": user_id}, {"$set": {"Summary": summary_text}}, upsert=True) for user_id, summary_text in items]
+    if not requests:
+        return 0
+    result = await db[COLLECTION].bulk_write(requests, ordered=False)
+    await invalidate_recommendations(*[user_id for user_id, _ in items])
+    return result.upserted_count + result.modified_count
 
 
 async def get_user_summary(db: AsyncIOMotorDatabase, user_id: str) -> UserSummaryResponse | None:
@@ -32,6 +46,7 @@ async def get_user_summary(db: AsyncIOMotorDatabase, user_id: str) -> UserSummar
 
 async def delete_user_summary(db: AsyncIOMotorDatabase, user_id: str) -> None:
     await db[COLLECTION].delete_one({"ID": user_id})
+    await invalidate_recommendations(user_id)
 
 
 
@@ -1,31 +1,88 @@
 from __future__ import annotations
+import json
 import uuid
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import logging
-from ..schemas.chat import ChatResponse, ReplyRequest, ChatStartRequest, ChatEndRequest
-from ..dependencies.db import get_db, get_redis
-from ..repositories.chat_session_repository import get_session, create_session, update_session, delete_session
+from ..schemas.chat import ChatResponse, ReplyRequest, ChatStartRequest, ChatEndRequest, ChatEndJobResponse, ChatDraftRequest
+from ..core.config import get_settings
+from ..dependencies.db import get_db, get_redis, get_session_store
+from ..dependencies.rate_limit import chat_rate_limit
+from ..repositories.chat_session_repository import observe_session_size
+from ..repositories.session_store import SessionStore
+from ..repositories.chat_job_repository import enqueue_end_job, get_job
 
 from ..services.chat_prompts import (
     next_question,
     make_draft_summary,
     make_final_summary,
+    maybe_fold_context,
+    record_user_answer,
+    all_themes_covered,
+    stream_next_question,
+    stream_draft_summary,
+    stream_final_summary,
 )
 from ..repositories.user_summary_repository import upsert_user_summary
 from ..services.ai_client import request_recommendations
+from ..services.llm_metrics import pop_llm_usage, session_usage
+from ..services.speculation import cancel_speculation, schedule_speculation, speculative_result
 
 
 _logger = logging.getLogger("uvicorn.info")
 
 
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(prefix="/chat", tags=["chat"], dependencies=[Depends(chat_rate_limit)])
+
+
+async def _append_user_reply(store: SessionStore, session_id: str, message: str) -> Dict[str, Any]:
+    """세션을 읽고 사용자 답변을 원자적으로 추가한 뒤, 프롬프트 생성용 세션 상태를 반환합니다."""
+    st = await store.get(session_id)
+    if st is None:
+        raise HTTPException(status_code=404, detail="세션이 잘못되었거나 존재하지 않습니다.")
+    # 주제 추적 모드: 직전 질문 주제를 다룬 것으로 표시 (메시지 추가와 같은 왕복에 저장)
+    theme_fields = record_user_answer(st)
+    count = await store.append_message(session_id, "user", message, fields=theme_fields)
+    if count is None:
+        raise HTTPException(status_code=404, detail="세션이 잘못되었거나 존재하지 않습니다.")
+    st["messages"].append({"role": "user", "content": message})
+    st["count"] = count
+    # 컨텍스트 예산 모드: 오래된 턴을 누적 요약으로 접었다면 세션에 반영
+    if await maybe_fold_context(st):
+        await store.update_fields(
+            session_id,
+            {"rolling_summary": st["rolling_summary"], "summarized_count": st["summarized_count"]},
+            increments=pop_llm_usage(st),
+        )
+    return st
+
+
+def _question_fields(st: Dict[str, Any]) -> Dict[str, Any]:
+    """질문 메시지와 함께 저장할 세션 필드 (주제 추적 모드의 현재 주제)"""
+    return {"current_theme": st["current_theme"]} if "current_theme" in st else {}
+
+
+async def _auto_finish(store: SessionStore, session_id: str, st: Dict[str, Any]) -> ChatResponse:
+    """모든 주제를 다룬 경우 질문 생성을 건너뛰고 요약 초안으로 대화를 마무리합니다."""
+    draft = speculative_result(st, "draft") or await make_draft_summary(st)
+    await store.update_fields(session_id, {"draft_summary": draft}, increments=pop_llm_usage(st))
+    return ChatResponse(session_id=session_id, assistant=draft, finished=True, draft_summary=draft)
+
+
+async def _save_final_summary(store: SessionStore, session_id: str, session_data: Dict[str, Any]) -> None:
+    usage = pop_llm_usage(session_data)
+    await store.update_fields(session_id, {"final_summary": session_data["final_summary"]}, increments=usage)
+    observe_session_size(session_data)
+    for field, delta in usage.items():
+        session_data[field] = session_data.get(field, 0) + delta
+    _logger.info(f"세션 LLM 사용량: session_id={session_id}, usage={session_usage(session_data)}")
 
 
 @router.post("/start", response_model=ChatResponse, summary="새 채팅 세션 등록")
-async def start_chat(req: ChatStartRequest, redis = Depends(get_redis)) -> ChatResponse:
+async def start_chat(req: ChatStartRequest, store: SessionStore = Depends(get_session_store)) -> ChatResponse:
     session_id = str(uuid.uuid4())
     session_data: Dict[str, Any] = {
         "user_id": req.user_id,
@@ -34,10 +91,10 @@ async def start_chat(req: ChatStartRequest, redis = Depends(get_redis)) -> ChatR
         "draft_summary": None,
         "final_summary": None,
     }
-    # Redis 세션 저장 후, 다음 질문 생성 시 메모리/Redis 동기화 유지
-    await create_session(redis, session_id, session_data)
-    assistant = await next_question(session_data) 
-    await update_session(redis, session_id, session_data)  
+    # 첫 질문까지 생성한 뒤 한 번에 저장
+    assistant = await next_question(session_data)
+    session_data.update(pop_llm_usage(session_data))
+    await store.create(session_id, session_data)
     return ChatResponse(session_id=session_id, assistant=assistant, finished=False)
 
 
@@ -47,20 +104,17 @@ async def start_chat(req: ChatStartRequest, redis = Depends(get_redis)) -> ChatR
 async def user_reply(
     req: ReplyRequest,
     db: AsyncIOMotorDatabase = Depends(get_db),
-    redis = Depends(get_redis),
+    store: SessionStore = Depends(get_session_store),
     return_draft: bool = Query(default=False, description="true면 요약 초안을 응답합니다 (대화는 종료되지 않음)"),
 ) -> ChatResponse:
     session_id = req.session_id
-    st = await get_session(redis, session_id)
-    if st is None:
-        raise HTTPException(status_code=404, detail="세션이 잘못되었거나 존재하지 않습니다.")
-    st["messages"].append({"role": "user", "content": req.message})
-    st["count"] += 1
+    st = await _append_user_reply(store, session_id, req.message)
 
     if return_draft and st.get("draft_summary") is None and st.get("final_summary") is None:
+        cancel_speculation(session_id)
         st["draft_summary"] = await make_draft_summary(st)
         assistant_text = st["draft_summary"]
-        await update_session(redis, session_id, st)
+        await store.update_fields(session_id, {"draft_summary": st["draft_summary"]}, increments=pop_llm_usage(st))
         return ChatResponse(
             session_id=session_id,
             assistant=assistant_text,
@@ -68,25 +122,79 @@ async def user_reply(
             draft_summary=st["draft_summary"],
         )
 
+    if all_themes_covered(st) and st.get("final_summary") is None:
+        cancel_speculation(session_id)
+        return await _auto_finish(store, session_id, st)
+
+    # 다음 질문을 만드는 동안 초안/최종 요약을 미리 계산 (speculative 모드)
+    schedule_speculation(store, session_id, st)
     assistant = await next_question(st)
-    await update_session(redis, session_id, st)
+    await store.append_message(
+        session_id, "assistant", assistant, fields=_question_fields(st), increments=pop_llm_usage(st)
+    )
     return ChatResponse(assistant=assistant, finished=False)
 
 
-@router.post("/end", response_model=ChatResponse, summary="채팅 종료 및 요약 확정")
-async def end_chat(req: ChatEndRequest, db: AsyncIOMotorDatabase = Depends(get_db), redis = Depends(get_redis)) -> ChatResponse:
+@router.post("/draft", response_model=ChatResponse, summary="현재 대화의 요약 초안 조회 (답변 추가 없음)")
+async def draft_chat(req: ChatDraftRequest, store: SessionStore = Depends(get_session_store)) -> ChatResponse:
     session_id = req.session_id
-    session_data = await get_session(redis, session_id)
+    st = await store.get(session_id)
+    if st is None:
+        raise HTTPException(status_code=404, detail="세션이 잘못되었거나 존재하지 않습니다.")
+    draft = speculative_result(st, "draft")
+    if draft is None:
+        draft = await make_draft_summary(st)
+    await store.update_fields(session_id, {"draft_summary": draft}, increments=pop_llm_usage(st))
+    return ChatResponse(session_id=session_id, assistant=draft, finished=False, draft_summary=draft)
+
+
+@router.post(
+    "/end",
+    response_model=ChatResponse,
+    responses={202: {"model": ChatEndJobResponse, "description": "background=true: 최종 요약 작업 등록됨"}},
+    summary="채팅 종료 및 요약 확정",
+)
+async def end_chat(
+    req: ChatEndRequest,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    store: SessionStore = Depends(get_session_store),
+    background: bool = Query(default=False, description="true면 최종 요약을 백그라운드로 처리하고 202와 작업 ID를 즉시 응답합니다"),
+):
+    session_id = req.session_id
+    session_data = await store.get(session_id)
     if session_data is None:
         raise HTTPException(status_code=404, detail="세션이 잘못되었거나 존재하지 않습니다.")
+    cancel_speculation(session_id)
+    redis = getattr(request.app.state, "redis", None)
+    if background and redis is None:
+        # 작업 큐(Redis)를 쓸 수 없는 동안은 동기 처리로 대체
+        _logger.warning(f"Redis unavailable; ending chat synchronously: session_id={session_id}")
+        background = False
+    elif background and getattr(request.app.state, "chat_end_worker", None) is None:
+        # 워커가 꺼져 있으면(chat_end_worker_enabled=false) 큐에 넣어도 처리되지 않으므로 동기 처리
+        _logger.warning(f"Chat end worker disabled; ending chat synchronously: session_id={session_id}")
+        background = False
+    if background:
+        settings = get_settings()
+        # 작업이 끝날 때까지 세션이 만료되지 않도록 TTL을 작업 보존 기간으로 연장
+        await store.touch(session_id, settings.chat_end_job_ttl_seconds)
+        job_id = await enqueue_end_job(redis, session_id, session_data["user_id"], settings.chat_end_job_ttl_seconds)
+        job = ChatEndJobResponse(
+            job_id=job_id,
+            session_id=session_id,
+            status="queued",
+            status_url=str(request.url_for("get_end_job", job_id=job_id)),
+        )
+        return JSONResponse(status_code=202, content=job.model_dump())
     if session_data.get("final_summary") is None:
-        session_data["final_summary"] = await make_final_summary(session_data)
+        session_data["final_summary"] = speculative_result(session_data, "final") or await make_final_summary(session_data)
         _logger.info(f"사용자 챗봇 요약 데이터 : {session_data['final_summary']}")
         await upsert_user_summary(db, session_data["user_id"], session_data["final_summary"])  # type: ignore[index]
-        await update_session(redis, session_id, session_data)
-        
+        await _save_final_summary(store, session_id, session_data)
+
     # 종료 시 세션 삭제 (필요 시 주석 처리)
-    await delete_session(redis, session_id)
+    await store.delete(session_id)
     return ChatResponse(
         session_id=session_id,
         assistant="대화를 종료했어요. 요약 결과를 저장했고, 추천을 요청했어요.",
@@ -95,3 +203,156 @@ async def end_chat(req: ChatEndRequest, db: AsyncIOMotorDatabase = Depends(get_d
     )
 
 
+@router.get("/end/jobs/{job_id}", response_model=ChatEndJobResponse, summary="백그라운드 채팅 종료 작업 상태 조회")
+async def get_end_job(job_id: str, redis = Depends(get_redis)) -> ChatEndJobResponse:
+    job = await get_job(redis, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업이 존재하지 않습니다.")
+    return ChatEndJobResponse(
+        job_id=job_id,
+        session_id=job["session_id"],
+        status=job["status"],
+        final_summary=job.get("final_summary"),
+        error=job.get("error"),
+    )
+
+
+# ---------------------------------------------------------------------------
+# 스트리밍(SSE) 엔드포인트
+# - event: session  -> {"session_id": ...} (start 전용)
+# - event: token    -> {"content": "..."} (LLM 토큰 단위)
+# - event: done     -> ChatResponse 전체 (Redis 저장이 끝난 뒤 전송)
+# - event: error    -> {"detail": "..."}
+# ---------------------------------------------------------------------------
+
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=_SSE_HEADERS)
+
+
+@router.post("/start/stream", summary="새 채팅 세션 등록 (SSE 스트리밍)")
+async def start_chat_stream(req: ChatStartRequest, store: SessionStore = Depends(get_session_store)) -> StreamingResponse:
+    session_id = str(uuid.uuid4())
+    session_data: Dict[str, Any] = {
+        "user_id": req.user_id,
+        "messages": [],
+        "count": 0,
+        "draft_summary": None,
+        "final_summary": None,
+    }
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse_event("session", {"session_id": session_id})
+        try:
+            async for token in stream_next_question(session_data):
+                yield _sse_event("token", {"content": token})
+            session_data.update(pop_llm_usage(session_data))
+            await store.create(session_id, session_data)
+        except Exception as exc:
+            _logger.error(f"채팅 시작 스트리밍 실패: session_id={session_id}, error={exc}")
+            yield _sse_event("error", {"detail": "질문 생성 중 오류가 발생했습니다."})
+            return
+        response = ChatResponse(session_id=session_id, assistant=session_data["messages"][-1]["content"], finished=False)
+        yield _sse_event("done", response.model_dump())
+
+    return _sse_response(events())
+
+
+@router.post("/reply/stream", summary="채팅 세션에 사용자 답변 등록 (SSE 스트리밍)")
+async def user_reply_stream(
+    req: ReplyRequest,
+    store: SessionStore = Depends(get_session_store),
+    return_draft: bool = Query(default=False, description="true면 요약 초안을 응답합니다 (대화는 종료되지 않음)"),
+) -> StreamingResponse:
+    session_id = req.session_id
+    st = await _append_user_reply(store, session_id, req.message)
+    with_draft = return_draft and st.get("draft_summary") is None and st.get("final_summary") is None
+    # 주제 추적 모드에서 모든 주제를 다뤘다면 질문 대신 요약 초안으로 마무리
+    auto_finish = not with_draft and all_themes_covered(st) and st.get("final_summary") is None
+    use_draft = with_draft or auto_finish
+
+    if use_draft:
+        cancel_speculation(session_id)
+    else:
+        schedule_speculation(store, session_id, st)
+
+    async def events() -> AsyncIterator[str]:
+        stream = stream_draft_summary(st) if use_draft else stream_next_question(st)
+        try:
+            async for token in stream:
+                yield _sse_event("token", {"content": token})
+            if use_draft:
+                await store.update_fields(
+                    session_id, {"draft_summary": st["draft_summary"]}, increments=pop_llm_usage(st)
+                )
+            else:
+                await store.append_message(
+                    session_id,
+                    "assistant",
+                    st["messages"][-1]["content"],
+                    fields=_question_fields(st),
+                    increments=pop_llm_usage(st),
+                )
+        except Exception as exc:
+            _logger.error(f"채팅 답변 스트리밍 실패: session_id={session_id}, error={exc}")
+            yield _sse_event("error", {"detail": "응답 생성 중 오류가 발생했습니다."})
+            return
+        if use_draft:
+            response = ChatResponse(
+                session_id=session_id,
+                assistant=st["draft_summary"],
+                finished=auto_finish,
+                draft_summary=st["draft_summary"],
+            )
+        else:
+            response = ChatResponse(assistant=st["messages"][-1]["content"], finished=False)
+        yield _sse_event("done", response.model_dump())
+
+    return _sse_response(events())
+
+
+@router.post("/end/stream", summary="채팅 종료 및 요약 확정 (SSE 스트리밍)")
+async def end_chat_stream(
+    req: ChatEndRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    store: SessionStore = Depends(get_session_store),
+) -> StreamingResponse:
+    session_id = req.session_id
+    session_data = await store.get(session_id)
+    if session_data is None:
+        raise HTTPException(status_code=404, detail="세션이 잘못되었거나 존재하지 않습니다.")
+    cancel_speculation(session_id)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            if session_data.get("final_summary") is None:
+                precomputed = speculative_result(session_data, "final")
+                if precomputed is not None:
+                    session_data["final_summary"] = precomputed
+                    yield _sse_event("token", {"content": precomputed})
+                else:
+                    async for token in stream_final_summary(session_data):
+                        yield _sse_event("token", {"content": token})
+                _logger.info(f"사용자 챗봇 요약 데이터 : {session_data['final_summary']}")
+                await upsert_user_summary(db, session_data["user_id"], session_data["final_summary"])
+                await _save_final_summary(store, session_id, session_data)
+            await store.delete(session_id)
+        except Exception as exc:
+            _logger.error(f"채팅 종료 스트리밍 실패: session_id={session_id}, error={exc}")
+            yield _sse_event("error", {"detail": "요약 생성 중 오류가 발생했습니다."})
+            return
+        response = ChatResponse(
+            session_id=session_id,
+            assistant="대화를 종료했어요. 요약 결과를 저장했고, 추천을 요청했어요.",
+            finished=True,
+            final_summary=session_data["final_summary"],
+        )
+        yield _sse_event("done", response.model_dump())
+
+    return _sse_response(events())
@@ -0,0 +1,37 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from redis.asyncio import Redis
+
+from ..core import metrics
+from ..dependencies.db import get_redis
+from ..repositories.chat_session_repository import get_session_stats
+
+
+router = APIRouter(prefix="/metrics", tags=["system"])
+
+
+@router.get("", summary="워커 단위 메트릭 조회")
+async def get_metrics(request: Request) -> dict[str, Any]:
+    result: dict[str, Any] = metrics.snapshot()
+    llm_cache = getattr(request.app.state, "llm_cache", None)
+    if llm_cache is not None:
+        try:
+            result["llm_cache"] = await llm_cache.stats()
+        except Exception as exc:
+            result["llm_cache"] = {"error": str(exc)}
+    travel_catalog = getattr(request.app.state, "travel_catalog", None)
+    if travel_catalog is not None:
+        result["travel_catalog"] = travel_catalog.stats()
+    return result
+
+
+@router.get("/chat-sessions/{session_id}", summary="채팅 세션 저장 크기 조회 (코덱 / 인코딩 바이트 / Redis 메모리)")
+async def get_chat_session_stats(
+    session_id: str,
+    redis: Redis = Depends(get_redis),
+) -> dict[str, Any]:
+    stats = await get_session_stats(redis, session_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="세션이 존재하지 않습니다.")
+    return stats
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import math
+import time
+from typing import Awaitable, Optional, Tuple, TypeVar
 from fastapi import APIRouter, HTTPException, Depends
 from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
 
-from app.constants.result_keyword_ver2 import PERSONAL_KEYWORD_MAPPINGS, TRAVEL_PURPOSE_MAPPINGS, TRAVEL_KEYWORD_MAPPINGS
-from ..services.analysis_result import get_user_analysis_data
+from ..services.keyword_engine import profile_keywords_batch
 from ..schemas.recommend import (
     RecommendRequest, 
     RecommendResponse,
+    RecommendFullResponse,
     UserProfileRequest,
     UserProfileResponse,
     UserProfile,
@@ -16,11 +20,19 @@ from ..schemas.recommend import (
     TravelResponse,
     TravelInfo,
 )
+from ..core import metrics
+from ..core.config import get_settings
 from ..services.ai_recommend_client import get_ai_recommend_client, AIRecommendClient
-from ..dependencies.db import get_db, get_user_features_collection, get_travel_info_collection, get_travel_url_collection
+from ..services.recommend_cache import cached_recommendations
+from ..services.circuit_breaker import CircuitOpenError
+from ..services.travel_catalog import get_travel_catalog
+from ..repositories import travel_repository
+from ..dependencies.db import get_db, get_user_features_collection
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 router = APIRouter(prefix="/recommend", tags=["recommend"])
 
 
@@ -29,28 +41,53 @@ async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@router.post("", summary="사용자 추천 요청")
-async def get_recommendations(
-    req: RecommendRequest,
-    ai_client: AIRecommendClient = Depends(get_ai_recommend_client),
+async def _fetch_recommendations(
+    user_id: str,
+    ai_client: AIRecommendClient,
+    timeout: Optional[float] = None,
 ) -> RecommendResponse:
+    """추천 결과 조회 (캐시가 있으면 캐시 우선, 오래된 결과는 백그라운드 갱신). 실패는 HTTPException으로 변환합니다.
+
+    timeout을 주면 백엔드 호출을 그 시간 안에서만 기다립니다. 초과하면 캐시된 fallback으로 응답하고, 없으면 503.
+    (호출 자체는 shield되어 계속 진행되므로, 같은 사용자의 다음 요청은 진행 중인 호출에 합류합니다)
     """
-    AI 백엔드에서 사용자 맞춤 추천 정보를 조회
-    """
+    def fetch() -> Awaitable[dict]:
+        if timeout is None:
+            return ai_client.get_user_recommendations(user_id)
+        return asyncio.wait_for(ai_client.get_user_recommendations(user_id), timeout=timeout)
+
     try:
-        logger.info(f"사용자 추천 요청: {req.user_id}")
+        logger.info(f"사용자 추천 요청: {user_id}")
         
         # AI 백엔드에 추천 요청
-        ai_response = await ai_client.get_user_recommendations(req.user_id)
+        ai_response, cache_status, cache_age = await cached_recommendations(user_id, fetch)
         
         # 응답 데이터 검증 및 변환
         return RecommendResponse(
-            user_id=ai_response.get("user_id", req.user_id),
+            user_id=ai_response.get("user_id", user_id),
             rec_people=ai_response.get("rec_people", []),
             rec_travel=ai_response.get("rec_travel", []),
             status=ai_response.get("status", "success"),
+            cache_status=cache_status,
+            cache_age_seconds=round(cache_age, 3) if cache_age is not None else None,
         )
         
+    except CircuitOpenError as e:
+        # 백엔드 장애 중에는 기다리지 않고 즉시 응답 (캐시된 결과가 없는 경우)
+        logger.warning(f"추천 백엔드 서킷 open, 즉시 실패: user_id={user_id}")
+        raise HTTPException(
+            status_code=503,
+            detail="추천 서비스를 일시적으로 사용할 수 없습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(max(1, math.ceil(e.retry_after_seconds)))},
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"추천 백엔드 응답 시간 초과: user_id={user_id}, timeout={timeout}s")
+        metrics.incr("recommend_timeouts_total")
+        raise HTTPException(
+            status_code=503,
+            detail="추천 응답이 지연되고 있습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"사용자 추천 요청 실패: {e}")
         raise HTTPException(
@@ -59,6 +96,43 @@ async def get_recommendations(
         )
 
 
+@router.post("", summary="사용자 추천 요청")
+async def get_recommendations(
+    req: RecommendRequest,
+    ai_client: AIRecommendClient = Depends(get_ai_recommend_client),
+) -> RecommendResponse:
+    """
+    AI 백엔드에서 사용자 맞춤 추천 정보를 조회 (캐시가 있으면 캐시 우선, 오래된 결과는 백그라운드 갱신)
+    """
+    return await _fetch_recommendations(req.user_id, ai_client)
+
+
+async def _load_user_profiles(
+    features_collection: AsyncIOMotorCollection,
+    user_ids: list[str],
+) -> list[UserProfile]:
+    """user_features에서 사용자 프로필과 매핑된 키워드를 요청 순서대로 조회합니다."""
+    # $in 결과는 저장 순서이므로 요청(추천 순위) 순서로 다시 정렬
+    docs_by_id = {doc["ID"]: doc async for doc in features_collection.find({"ID": {"$in": user_ids}})}
+    docs = [docs_by_id[user_id] for user_id in user_ids if user_id in docs_by_id]
+    
+    # 조회한 문서 전체를 한 번에 키워드로 매핑
+    keywords_list = profile_keywords_batch(doc.get("Features", {}) for doc in docs)
+    
+    users = [
+        UserProfile(
+            ID=doc["ID"],
+            name=doc.get("name", "알 수 없음"),
+            gender=doc.get("gender", "알 수 없음"),
+            age=doc.get("age", 0),
+            keywords=keywords,
+        )
+        for doc, keywords in zip(docs, keywords_list)
+    ]
+    
+    return users
+
+
 @router.post("/user-profile", summary="사용자 프로필 일괄 조회")
 async def get_user_profiles(
     req: UserProfileRequest,
@@ -71,71 +145,7 @@ async def get_user_profiles(
     try:
         logger.info(f"사용자 프로필 조회 요청: {len(req.user_ids)}명")
         
-        users = []
-        
-        # 각 사용자 ID에 대해 MongoDB 조회
-        async for doc in features_collection.find({"ID": {"$in": req.user_ids}}):
-            user_id = doc["ID"]
-            
-            # 기본 프로필 정보
-            user_profile_data = {
-                "ID": user_id,
-                "name": doc.get("name", "알 수 없음"),
-                "gender": doc.get("gender", "알 수 없음"),
-                "age": doc.get("age", 0)
-            }
-            
-            # Features에서 특정 키워드만 추출
-            features = doc.get("Features", {})
-            
-            # Features에서 원본 값 추출
-            raw_keywords = {
-                "시간약속": features.get("시간약속", ""),
-                "의견수용": features.get("의견수용", ""),
-                "여행희망지역": features.get("여행희망지역", []),
-                "여행목적": features.get("여행목적", []),
-            }
-            
-            # 매핑된 키워드로 변환
-            keywords = {}
-            
-            # 개인 특성 키워드 매핑
-            if raw_keywords["시간약속"]:
-                keywords["시간약속"] = PERSONAL_KEYWORD_MAPPINGS.get("시간약속", {}).get(
-                    raw_keywords["시간약속"], raw_keywords["시간약속"]
-                )
-            
-            if raw_keywords["의견수용"]:
-                keywords["의견수용"] = PERSONAL_KEYWORD_MAPPINGS.get("의견수용", {}).get(
-                    raw_keywords["의견수용"], raw_keywords["의견수용"]
-                )
-            
-            # 여행 키워드 매핑
-            if raw_keywords["여행희망지역"]:
-                keywords["여행희망지역"] = TRAVEL_KEYWORD_MAPPINGS.get("여행희망지역", {}).get(
-                    raw_keywords["여행희망지역"], raw_keywords["여행희망지역"]
-                )
-            
-            # 여행 목적 매핑 (리스트일 수 있음)
-            if raw_keywords["여행목적"]:
-                if isinstance(raw_keywords["여행목적"], str):
-                    keywords["여행목적"] = TRAVEL_PURPOSE_MAPPINGS.get("여행목적", {}).get(
-                        raw_keywords["여행목적"], raw_keywords["여행목적"]
-                    )
-                elif isinstance(raw_keywords["여행목적"], list):
-                    mapped_purposes = []
-                    for purpose in raw_keywords["여행목적"]:
-                        mapped_purpose = TRAVEL_PURPOSE_MAPPINGS.get("여행목적", {}).get(purpose, purpose)
-                        mapped_purposes.append(mapped_purpose)
-                    keywords["여행목적"] = mapped_purposes
-            
-            # 선택된 Features 키워드를 프로필 데이터에 추가
-            user_profile_data.update({
-                "keywords": keywords,
-            })
-
-            user_profile = UserProfile(**user_profile_data)
-            users.append(user_profile)
+        users = await _load_user_profiles(features_collection, req.user_ids)
         
         logger.info(f"사용자 프로필 조회 완료: {len(users)}명")
         
@@ -149,11 +159,20 @@ async def get_user_profiles(
         )
 
 
+async def _load_travel_packages(db: AsyncIOMotorDatabase, travel_ids: list[str]) -> list[TravelInfo]:
+    """요청 순서대로 여행 패키지를 반환합니다. 카탈로그가 로드되어 있으면 DB 조회 없이 응답합니다."""
+    catalog = get_travel_catalog()
+    if catalog is not None and catalog.ready:
+        metrics.incr("recommend_travel_lookups_total", source="catalog")
+        return catalog.lookup(travel_ids)
+    metrics.incr("recommend_travel_lookups_total", source="db")
+    return await travel_repository.get_travel_packages(db, travel_ids)
+
+
 @router.post("/travel", summary="여행 패키지 정보 일괄 조회")
 async def get_travel_packages(
     req: TravelRequest,
-    travel_info_collection: AsyncIOMotorCollection = Depends(get_travel_info_collection),
-    travel_url_collection: AsyncIOMotorCollection = Depends(get_travel_url_collection),
+    db: AsyncIOMotorDatabase = Depends(get_db),
 ) -> TravelResponse:
     """
     여러 여행 패키지의 정보를 MongoDB에서 조회
@@ -161,31 +180,7 @@ async def get_travel_packages(
     try:
         logger.info(f"여행 패키지 조회 요청: {len(req.travel_ids)}개")
         
-        travels = []
-        
-        # travel_info에서 기본 정보 조회
-        travel_info_docs = {}
-        async for doc in travel_info_collection.find({"product_code": {"$in": req.travel_ids}}):
-            travel_info_docs[doc["product_code"]] = doc
-        
-        # travel_url에서 URL 정보 조회
-        travel_url_docs = {}
-        async for doc in travel_url_collection.find({"product_code": {"$in": req.travel_ids}}):
-            travel_url_docs[doc["product_code"]] = doc
-        
-        # 데이터 결합
-        for travel_id in req.travel_ids:
-            info_doc = travel_info_docs.get(travel_id)
-            url_doc = travel_url_docs.get(travel_id)
-            
-            if info_doc:
-                travel_info = TravelInfo(
-                    product_code=travel_id,
-                    title=info_doc.get("title", ""),
-                    hashtags=info_doc.get("hashtags", []),
-                    url=url_doc.get("url", "") if url_doc else "",
-                )
-                travels.append(travel_info)
+        travels = await _load_travel_packages(db, req.travel_ids)
         
         logger.info(f"여행 패키지 조회 완료: {len(travels)}개")
         
@@ -196,4 +191,73 @@ async def get_travel_packages(
         raise HTTPException(
             status_code=500,
             detail=f"여행 패키지 조회 중 오류가 발생했습니다: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+async def _within_deadline(part: str, coro: Awaitable[T], timeout: float) -> Tuple[Optional[T], Optional[str]]:
+    """파트 하나를 마감 시간 안에서 실행합니다. (결과, 실패 사유) — 실패해도 예외를 올리지 않습니다."""
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(coro, timeout=timeout)
+        outcome, reason = "ok", None
+    except asyncio.TimeoutError:
+        logger.warning(f"/recommend/full 파트 시간 초과: part={part}, timeout={timeout}s")
+        result, outcome, reason = None, "timeout", "timeout"
+    except Exception as e:
+        logger.error(f"/recommend/full 파트 조회 실패: part={part}, error={e}")
+        result, outcome, reason = None, "error", "error"
+    metrics.incr("recommend_full_parts_total", part=part, result=outcome)
+    metrics.observe("recommend_full_part_seconds", time.perf_counter() - started, part=part)
+    return result, reason
+
+
+@router.post("/full", summary="추천 + 프로필 + 여행 패키지 일괄 조회")
+async def get_full_recommendations(
+    req: RecommendRequest,
+    ai_client: AIRecommendClient = Depends(get_ai_recommend_client),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    features_collection: AsyncIOMotorCollection = Depends(get_user_features_collection),
+) -> RecommendFullResponse:
+    """
+    /recommend → /recommend/user-profile, /recommend/travel 을 서버에서 한 번에 처리
+    추천 결과를 받은 뒤 프로필과 여행 패키지는 동시에 조회하며, 마감 시간을 넘긴 파트는 비워서(partial) 응답
+    추천 호출도 마감 시간이 있어, 넘기면 캐시된 fallback 결과로 진행하고 캐시도 없으면 503
+    """
+    settings = get_settings()
+    # 추천 자체가 실패하면 /recommend 와 동일하게 503 / 500
+    started = time.perf_counter()
+    try:
+        rec = await _fetch_recommendations(
+            req.user_id, ai_client, timeout=settings.recommend_full_recommend_timeout_seconds
+        )
+    finally:
+        metrics.observe("recommend_full_part_seconds", time.perf_counter() - started, part="recommend")
+
+    (people, people_error), (travels, travel_error) = await asyncio.gather(
+        _within_deadline(
+            "people",
+            _load_user_profiles(features_collection, rec.rec_people),
+            settings.recommend_full_profiles_timeout_seconds,
+        ),
+        _within_deadline(
+            "travel",
+            _load_travel_packages(db, rec.rec_travel),
+            settings.recommend_full_travel_timeout_seconds,
+        ),
+    )
+
+    errors = {}
+    if people_error:
+        errors["people"] = people_error
+    if travel_error:
+        errors["travel"] = travel_error
+    if errors:
+        metrics.incr("recommend_full_partial_total")
+
+    return RecommendFullResponse(
+        **rec.model_dump(),
+        people=people,
+        travels=travels,
+        partial=bool(errors),
+        errors=errors,
+    )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
-from app.services.analysis_result import get_user_analysis_data
+from app.services.analysis_result import get_user_analysis_data, get_users_analysis_data
+from app.services.keyword_engine import UnmappedFeatureError
 
 from ..repositories.user_features_repository import (
     upsert_user_features,
@@ -19,6 +20,8 @@ from ..schemas.user_features import (
     UserFeaturesResponse,
     UserFeaturesUpdate,
     UserFeaturesAnalysisResponse,
+    UserFeaturesAnalysisBatchRequest,
+    UserFeaturesAnalysisBatchResponse,
 )
 from ..dependencies.db import get_db
 
@@ -65,7 +68,19 @@ async def get_analysis_by_user_id_route(
     user_id: str,
     db: AsyncIOMotorDatabase = Depends(get_db),
 ) -> UserFeaturesAnalysisResponse:
-    return await get_user_analysis_data(db, user_id)
+    try:
+        return await get_user_analysis_data(db, user_id)
+    except UnmappedFeatureError as exc:
+        # 저장된 Features 값이 매핑 상수에 없는 경우 (쓰기 시점에 기록된 오류 포함)
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
+@router.post("/analysis:batch", response_model=UserFeaturesAnalysisBatchResponse, summary="분석 페이지용: 여러 사용자 일괄 조회")
+async def get_analysis_batch_route(
+    req: UserFeaturesAnalysisBatchRequest,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+) -> UserFeaturesAnalysisBatchResponse:
+    return UserFeaturesAnalysisBatchResponse(items=await get_users_analysis_data(db, req.user_ids))
 
 
 @router.get("", response_model=UserFeaturesListResponse, summary="User-features 컬렉션에서 모든 데이터 조회")
@@ -24,3 +24,14 @@ class ChatEndRequest(BaseModel):
     session_id: str
 
 
+class ChatDraftRequest(BaseModel):
+    session_id: str
+
+
+class ChatEndJobResponse(BaseModel):
+    job_id: str
+    session_id: str
+    status: str
+    status_url: Optional[str] = None
+    final_summary: Optional[str] = None
+    error: Optional[str] = None
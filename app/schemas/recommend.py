@@ -12,6 +12,8 @@ class RecommendResponse(BaseModel):
     rec_people: list[str] = Field(..., description="추천 동반자 목록")
     rec_travel: list[str] = Field(..., description="추천 여행지 목록")
     status: str = Field(..., description="처리 상태")
+    cache_status: str | None = Field(None, description="추천 캐시 상태 (fresh / stale / miss / fallback / bypass)")
+    cache_age_seconds: float | None = Field(None, description="캐시된 추천 결과의 경과 시간(초)")
 
 
 class UserProfileRequest(BaseModel):
@@ -42,4 +44,17 @@ class TravelInfo(BaseModel):
     product_code: str = Field(..., description="상품 코드")
     title: str = Field(..., description="여행 패키지 제목")
     hashtags: list[str] = Field(..., description="해시태그 목록")
-    url: str = Field(..., description="여행 패키지 URL")
\ No newline at end of file
+    url: str = Field(..., description="여행 패키지 URL")
+
+
+class RecommendFullResponse(BaseModel):
+    user_id: str = Field(..., description="사용자 ID")
+    rec_people: list[str] = Field(..., description="추천 동반자 목록")
+    rec_travel: list[str] = Field(..., description="추천 여행지 목록")
+    status: str = Field(..., description="처리 상태")
+    cache_status: str | None = Field(None, description="추천 캐시 상태 (fresh / stale / miss / fallback / bypass)")
+    cache_age_seconds: float | None = Field(None, description="캐시된 추천 결과의 경과 시간(초)")
+    people: list[UserProfile] | None = Field(None, description="추천 동반자 프로필 (조회 실패/시간 초과 시 null)")
+    travels: list[TravelInfo] | None = Field(None, description="추천 여행 패키지 정보 (조회 실패/시간 초과 시 null)")
+    partial: bool = Field(False, description="일부 파트가 비어 있는 응답 여부")
+    errors: dict[str, str] = Field(default_factory=dict, description="비어 있는 파트별 사유 (timeout / error)")
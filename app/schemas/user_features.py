@@ -55,6 +55,10 @@ class UserFeaturesListResponse(BaseModel):
     total: int
 
 
+class UserFeaturesAnalysisBatchRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=100, description="사용자 ID 목록 (최대 100명)")
+
+
 class UserFeaturesAnalysisResponse(BaseModel):
     user_id: str
     user_name: str | None = None
@@ -99,4 +103,15 @@ class UserFeaturesAnalysisResponse(BaseModel):
             empty.append("travel_purposes")
         if not self.polygon_labels or not self.polygon_values or all(v == 0 for v in self.polygon_values):
             empty.append("polygon")
-        self.empty_fields = empty
\ No newline at end of file
+        self.empty_fields = empty
+
+
+class UserFeaturesAnalysisBatchItem(BaseModel):
+    user_id: str
+    status: str = Field(..., description="ok / not_found / error")
+    analysis: UserFeaturesAnalysisResponse | None = None
+    error: str | None = None
+
+
+class UserFeaturesAnalysisBatchResponse(BaseModel):
+    items: List[UserFeaturesAnalysisBatchItem] = Field(..., description="요청한 user_ids 순서의 분석 결과")
@@ -0,0 +1,87 @@
+"""user_features 분석 결과(Analysis) 일괄 재계산
+
+result_keyword_ver2 매핑 상수가 바뀌면 MAPPING_VERSION이 달라지고, 저장된 분석 결과는 조회 시
+원본 features로 다시 계산하는 느린 경로를 탑니다. 배포 후 이 명령으로 전체를 다시 저장합니다.
+
+    python -m app.scripts.backfill_analysis             # 버전이 다르거나 없는 문서만
+    python -m app.scripts.backfill_analysis --all       # 전체 재계산
+    python -m app.scripts.backfill_analysis --dry-run   # 대상 수만 출력
+
+WINEAR_MONGODB_* 설정을 그대로 사용합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.server_api import ServerApi
+
+from ..core.config import get_settings
+from ..repositories.user_features_repository import (
+    ANALYSIS_FIELD,
+    COLLECTION,
+    analysis_update_filter,
+    build_analysis_document,
+)
+from ..services.keyword_engine import MAPPING_VERSION
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="매핑 버전과 관계없이 전체 재계산")
+    parser.add_argument("--batch-size", type=int, default=500, help="bulk_write 한 번에 보낼 문서 수")
+    parser.add_argument("--dry-run", action="store_true", help="저장하지 않고 대상 수만 출력")
+    return parser.parse_args()
+
+
+async def backfill(args: argparse.Namespace) -> Dict[str, int]:
+    settings = get_settings()
+    client_kwargs: dict[str, Any] = {}
+    if settings.mongodb_server_api:
+        client_kwargs["server_api"] = ServerApi(settings.mongodb_server_api)
+    client = AsyncIOMotorClient(settings.mongodb_uri, **client_kwargs)
+    try:
+        collection = client[settings.mongodb_db][COLLECTION]
+        query: dict[str, Any] = {} if args.all else {f"{ANALYSIS_FIELD}.mapping_version": {"$ne": MAPPING_VERSION}}
+        counts = {"matched": 0, "updated": 0, "errors": 0}
+        if args.dry_run:
+            counts["matched"] = await collection.count_documents(query)
+            return counts
+
+        requests: List[UpdateOne] = []
+
+        async def flush() -> None:
+            if requests:
+                result = await collection.bulk_write(requests, ordered=False)
+                counts["updated"] += result.modified_count
+                requests.clear()
+
+        async for doc in collection.find(query, {ANALYSIS_FIELD: 0}):
+            counts["matched"] += 1
+            analysis = build_analysis_document(doc)
+            if "error" in analysis:
+                counts["errors"] += 1
+            requests.append(UpdateOne(analysis_update_filter(doc), {"$set": {ANALYSIS_FIELD: analysis}}))
+            if len(requests) >= args.batch_size:
+                await flush()
+        await flush()
+        return counts
+    finally:
+        client.close()
+
+
+def main() -> None:
+    args = parse_args()
+    counts = asyncio.run(backfill(args))
+    mode = "dry-run" if args.dry_run else "backfill"
+    print(
+        f"[{mode}] mapping_version={MAPPING_VERSION} matched={counts['matched']} "
+        f"updated={counts['updated']} mapping_errors={counts['errors']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
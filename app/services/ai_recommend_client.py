@@ -1,22 +1,88 @@
 """AI 백엔드 추천 서비스 클라이언트"""
 
+import asyncio
+import json
 import httpx
 import logging
-from typing import Dict, Any
+import time
+import uuid
+from typing import Dict, Any, Optional
 
+from redis.asyncio import Redis
+
+from ..core import metrics
 from ..core.config import get_settings
+from ..dependencies.recsys import get_recsys_client
+from .circuit_breaker import CircuitBreaker, RetryBudget, backoff_delay
 
 logger = logging.getLogger(__name__)
 
+_FLIGHT_RESULT_TTL_MS = 2000
+
+# 자기가 잡은 락(토큰 일치)만 해제 — 만료 후 다른 워커가 잡은 락을 지우지 않도록
+_RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _is_backend_failure(exc: BaseException) -> bool:
+    """서킷 브레이커 실패로 집계할 오류: 타임아웃 / 연결 오류 / 5xx"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """재시도할 오류: 연결 실패 / 5xx 만.
+
+    읽기 타임아웃은 백엔드가 이미 ai_backend_timeout_seconds 동안 요청을 붙잡고 있었던 경우라,
+    재시도하면 느린 백엔드 앞에서 요청(워커)을 그 배수만큼 더 붙잡게 되므로 재시도하지 않습니다.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+
 
 class AIRecommendClient:
-    """AI 백엔드 추천 서비스와 통신하는 클라이언트"""
+    """AI 백엔드 추천 서비스와 통신하는 클라이언트
+
+    같은 user_id에 대한 동시 요청은 하나의 업스트림 호출을 공유합니다 (single-flight).
+    업스트림 호출은 서킷 브레이커와 재시도 예산으로 보호합니다.
+    """
     
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.ai_backend_url
         self.ai_backend_recommendations_path = self.settings.ai_backend_recommendations_path
-        self.timeout = self.settings.ai_backend_timeout_seconds
+        # 동일 user_id에 대해 진행 중인 호출 (같은 워커 안에서 공유)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # 워커 간 합치기용 (Redis 연결 시 lifespan에서 설정)
+        self.redis: Optional[Redis] = None
+        self.breaker = CircuitBreaker(
+            "recsys",
+            failure_threshold=self.settings.ai_backend_breaker_failure_threshold,
+            reset_timeout_seconds=self.settings.ai_backend_breaker_reset_timeout_seconds,
+            half_open_max_calls=self.settings.ai_backend_breaker_half_open_max_calls,
+        )
+        self.retry_budget = RetryBudget(
+            ratio=self.settings.ai_backend_retry_budget_ratio,
+            min_per_second=self.settings.ai_backend_retry_budget_min_per_second,
+            window_seconds=self.settings.ai_backend_retry_budget_window_seconds,
+        )
+        self.coalesce_lock_seconds = self._coalesce_lock_seconds()
+
+    def _coalesce_lock_seconds(self) -> float:
+        """워커 간 합치기 락 유지 시간. 락을 잡은 워커의 호출(재시도 포함)이 끝날 때까지 유지되어야
+        기다리는 워커들이 느린 백엔드 앞에서 먼저 포기하고 각자 호출하지 않습니다."""
+        s = self.settings
+        if s.ai_backend_coalesce_lock_seconds is not None:
+            return s.ai_backend_coalesce_lock_seconds
+        attempts = s.ai_backend_max_retries + 1
+        per_attempt = s.ai_backend_pool_timeout_seconds + s.ai_backend_connect_timeout_seconds + s.ai_backend_timeout_seconds
+        return attempts * per_attempt + s.ai_backend_max_retries * s.ai_backend_retry_backoff_max_seconds
     
     async def get_user_recommendations(self, user_id: str) -> Dict[str, Any]:
         """
@@ -32,31 +98,147 @@ class AIRecommendClient:
             httpx.HTTPStatusError: HTTP 에러 발생 시
             httpx.TimeoutException: 타임아웃 발생 시
         """
-        url = f"{self.base_url}{self.ai_backend_recommendations_path}"
+        key = str(user_id)
+        metrics.incr("recsys_requests_total")
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_coalesced(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            # 같은 워커에서 진행 중인 동일 요청에 합류
+            metrics.incr("recsys_coalesced_total", scope="local")
+        # 먼저 온 요청이 취소되어도 호출은 계속되어 합류한 요청들이 결과를 받습니다
+        result = await asyncio.shield(task)
+        return dict(result)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # 기다리는 요청이 모두 취소된 경우에도 예외가 조용히 소비되도록
+            task.exception()
+
+    async def _fetch_coalesced(self, user_id: str) -> Dict[str, Any]:
+        """워커 간 합치기: 짧은 Redis 락을 잡은 워커만 호출하고, 나머지는 결과 키를 기다립니다."""
+        redis = self.redis
+        if redis is None or not self.settings.ai_backend_coalesce_across_workers:
+            return await self._call_backend(user_id)
+        lock_key, result_key = f"recsys_flight:{user_id}:lock", f"recsys_flight:{user_id}:result"
+        lock_ms = int(self.coalesce_lock_seconds * 1000)
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis.set(lock_key, token, nx=True, px=lock_ms)
+        except Exception as exc:
+            logger.warning(f"추천 요청 합치기 락 실패, 단독 호출: {exc}")
+            return await self._call_backend(user_id)
+        if acquired:
+            try:
+                result = await self._call_backend(user_id)
+                await self._publish_flight(result_key, result)
+                return result
+            finally:
+                try:
+                    release = redis.register_script(_RELEASE_LOCK_LUA)
+                    await release(keys=[lock_key], args=[token])
+                except Exception:
+                    pass
+        cached = await self._wait_for_flight(lock_key, result_key, lock_ms / 1000)
+        if cached is not None:
+            metrics.incr("recsys_coalesced_total", scope="remote")
+            return cached
+        # 다른 워커의 호출이 실패했거나 락이 만료됨
+        return await self._call_backend(user_id)
+
+    async def _publish_flight(self, result_key: str, result: Dict[str, Any]) -> None:
+        # 기다리던 워커들이 다음 폴링에서 읽을 만큼만 보존 (캐시 역할은 recommend_cache가 담당)
+        try:
+            await self.redis.set(result_key, json.dumps(result, ensure_ascii=False), px=_FLIGHT_RESULT_TTL_MS)
+        except Exception as exc:
+            logger.warning(f"추천 요청 합치기 결과 저장 실패: {exc}")
+
+    async def _wait_for_flight(self, lock_key: str, result_key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        redis = self.redis
+        deadline = time.monotonic() + timeout
+        interval = self.settings.ai_backend_coalesce_poll_interval_seconds
+        try:
+            while time.monotonic() < deadline:
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.get(result_key)
+                    pipe.exists(lock_key)
+                    raw, locked = await pipe.execute()
+                if raw is not None:
+                    return json.loads(raw)
+                if not locked:
+                    return None
+                await asyncio.sleep(interval)
+        except Exception as exc:
+            logger.warning(f"추천 요청 합치기 대기 실패, 단독 호출: {exc}")
+        return None
+
+    async def _call_backend(self, user_id: str) -> Dict[str, Any]:
+        """서킷 브레이커 + 재시도 예산 안에서 호출합니다 (추천 조회는 멱등이므로 재시도 가능).
+
+        서킷이 열려 있으면 호출하지 않고 CircuitOpenError를 발생시킵니다.
+        """
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await self._request_recommendations(user_id)
+            except Exception as exc:
+                if not _is_backend_failure(exc):
+                    # 4xx 등 백엔드 자체는 정상 응답한 경우
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if (
+                    not _is_retryable(exc)
+                    or attempt >= self.settings.ai_backend_max_retries
+                    or not self.retry_budget.try_acquire()
+                ):
+                    raise
+                delay = backoff_delay(
+                    attempt,
+                    self.settings.ai_backend_retry_backoff_base_seconds,
+                    self.settings.ai_backend_retry_backoff_max_seconds,
+                )
+                metrics.incr("recsys_retries_total")
+                logger.warning(f"AI 백엔드 재시도 {attempt + 1}회 ({delay:.2f}초 후): {type(exc).__name__}")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def _request_recommendations(self, user_id: str) -> Dict[str, Any]:
+        url = f"{self.base_url.rstrip('/')}{self.ai_backend_recommendations_path}"
         
         payload = {"user_id": user_id}
         
         logger.info(f"AI 백엔드 추천 요청: {url}, user_id: {user_id}")
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                logger.debug(f"HTTP 요청 시작: {url}")
-                logger.debug(f"Payload: {payload}")
-                
-                response = await client.post(url, json=payload)
-                
-                logger.debug(f"HTTP 응답 상태: {response.status_code}")
-                logger.debug(f"HTTP 응답 헤더: {dict(response.headers)}")
-                
-                response.raise_for_status()
-                
-                result = response.json()
-                logger.info(f"AI 백엔드 응답 성공: user_id={user_id}, "
-                          f"rec_people={len(result.get('rec_people', []))}, "
-                          f"rec_travel={len(result.get('rec_travel', []))}")
-                
-                return result
-                
+            # lifespan이 관리하는 공유 커넥션 풀 사용 (요청마다 연결을 새로 맺지 않음)
+            client = get_recsys_client()
+            logger.debug(f"HTTP 요청 시작: {url}")
+            logger.debug(f"Payload: {payload}")
+            
+            response = await client.post(self.ai_backend_recommendations_path, json=payload)
+            
+            logger.debug(f"HTTP 응답 상태: {response.status_code} ({response.http_version})")
+            logger.debug(f"HTTP 응답 헤더: {dict(response.headers)}")
+            
+            response.raise_for_status()
+            
+            result = response.json()
+            logger.info(f"AI 백엔드 응답 성공: user_id={user_id}, "
+                      f"rec_people={len(result.get('rec_people', []))}, "
+                      f"rec_travel={len(result.get('rec_travel', []))}")
+            
+            return result
+            
         except httpx.TimeoutException as e:
             logger.error(f"AI 백엔드 요청 타임아웃: {e}")
             raise
@@ -1,92 +1,112 @@
 from __future__ import annotations
-from typing import List, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from ..repositories.user_features_repository import get_user_features_by_user_id
-from ..schemas.user_features import UserFeaturesAnalysisResponse
-from ..constants.result_keyword_ver2 import POLYGON_LABELS, NUMERIC_MAPPINGS, TRAVEL_KEYWORD_MAPPINGS, PERSONAL_KEYWORD_MAPPINGS, TRAVEL_PURPOSE_MAPPINGS
+from typing import Any, Dict, List
+from ..core import metrics
+from ..repositories.user_features_repository import (
+    ANALYSIS_FIELD,
+    get_user_analysis_doc,
+    get_user_analysis_docs,
+    get_user_features_by_user_id,
+    get_user_features_by_user_ids,
+)
+from ..schemas.user_features import UserFeaturesAnalysisBatchItem, UserFeaturesAnalysisResponse, UserFeaturesResponse
+from .keyword_engine import MAPPING_VERSION, UnmappedFeatureError, build_analysis_payload
 
 import logging
 
 logger = logging.getLogger("uvicorn.debug")
 
-def map_doc_to_keyword(key: str, value: str | int | List[str], mappings: dict) -> int:
-    """문자열 값을 정수로 매핑하는 함수"""
-    # 이미 정수인 경우 그대로 반환
-    if isinstance(value, int):
-        return value
-    
-    # 해당 키의 매핑이 있으면 사용
-    if key in mappings:
-        if type(value) == list:
-            mapped_value = []
-            for v in value:
-                if v not in mappings[key]:
-                    raise ValueError(f"value list에서 매핑을 찾을 수 없습니다: key='{key}', value='{v}'")
-                mapped_value.append(mappings[key][v])
-            return mapped_value
-        else:
-            if value not in mappings[key]:
-                raise ValueError(f"value에서 매핑을 찾을 수 없습니다: key='{key}', value='{value}'")
-            mapped_value = mappings[key][value]
-            return mapped_value
-    
-    # 매핑이 없으면 0 반환
-    logger.info(f"No mapping found for key '{key}', returning 0")
-    return 0
+def _build_analysis(doc: UserFeaturesResponse, user_id: str) -> UserFeaturesAnalysisResponse:
+    # 저장된 분석 결과가 없거나 매핑 버전이 다를 때: 원본 features로 계산
+    return UserFeaturesAnalysisResponse(
+        user_id=doc.user_id or user_id,
+        user_name=None,
+        **build_analysis_payload(doc.features),
+    )
 
 
-def flatten_mapped_values(values: List[Any]) -> List[str]:
-    """매핑된 값들을 평탄화하여 문자열 리스트로 반환"""
-    flattened = []
-    for value in values:
-        if isinstance(value, list):
-            flattened.extend(value)
-        elif isinstance(value, str):
-            flattened.append(value)
-        elif value != 0:  # 0이 아닌 값들만 추가 (매핑이 없어서 0이 반환된 경우는 제외)
-            flattened.append(str(value))
-    return flattened
+def _from_materialized(doc: dict[str, Any], user_id: str) -> UserFeaturesAnalysisResponse | None:
+    """쓰기 시점에 저장된 분석 결과. 현재 매핑 버전이 아니면 None (원본 features로 다시 계산)."""
+    analysis = doc.get(ANALYSIS_FIELD) or {}
+    if analysis.get("mapping_version") != MAPPING_VERSION:
+        return None
+    if analysis.get("error"):
+        raise UnmappedFeatureError(analysis["error"])
+    return UserFeaturesAnalysisResponse(
+        user_id=str(doc["ID"]) if doc.get("ID") is not None else user_id,
+        user_name=None,
+        **analysis.get("payload", {}),
+    )
 
 
 async def get_user_analysis_data(
     db: AsyncIOMotorDatabase, 
     user_id: str
 ) -> UserFeaturesAnalysisResponse:
-    # 사용자 분석 데이터를 가져오는 서비스 함수
+    # 사용자 분석 데이터를 가져오는 서비스 함수 (저장된 분석 결과 우선)
+    analysis_doc = await get_user_analysis_doc(db, user_id)
+    if analysis_doc is None:
+        raise ValueError("User features not found")
+
+    result = _from_materialized(analysis_doc, user_id)
+    if result is not None:
+        metrics.incr("user_analysis_reads_total", source="materialized")
+        return result
+
+    metrics.incr("user_analysis_reads_total", source="computed")
     doc = await get_user_features_by_user_id(db, user_id)
     if doc is None:
         raise ValueError("User features not found")
     
-    # 오각형 매핑
-    polygon_labels = POLYGON_LABELS
-    polygon_values = [map_doc_to_keyword(label, doc.features.get(label, 0), NUMERIC_MAPPINGS) for label in polygon_labels]
-    
-    logger.info(f"polygon_values = {polygon_values}")
+    result = _build_analysis(doc, user_id)
 
-    # 여행 키워드 매핑
-    travel_keywords_raw = [map_doc_to_keyword(schema, doc.features.get(schema, 0), TRAVEL_KEYWORD_MAPPINGS) for schema in TRAVEL_KEYWORD_MAPPINGS.keys()]
-    travel_keywords = flatten_mapped_values(travel_keywords_raw)
+    logger.info(f"polygon_values = {result.polygon_values}")
+    logger.info(f"travel_keywords = {result.travel_keywords}")
+    logger.info(f"personal_keywords = {result.personal_keywords}")
+    logger.info(f"travel_purposes = {result.travel_purposes}")
 
-    logger.info(f"travel_keywords = {travel_keywords}")
+    return result
 
-    # 개인 특성 키워드 매핑
-    personal_keywords_raw = [map_doc_to_keyword(schema, doc.features.get(schema, 0), PERSONAL_KEYWORD_MAPPINGS) for schema in PERSONAL_KEYWORD_MAPPINGS.keys()]
-    personal_keywords = flatten_mapped_values(personal_keywords_raw)
-    
-    logger.info(f"personal_keywords = {personal_keywords}")
-    
-    # 여행 목적 매핑
-    travel_purposes_raw = [map_doc_to_keyword(schema, doc.features.get(schema, 0), TRAVEL_PURPOSE_MAPPINGS) for schema in TRAVEL_PURPOSE_MAPPINGS.keys()]
-    travel_purposes = flatten_mapped_values(travel_purposes_raw)
-    
-    logger.info(f"travel_purposes = {travel_purposes}")
 
-    return UserFeaturesAnalysisResponse(
-        user_id=doc.user_id or user_id,
-        user_name=None,
-        travel_keywords=travel_keywords,
-        personal_keywords=personal_keywords,
-        travel_purposes=travel_purposes,
-        polygon_labels=polygon_labels,
-        polygon_values=polygon_values,
-    )
+async def get_users_analysis_data(
+    db: AsyncIOMotorDatabase,
+    user_ids: List[str],
+) -> List[UserFeaturesAnalysisBatchItem]:
+    """여러 사용자의 분석 데이터를 조회합니다. 요청 순서대로, 사용자별 오류는 항목에 담아 반환합니다.
+
+    저장된 분석 결과를 한 번의 프로젝션 쿼리로 가져오고, 없거나 매핑 버전이 다른 사용자만 원본 features를 한 번 더 조회합니다.
+    """
+    analysis_docs = await get_user_analysis_docs(db, user_ids)
+    results: Dict[str, UserFeaturesAnalysisResponse | ValueError] = {}
+    stale: List[str] = []
+    for user_id, analysis_doc in analysis_docs.items():
+        try:
+            materialized = _from_materialized(analysis_doc, user_id)
+        except ValueError as exc:
+            results[user_id] = exc
+            continue
+        if materialized is None:
+            stale.append(user_id)
+        else:
+            results[user_id] = materialized
+    metrics.incr("user_analysis_reads_total", len(analysis_docs) - len(stale), source="materialized")
+
+    if stale:
+        metrics.incr("user_analysis_reads_total", len(stale), source="computed")
+        for user_id, doc in (await get_user_features_by_user_ids(db, stale)).items():
+            try:
+                results[user_id] = _build_analysis(doc, user_id)
+            except ValueError as exc:
+                results[user_id] = exc
+
+    items: List[UserFeaturesAnalysisBatchItem] = []
+    for user_id in user_ids:
+        result = results.get(user_id)
+        if result is None:
+            items.append(UserFeaturesAnalysisBatchItem(user_id=user_id, status="not_found", error="User features not found"))
+        elif isinstance(result, ValueError):
+            logger.info(f"analysis batch item failed: user_id={user_id}, error={result}")
+            items.append(UserFeaturesAnalysisBatchItem(user_id=user_id, status="error", error=str(result)))
+        else:
+            items.append(UserFeaturesAnalysisBatchItem(user_id=user_id, status="ok", analysis=result))
+    return items
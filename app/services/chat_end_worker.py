@@ -0,0 +1,157 @@
+"""채팅 종료 백그라운드 워커
+
+`/chat/end?background=true` 로 등록된 작업을 Redis 큐에서 꺼내 최종 요약 생성 →
+user_summary upsert → 세션 삭제 순서로 처리합니다. 작업은 lease 기반으로 처리되므로
+API 프로세스가 중간에 재시작되어도 lease 만료 후 다른(또는 재시작된) 워커가 이어서 처리합니다.
+각 단계는 재실행해도 결과가 같도록 구성되어 있습니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from redis.asyncio import Redis
+
+from ..core import metrics
+from ..core.config import Settings
+from ..repositories.chat_job_repository import (
+    complete_job,
+    fail_job,
+    get_job,
+    renew_lease,
+    requeue_expired_jobs,
+    take_job,
+)
+from ..repositories.chat_session_repository import observe_session_size
+from ..repositories.session_store import SessionStore
+from ..repositories.user_summary_repository import upsert_user_summary
+from .chat_prompts import make_final_summary
+from .llm_metrics import pop_llm_usage
+from .speculation import speculative_result
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChatEndWorker:
+    def __init__(self, redis: Redis, store: SessionStore, db: AsyncIOMotorDatabase, settings: Settings):
+        self.redis = redis
+        self.store = store
+        self.db = db
+        self.concurrency = settings.chat_end_worker_concurrency
+        self.lease_seconds = settings.chat_end_job_lease_seconds
+        self.max_attempts = settings.chat_end_job_max_attempts
+        self.job_ttl_seconds = settings.chat_end_job_ttl_seconds
+        self.poll_interval_seconds = settings.chat_end_worker_poll_interval_seconds
+        self.retry_backoff_base_seconds = settings.chat_end_job_retry_backoff_base_seconds
+        self.retry_backoff_max_seconds = settings.chat_end_job_retry_backoff_max_seconds
+        # 처리 중에는 lease의 1/3마다 연장 (최종 요약 LLM 호출이 재시도로 길어져도 회수되지 않도록)
+        self.renew_interval_seconds = self.lease_seconds / 3
+        self._next_requeue_at = 0.0
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._run(i)) for i in range(self.concurrency)]
+        logger.info(f"Chat end worker started: concurrency={self.concurrency}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self, index: int) -> None:
+        while True:
+            try:
+                # 만료 lease 회수는 워커 전체에서 lease 주기의 1/3마다 한 번
+                if time.monotonic() >= self._next_requeue_at:
+                    self._next_requeue_at = time.monotonic() + self.renew_interval_seconds
+                    requeued = await requeue_expired_jobs(self.redis)
+                    if requeued:
+                        logger.warning(f"Requeued expired chat end jobs: {requeued}")
+                job_id = await take_job(self.redis, self.lease_seconds)
+                if job_id is None:
+                    await asyncio.sleep(self.poll_interval_seconds)
+                    continue
+                await self._process_with_lease(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"Chat end worker[{index}] loop error: {exc}")
+                await asyncio.sleep(1.0)
+
+    async def _process_with_lease(self, job_id: str) -> None:
+        heartbeat = asyncio.create_task(self._renew_lease(job_id))
+        try:
+            await self._process(job_id)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _renew_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.renew_interval_seconds)
+            try:
+                if not await renew_lease(self.redis, job_id, self.lease_seconds):
+                    return
+            except Exception as exc:
+                logger.warning(f"Chat end job lease renewal failed: job_id={job_id}, error={exc}")
+
+    def _retry_delay(self, attempts: int) -> float:
+        """attempts(1부터)번째 실패 후 재시도까지 대기 시간: 지수 백오프 + equal jitter
+
+        LLM / MongoDB 장애가 이어지는 동안 몇 번의 폴링 만에 시도 횟수를 모두 써 버리지 않도록 최소 cap/2는 기다립니다.
+        """
+        cap = min(self.retry_backoff_max_seconds, self.retry_backoff_base_seconds * (2 ** (attempts - 1)))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    async def _process(self, job_id: str) -> None:
+        job = await get_job(self.redis, job_id)
+        if job is None:
+            return
+        if job.get("final_summary"):
+            # lease 회수와 겹쳐 이미 끝난 작업을 다시 받은 경우
+            await complete_job(self.redis, job_id, job["final_summary"])
+            return
+        session_id = job["session_id"]
+        try:
+            final_summary = await self._finalize(session_id)
+        except Exception as exc:
+            attempts = int(job.get("attempts", 1))
+            retry = attempts < self.max_attempts
+            delay = self._retry_delay(attempts) if retry else 0.0
+            logger.error(
+                f"Chat end job failed: job_id={job_id}, attempts={attempts}, retry={retry}, "
+                f"retry_in={delay:.1f}s, error={exc}"
+            )
+            metrics.incr("chat_end_jobs_total", result="retry" if retry else "failed")
+            await fail_job(self.redis, job_id, str(exc), retry=retry, retry_delay_seconds=delay)
+            return
+        await complete_job(self.redis, job_id, final_summary)
+        # 결과가 작업에 기록된 뒤에 세션을 삭제합니다
+        await self.store.delete(session_id)
+        metrics.incr("chat_end_jobs_total", result="done")
+
+    async def _finalize(self, session_id: str) -> str:
+        session = await self.store.get(session_id)
+        if session is None:
+            raise RuntimeError("세션이 만료되었거나 존재하지 않습니다.")
+        final_summary: Optional[str] = session.get("final_summary")
+        if final_summary is None:
+            final_summary = speculative_result(session, "final") or await make_final_summary(session)
+            # 재시도 시 요약을 다시 만들지 않도록 세션에 먼저 기록
+            await self.store.update_fields(
+                session_id,
+                {"final_summary": final_summary},
+                increments=pop_llm_usage(session),
+                ttl_seconds=self.job_ttl_seconds,
+            )
+            observe_session_size(session)
+        await upsert_user_summary(self.db, session["user_id"], final_summary)
+        return final_summary
@@ -1,7 +1,16 @@
 from __future__ import annotations
 
-from typing import Dict, List, Any
+import json
+import math
+import time
+from typing import AsyncIterator, Dict, List, Any, Optional, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from ..core import metrics
+from ..core.config import get_settings
 from ..dependencies.llm import get_llm
+from .llm_cache import LLMResponseCache, get_llm_cache
+from .llm_metrics import LLMCallRecord, record_llm_call, usage_tokens
 
 
 QUESTION_THEMES: List[str] = [
@@ -12,70 +21,315 @@ QUESTION_THEMES: List[str] = [
     "당신에게 이번 여행이 가져다줄 삶의 의미",
 ]
 
-async def next_question(state: Dict[str, Any]) -> str:
-    prompt = build_next_question_prompt(state["messages"])  # type: ignore[index]
-    llm = get_llm()
-    ai_message = await llm.ainvoke(prompt)
-    assistant = ai_message.content.strip()
+# 모든 채팅 프롬프트의 첫 메시지. provider의 자동 prompt caching이 적용되도록
+# 요청마다 바이트 단위로 동일해야 하므로 대화나 세션 상태에 따라 바뀌는 내용을 넣지 않습니다.
+SYSTEM_PROMPT = (
+    "당신은 사용자의 구체적인 여행 성향을 파악하는 전문 상담가입니다.\n\n"
+    "<목표>\n"
+    "아래 5가지 주제에 대해 사용자의 답변을 모두 얻어야 합니다:\n"
+    + "\n".join(f"- {theme}" for theme in QUESTION_THEMES)
+)
+
+# 작업별 지시문은 대화 턴 뒤에 둡니다 (대화가 길어져도 앞부분은 그대로 재사용됨)
+QUESTION_INSTRUCTION = (
+    "<지침>\n"
+    "1. 위 대화를 분석해서 어떤 주제들이 이미 다뤄졌는지 파악하세요.\n"
+    "2. 대화가 없다면, \"더 구체적인 당신의 여행 성향을 파악하기 위해 몇 가지 질문을 준비했습니다. 생각나는대로 편하게 답변해주세요!\" 와 함께 임의로 한 가지 주제를 정해서 질문을 시작하세요.\n"
+    "3. 아직 다루지 않은 주제 중에서 가장 자연스럽게 이어갈 수 있는 하나를 선택하세요.\n"
+    "4. 사용자의 이전 답변에 공감하며 자연스럽게 다음 질문으로 넘어가세요."
+)
+DRAFT_INSTRUCTION = (
+    "위 대화는 사용자의 여행 성향을 파악하기 위한 Q&A입니다.\n"
+    "먼저 사용자의 마지막 답변에 공감하세요.\n"
+    "그 후 사용자에게 추가하고 싶은 본인의 여행 성향에 대한 정보가 있는지 피드백을 요청하세요."
+)
+FINAL_INSTRUCTION = (
+    "위 대화는 사용자의 여행 성향을 파악하기 위한 Q&A입니다.\n"
+    "사용자의 답변을 한 단락으로 누락 없이 정리하세요."
+)
+ROLLING_INSTRUCTION = (
+    "위 대화는 사용자의 여행 성향을 파악하기 위한 Q&A의 앞부분입니다.\n"
+    "이전 대화 요약이 있다면 위 대화 내용을 합쳐, 사용자의 답변과 이미 다룬 질문 주제가 누락되지 않도록 간결하게 다시 요약하세요."
+)
+
+PROMPT_TOKEN_BUCKETS: Tuple[float, ...] = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+# 글자 수는 토큰 수의 약 1~4배(한글 ~1.3배, 영문 ~4배)이므로 토큰 버킷의 4배 범위로 둡니다
+PROMPT_CHAR_BUCKETS: Tuple[float, ...] = (400, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000)
+
+
+def estimate_tokens(text: str) -> int:
+    """토크나이저 없이 쓰는 근사치 (UTF-8 4바이트당 1토큰, 한글은 글자당 약 0.75토큰)"""
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+def prompt_text(prompt: List[BaseMessage]) -> str:
+    """캐시 키 / 크기 계측용 직렬화 (역할 구분 포함)"""
+    return json.dumps([[m.type, m.content] for m in prompt], ensure_ascii=False)
+
+
+def _record_prompt_size(kind: str, prompt: List[BaseMessage]) -> None:
+    text = "".join(str(m.content) for m in prompt)
+    metrics.observe("chat_prompt_tokens", estimate_tokens(text), buckets=PROMPT_TOKEN_BUCKETS, kind=kind)
+    metrics.observe("chat_prompt_chars", len(text), buckets=PROMPT_CHAR_BUCKETS, kind=kind)
+
+
+def _context_window(state: Dict[str, Any]) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    """프롬프트에 넣을 (최근 메시지, 누적 요약). 요약된 구간은 메시지에서 제외합니다."""
+    summarized = int(state.get("summarized_count") or 0)
+    return state["messages"][summarized:], state.get("rolling_summary")
+
+
+async def maybe_fold_context(state: Dict[str, Any]) -> bool:
+    """컨텍스트 예산 모드: 요약되지 않은 구간이 임계치를 넘으면 오래된 턴을 누적 요약에 접어 넣습니다.
+
+    최근 chat_context_keep_turns 턴은 원문 그대로 남기고, 새로 접히는 메시지만 이전 요약과 함께
+    LLM에 보내 요약을 점진적으로 갱신합니다. state가 바뀌면 True를 반환합니다.
+    """
+    settings = get_settings()
+    if not settings.chat_context_budget_enabled:
+        return False
+    messages: List[Dict[str, str]] = state["messages"]
+    start = int(state.get("summarized_count") or 0)
+    fold_end = len(messages) - settings.chat_context_keep_turns * 2
+    if fold_end <= start:
+        return False
+    if estimate_tokens(build_transcript(messages[start:])) <= settings.chat_context_token_threshold:
+        return False
+    prompt = build_rolling_summary_prompt(state.get("rolling_summary"), messages[start:fold_end])
+    _record_prompt_size("rolling", prompt)
+    state["rolling_summary"] = (await _complete("rolling", prompt, use_cache=True, state=state)).strip()
+    state["summarized_count"] = fold_end
+    return True
+
+
+def remaining_themes(state: Dict[str, Any]) -> List[int]:
+    covered = set(state.get("covered_themes") or [])
+    return [i for i in range(len(QUESTION_THEMES)) if i not in covered]
+
+
+def all_themes_covered(state: Dict[str, Any]) -> bool:
+    return get_settings().chat_theme_tracking_enabled and not remaining_themes(state)
+
+
+def record_user_answer(state: Dict[str, Any]) -> Dict[str, Any]:
+    """주제 추적 모드: 직전 질문의 주제를 다룬 것으로 표시하고, 바뀐 세션 필드를 반환합니다.
+
+    질문마다 주제를 서버가 정해서 묻기 때문에, 그 질문에 대한 답변이 오면 해당 주제는 다룬 것으로 봅니다.
+    """
+    current = state.get("current_theme")
+    if not get_settings().chat_theme_tracking_enabled or current is None:
+        return {}
+    covered = list(state.get("covered_themes") or [])
+    if current not in covered:
+        covered.append(current)
+    state["covered_themes"] = covered
+    return {"covered_themes": covered}
+
+
+def _question_prompt(state: Dict[str, Any]) -> List[BaseMessage]:
+    """다음 질문 프롬프트. 주제 추적 모드에서는 남은 주제와 직전 대화만 보내고 state["current_theme"]을 정합니다."""
+    remaining = remaining_themes(state)
+    if not get_settings().chat_theme_tracking_enabled or not remaining:
+        return build_next_question_prompt(*_context_window(state))
+    state["current_theme"] = remaining[0]
+    return build_theme_question_prompt(remaining[0], remaining, state["messages"][-2:])
+
+
+async def next_question(state: Dict[str, Any], *, use_cache: bool = True) -> str:
+    prompt = _question_prompt(state)
+    _record_prompt_size("question", prompt)
+    assistant = (await _complete("question", prompt, use_cache=use_cache, state=state)).strip()
     state["messages"].append({"role": "assistant", "content": assistant})
     return assistant
 
 
-async def make_draft_summary(state: Dict[str, Any]) -> str:
-    llm = get_llm()
-    ai_message = await llm.ainvoke(build_draft_summary_prompt(state["messages"]))  # type: ignore[index]
-    return ai_message.content.strip()
+async def make_draft_summary(state: Dict[str, Any], *, use_cache: bool = True) -> str:
+    prompt = build_draft_summary_prompt(*_context_window(state))
+    _record_prompt_size("draft", prompt)
+    return (await _complete("draft", prompt, use_cache=use_cache, state=state)).strip()
+
 
+async def make_final_summary(state: Dict[str, Any], *, use_cache: bool = True) -> str:
+    # 최종 요약은 누락이 없어야 하므로 항상 전체 대화를 사용합니다
+    prompt = build_final_summary_prompt(state["messages"])  # type: ignore[index]
+    _record_prompt_size("final", prompt)
+    return _clean_final_summary(await _complete("final", prompt, use_cache=use_cache, state=state))
 
-async def make_final_summary(state: Dict[str, Any]) -> str:
-    llm = get_llm()
-    ai_message = await llm.ainvoke(build_final_summary_prompt(state["messages"]))  # type: ignore[index]
-    final_text = ai_message.content.strip()
+
+async def stream_next_question(state: Dict[str, Any], *, use_cache: bool = True) -> AsyncIterator[str]:
+    """next_question의 스트리밍 버전. 토큰을 순서대로 내보내고, 완료되면 state에 질문을 추가합니다."""
+    chunks: List[str] = []
+    prompt = _question_prompt(state)
+    _record_prompt_size("question", prompt)
+    async for token in _stream_completion("question", prompt, use_cache=use_cache, state=state):
+        chunks.append(token)
+        yield token
+    assistant = "".join(chunks).strip()
+    state["messages"].append({"role": "assistant", "content": assistant})
+
+
+async def stream_draft_summary(state: Dict[str, Any], *, use_cache: bool = True) -> AsyncIterator[str]:
+    """make_draft_summary의 스트리밍 버전. 완료되면 state["draft_summary"]에 결과를 저장합니다."""
+    chunks: List[str] = []
+    prompt = build_draft_summary_prompt(*_context_window(state))
+    _record_prompt_size("draft", prompt)
+    async for token in _stream_completion("draft", prompt, use_cache=use_cache, state=state):
+        chunks.append(token)
+        yield token
+    state["draft_summary"] = "".join(chunks).strip()
+
+
+async def stream_final_summary(state: Dict[str, Any], *, use_cache: bool = True) -> AsyncIterator[str]:
+    """make_final_summary의 스트리밍 버전. 완료되면 state["final_summary"]에 정리된 결과를 저장합니다."""
+    chunks: List[str] = []
+    prompt = build_final_summary_prompt(state["messages"])  # type: ignore[index]
+    _record_prompt_size("final", prompt)
+    async for token in _stream_completion("final", prompt, use_cache=use_cache, state=state):
+        chunks.append(token)
+        yield token
+    state["final_summary"] = _clean_final_summary("".join(chunks))
+
+
+def _cache_key_for(task: str, prompt: List[BaseMessage], use_cache: bool) -> Tuple[Optional[LLMResponseCache], Optional[str]]:
+    cache = get_llm_cache() if use_cache else None
+    if cache is None:
+        return None, None
+    llm = get_llm(task)
+    return cache, cache.make_key(llm.model_name, llm.temperature, prompt_text(prompt))
+
+
+async def _complete(task: str, prompt: List[BaseMessage], *, use_cache: bool, state: Optional[Dict[str, Any]] = None) -> str:
+    llm = get_llm(task)
+    started = time.perf_counter()
+    cache, key = _cache_key_for(task, prompt, use_cache)
+    if cache is not None and key is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            elapsed = time.perf_counter() - started
+            record_llm_call(LLMCallRecord(task, llm.model_name, "hit", elapsed, elapsed), state)
+            return cached
+    ai_message = await llm.ainvoke(prompt)
+    elapsed = time.perf_counter() - started
+    text = ai_message.content
+    prompt_tokens, completion_tokens, cached_tokens = usage_tokens(getattr(ai_message, "usage_metadata", None))
+    record_llm_call(
+        LLMCallRecord(
+            task,
+            llm.model_name,
+            "bypass" if cache is None else "miss",
+            elapsed,
+            elapsed,
+            prompt_tokens,
+            completion_tokens,
+            cached_tokens,
+        ),
+        state,
+    )
+    if cache is not None and key is not None:
+        await cache.set(key, text)
+    return text
+
+
+async def _stream_completion(
+    task: str,
+    prompt: List[BaseMessage],
+    *,
+    use_cache: bool,
+    state: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    llm = get_llm(task)
+    started = time.perf_counter()
+    cache, key = _cache_key_for(task, prompt, use_cache)
+    if cache is not None and key is not None:
+        cached = await cache.get(key)
+        if cached is not None:
+            elapsed = time.perf_counter() - started
+            record_llm_call(LLMCallRecord(task, llm.model_name, "hit", elapsed, elapsed), state)
+            # 캐시 적중 시 전체 응답을 한 번에 내보냅니다
+            yield cached
+            return
+    chunks: List[str] = []
+    ttft: Optional[float] = None
+    prompt_tokens = completion_tokens = cached_tokens = 0
+    async for chunk in llm.astream(prompt):
+        # stream_usage=True이면 마지막 청크에 usage_metadata가 실립니다
+        in_tokens, out_tokens, cached_in_tokens = usage_tokens(getattr(chunk, "usage_metadata", None))
+        prompt_tokens += in_tokens
+        completion_tokens += out_tokens
+        cached_tokens += cached_in_tokens
+        if chunk.content:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            chunks.append(chunk.content)
+            yield chunk.content
+    record_llm_call(
+        LLMCallRecord(
+            task,
+            llm.model_name,
+            "bypass" if cache is None else "miss",
+            time.perf_counter() - started,
+            ttft,
+            prompt_tokens,
+            completion_tokens,
+            cached_tokens,
+        ),
+        state,
+    )
+    if cache is not None and key is not None:
+        await cache.set(key, "".join(chunks))
+
+
+def _clean_final_summary(text: str) -> str:
+    final_text = text.strip()
     if final_text.lstrip().startswith("사용자:"):
         final_text = final_text.lstrip("사용자:").strip()
     return final_text
 
-def build_transcript(messages: List[Dict[str, str]]) -> str:
-    if not messages:
-        return ""
-    return "\n".join([f"{m['role']}: {m['content']}" for m in messages])
-
-
-def build_next_question_prompt(messages: List[Dict[str, str]]) -> str:
-    context = build_transcript(messages)
-    themes_text = "\n".join([f"- {theme}" for theme in QUESTION_THEMES])
-    return (
-        "당신은 사용자의 구체적인 여행 성향을 파악하는 전문 상담가입니다.\n\n"
-        "<목표>\n"
-        "아래 5가지 주제에 대해 사용자의 답변을 모두 얻어야 합니다:\n"
-        f"{themes_text}\n\n"
-        "<현재 대화 상황>\n"
-        f"{context}\n\n"
+def build_transcript(messages: List[Dict[str, str]], summary: Optional[str] = None) -> str:
+    lines = [f"[이전 대화 요약]\n{summary}\n[최근 대화]"] if summary else []
+    lines.extend(f"{m['role']}: {m['content']}" for m in messages)
+    return "\n".join(lines)
+
+
+def build_conversation(messages: List[Dict[str, str]], summary: Optional[str] = None) -> List[BaseMessage]:
+    """대화 턴을 역할별 메시지로 변환합니다. 누적 요약이 있으면 턴 앞에 둡니다."""
+    conversation: List[BaseMessage] = [SystemMessage(f"[이전 대화 요약]\n{summary}")] if summary else []
+    for m in messages:
+        conversation.append(HumanMessage(m["content"]) if m["role"] == "user" else AIMessage(m["content"]))
+    return conversation
+
+
+def _with_instruction(conversation: List[BaseMessage], instruction: str) -> List[BaseMessage]:
+    return [SystemMessage(SYSTEM_PROMPT), *conversation, SystemMessage(instruction)]
+
+
+def build_next_question_prompt(messages: List[Dict[str, str]], summary: Optional[str] = None) -> List[BaseMessage]:
+    return _with_instruction(build_conversation(messages, summary), QUESTION_INSTRUCTION)
+
+
+def build_theme_question_prompt(theme: int, remaining: List[int], last_exchange: List[Dict[str, str]]) -> List[BaseMessage]:
+    remaining_text = "\n".join([f"- {QUESTION_THEMES[i]}" for i in remaining])
+    instruction = (
+        "<이번에 물어볼 주제>\n"
+        f"{QUESTION_THEMES[theme]}\n\n"
+        "<아직 다루지 않은 주제>\n"
+        f"{remaining_text}\n\n"
         "<지침>\n"
-        "1. 위 대화를 분석해서 어떤 주제들이 이미 다뤄졌는지 파악하세요.\n"
-        "2. 대화가 없다면, \"더 구체적인 당신의 여행 성향을 파악하기 위해 몇 가지 질문을 준비했습니다. 생각나는대로 편하게 답변해주세요!\" 와 함께 임의로 한 가지 주제를 정해서 질문을 시작하세요.\n"
-        "3. 아직 다루지 않은 주제 중에서 가장 자연스럽게 이어갈 수 있는 하나를 선택하세요.\n"
-        "4. 사용자의 이전 답변에 공감하며 자연스럽게 다음 질문으로 넘어가세요.\n\n"
-        "상담가의 답변: "
+        "1. 대화가 없다면, \"더 구체적인 당신의 여행 성향을 파악하기 위해 몇 가지 질문을 준비했습니다. 생각나는대로 편하게 답변해주세요!\" 와 함께 질문을 시작하세요.\n"
+        "2. 대화가 있다면, 사용자의 마지막 답변에 공감하며 자연스럽게 다음 질문으로 넘어가세요.\n"
+        "3. '이번에 물어볼 주제'에 대한 질문 하나만 하세요."
     )
+    return _with_instruction(build_conversation(last_exchange), instruction)
 
 
-def build_draft_summary_prompt(messages: List[Dict[str, str]]) -> str:
-    transcript = build_transcript(messages)
-    sys_prompt = (
-        "다음 대화는 사용자의 여행 성향을 파악하기 위한 Q&A입니다.\n"
-        "먼저 사용자의 마지막 답변에 공감하세요.\n"
-        "그 후 사용자에게 추가하고 싶은 본인의 여행 성향에 대한 정보가 있는지 피드백을 요청하세요."
-    )
-    return f"{sys_prompt}\n\n대화:\n{transcript}"
+def build_draft_summary_prompt(messages: List[Dict[str, str]], summary: Optional[str] = None) -> List[BaseMessage]:
+    return _with_instruction(build_conversation(messages, summary), DRAFT_INSTRUCTION)
 
 
-def build_final_summary_prompt(messages: List[Dict[str, str]]) -> str:
-    transcript = build_transcript(messages)
-    sys_prompt = (
-        "다음 대화는 사용자의 여행 성향을 파악하기 위한 Q&A입니다.\n"
-        "사용자의 답변을 한 단락으로 누락 없이 정리하세요."
-    )
-    return f"{sys_prompt}\n\n대화:\n{transcript}"
+def build_final_summary_prompt(messages: List[Dict[str, str]]) -> List[BaseMessage]:
+    return _with_instruction(build_conversation(messages), FINAL_INSTRUCTION)
 
 
+def build_rolling_summary_prompt(previous_summary: Optional[str], messages: List[Dict[str, str]]) -> List[BaseMessage]:
+    # 기존 요약 + 접을 구간은 질문 프롬프트와 같은 접두사를 가지므로 provider 캐시를 그대로 탑니다
+    return _with_instruction(build_conversation(messages, previous_summary), ROLLING_INSTRUCTION)
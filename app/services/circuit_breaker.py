@@ -0,0 +1,127 @@
+"""외부 백엔드 호출 보호: 서킷 브레이커 + 재시도 예산
+
+- CircuitBreaker: 연속 실패가 failure_threshold 회에 이르면 open 상태가 되어 reset_timeout 동안 호출을
+  즉시 거절합니다(CircuitOpenError). 이후 half-open 상태에서 half_open_max_calls 개의 시험 호출만 보내고,
+  성공하면 closed, 실패하면 다시 open으로 돌아갑니다.
+- RetryBudget: 최근 window 동안의 요청 수 대비 재시도 비율을 제한해, 백엔드 장애 시 재시도가
+  부하를 몇 배로 키우지 않도록 합니다 (최소 초당 min_per_second 회는 허용).
+- backoff_delay: 지수 백오프 + full jitter
+
+상태는 워커(프로세스)별로 관리합니다.
+"""
+from __future__ import annotations
+
+import random
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from ..core import metrics
+
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """서킷이 열려 있어 호출하지 않고 거절함"""
+
+    def __init__(self, name: str, retry_after_seconds: float):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+        self.retry_after_seconds = retry_after_seconds
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int,
+        reset_timeout_seconds: float,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        metrics.set_gauge("circuit_breaker_state", _STATE_GAUGE[CLOSED], breaker=name)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        metrics.incr("circuit_breaker_transitions_total", breaker=self.name, from_state=self.state, to_state=state)
+        metrics.set_gauge("circuit_breaker_state", _STATE_GAUGE[state], breaker=self.name)
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        self._probes = 0
+
+    def retry_after(self) -> float:
+        return max(self.reset_timeout_seconds - (time.monotonic() - self._opened_at), 0.0)
+
+    def before_call(self) -> None:
+        """호출 직전에 확인합니다. 허용되지 않으면 CircuitOpenError를 발생시킵니다."""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                metrics.incr("circuit_breaker_rejected_total", breaker=self.name)
+                raise CircuitOpenError(self.name, self.retry_after())
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_max_calls:
+                metrics.incr("circuit_breaker_rejected_total", breaker=self.name)
+                raise CircuitOpenError(self.name, self.reset_timeout_seconds)
+            self._probes += 1
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        if self.state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._failures = 0
+            self._transition(OPEN)
+
+
+class RetryBudget:
+    def __init__(self, *, ratio: float, min_per_second: float, window_seconds: float):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window_seconds = window_seconds
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        horizon = now - self.window_seconds
+        for events in (self._requests, self._retries):
+            while events and events[0] < horizon:
+                events.popleft()
+
+    def record_request(self) -> None:
+        now = time.monotonic()
+        self._trim(now)
+        self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """재시도 한 번을 예산에서 차감합니다. 예산이 없으면 False."""
+        now = time.monotonic()
+        self._trim(now)
+        allowed = self.min_per_second * self.window_seconds + self.ratio * len(self._requests)
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+def backoff_delay(attempt: int, base_seconds: float, max_seconds: float, rng: Optional[random.Random] = None) -> float:
+    """attempt(0부터)번째 재시도 전 대기 시간 (full jitter)"""
+    cap = min(max_seconds, base_seconds * (2 ** attempt))
+    return (rng or random).uniform(0, cap)
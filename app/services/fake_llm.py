@@ -0,0 +1,129 @@
+"""로컬 부하 테스트용 가짜 채팅 모델
+
+`WINEAR_LLM_BACKEND=fake` 로 설정하면 LLMRegistry가 ChatOpenAI 대신 이 모델을 사용합니다.
+OpenAI를 호출하지 않고, 설정한 지연 분포(로그정규)에 맞춰 고정 문구를 응답/스트리밍합니다.
+스트리밍도 같은 분포에서 전체 시간을 뽑고 첫 토큰 시간을 같은 비율로 늘리므로, SSE 부하 테스트에도 꼬리 지연이 나타납니다.
+usage_metadata도 채워 계측 경로를 그대로 탈 수 있습니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+_CANNED_RESPONSES = [
+    "좋은 말씀 감사합니다. 그렇다면 이번 여행에서 가장 기대하는 것은 무엇인가요?",
+    "그런 경험이 있으셨군요. 같이 여행을 가고 싶은 사람은 어떤 특징을 가졌으면 좋겠나요?",
+    "공감이 됩니다. 이번 여행에서 이것만큼은 꼭 있었으면 하는 것이 있다면 알려주세요.",
+    "사용자는 여유로운 일정과 자연 경관을 선호하며, 배려심 있는 동행과 함께하는 여행을 기대합니다.",
+]
+
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake-chat"
+    temperature: float = 0.0
+    latency_ms_median: float = 800.0
+    latency_sigma: float = 0.4
+    ttft_ms: float = 200.0  # 지연이 중앙값(latency_ms_median)일 때의 첫 토큰 시간
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _pick_response(self, messages: List[BaseMessage]) -> str:
+        prompt = "".join(str(m.content) for m in messages)
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        return _CANNED_RESPONSES[digest[0] % len(_CANNED_RESPONSES)]
+
+    def _sample_latency_seconds(self) -> float:
+        return random.lognormvariate(math.log(self.latency_ms_median), self.latency_sigma) / 1000
+
+    def _stream_schedule(self, n_tokens: int) -> Tuple[float, float]:
+        """(첫 토큰까지 대기, 토큰 간 간격) 초. 전체 시간은 비스트리밍과 같은 분포에서 뽑고, 첫 토큰 시간은 같은 비율로 늘립니다."""
+        total = self._sample_latency_seconds()
+        ttft = min(total, total * self.ttft_ms / self.latency_ms_median)
+        gap = (total - ttft) / (n_tokens - 1) if n_tokens > 1 else 0.0
+        return ttft, gap
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> dict:
+        prompt_tokens = sum(len(str(m.content).encode("utf-8")) for m in messages) // 4
+        completion_tokens = len(text.encode("utf-8")) // 4
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        text = self._pick_response(messages)
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._sample_latency_seconds())
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._sample_latency_seconds())
+        return self._result(messages)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text = self._pick_response(messages)
+        tokens = _tokens(text)
+        ttft, gap = self._stream_schedule(len(tokens))
+        time.sleep(ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(gap)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._pick_response(messages)
+        tokens = _tokens(text)
+        ttft, gap = self._stream_schedule(len(tokens))
+        await asyncio.sleep(ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(gap)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, text)))
+
+
+def _tokens(text: str) -> List[str]:
+    """공백 단위로 나누되 공백을 보존해 이어 붙이면 원문이 되도록 합니다."""
+    words = text.split(" ")
+    return [w if i == len(words) - 1 else f"{w} " for i, w in enumerate(words)]
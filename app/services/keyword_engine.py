@@ -0,0 +1,156 @@
+"""Features → 키워드 매핑 엔진
+
+result_keyword_ver2의 중첩 매핑(NUMERIC / TRAVEL_KEYWORD / PERSONAL_KEYWORD / TRAVEL_PURPOSE)을
+import 시점에 한 번만 (필드, 원본 값 → 매핑 값) 튜플로 컴파일합니다. 필드별 테이블은 한 단계짜리 읽기 전용
+매핑이라, 문서마다 중첩 dict를 .get(key, {}) 로 내려가거나 키 존재를 두 번 확인하지 않습니다.
+분석 페이지(analysis_result)와 추천 프로필(/recommend/user-profile)이 같은 테이블을 사용합니다.
+
+- analyze_features / analyze_features_batch: 분석 페이지용. 매핑에 없는 값은 UnmappedFeatureError (ValueError)
+- build_analysis_payload: 쓰기 시점에 user_features 문서에 저장하는 분석 결과 (MAPPING_VERSION과 함께 저장)
+- profile_keywords / profile_keywords_batch: 프로필 카드용. 매핑에 없는 값은 원본 그대로 사용
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+from ..constants.result_keyword_ver2 import (
+    NUMERIC_MAPPINGS,
+    PERSONAL_KEYWORD_MAPPINGS,
+    POLYGON_LABELS,
+    TRAVEL_KEYWORD_MAPPINGS,
+    TRAVEL_PURPOSE_MAPPINGS,
+)
+
+
+# 매핑 상수의 내용 해시. 상수가 바뀌면 값이 달라지므로, 저장된(materialized) 분석 결과가 최신인지 판단하는 데 씁니다.
+MAPPING_VERSION: str = hashlib.sha256(
+    json.dumps(
+        [POLYGON_LABELS, NUMERIC_MAPPINGS, TRAVEL_KEYWORD_MAPPINGS, PERSONAL_KEYWORD_MAPPINGS, TRAVEL_PURPOSE_MAPPINGS],
+        ensure_ascii=False,
+    ).encode("utf-8")
+).hexdigest()[:16]
+
+FieldTable = Mapping[Any, Any]
+# (필드, 원본 값 → 매핑 값) 을 매핑 정의 순서대로 나열한 컴파일 결과
+Spec = Tuple[Tuple[str, FieldTable], ...]
+
+
+def _compile(mappings: Mapping[str, Mapping[Any, Any]], fields: Iterable[str] | None = None) -> Spec:
+    return tuple(
+        (field, MappingProxyType(dict(mappings.get(field, {}))))
+        for field in (fields if fields is not None else mappings)
+    )
+
+
+NUMERIC_SPEC: Spec = _compile(NUMERIC_MAPPINGS, POLYGON_LABELS)
+TRAVEL_KEYWORD_SPEC: Spec = _compile(TRAVEL_KEYWORD_MAPPINGS)
+PERSONAL_KEYWORD_SPEC: Spec = _compile(PERSONAL_KEYWORD_MAPPINGS)
+TRAVEL_PURPOSE_SPEC: Spec = _compile(TRAVEL_PURPOSE_MAPPINGS)
+
+# 프로필 카드에 노출하는 키워드
+PROFILE_SPEC: Spec = (
+    ("시간약속", MappingProxyType(dict(PERSONAL_KEYWORD_MAPPINGS["시간약속"]))),
+    ("의견수용", MappingProxyType(dict(PERSONAL_KEYWORD_MAPPINGS["의견수용"]))),
+    ("여행희망지역", MappingProxyType(dict(TRAVEL_KEYWORD_MAPPINGS["여행희망지역"]))),
+    ("여행목적", MappingProxyType(dict(TRAVEL_PURPOSE_MAPPINGS["여행목적"]))),
+)
+
+
+class AnalysisKeywords(NamedTuple):
+    travel_keywords: List[str]
+    personal_keywords: List[str]
+    travel_purposes: List[str]
+    polygon_values: List[Any]
+
+
+class UnmappedFeatureError(ValueError):
+    """Features 값이 매핑 상수에 없음 (입력 데이터 문제이므로 라우터에서 422로 응답)"""
+
+
+def _unmapped(field: str, value: Any) -> UnmappedFeatureError:
+    return UnmappedFeatureError(f"value에서 매핑을 찾을 수 없습니다: key='{field}', value='{value}'")
+
+
+def _collect(spec: Spec, features: Mapping[str, Any]) -> List[str]:
+    """필드 순서대로 매핑해 평탄한 키워드 목록으로 만듭니다. 값이 0(미입력)인 필드는 제외합니다."""
+    keywords: List[str] = []
+    append = keywords.append
+    for field, table in spec:
+        value = features.get(field, 0)
+        if isinstance(value, int):
+            if value != 0:
+                append(str(value))
+            continue
+        if value.__class__ is not list:
+            value = (value,)
+        for v in value:
+            try:
+                append(table[v])
+            except (KeyError, TypeError):
+                raise _unmapped(field, v) from None
+    return keywords
+
+
+def _polygon(features: Mapping[str, Any]) -> List[Any]:
+    values: List[Any] = []
+    for field, table in NUMERIC_SPEC:
+        value = features.get(field, 0)
+        # 이미 정수(미입력 기본값 0 포함)면 그대로
+        if isinstance(value, int):
+            values.append(value)
+            continue
+        try:
+            values.append([table[v] for v in value] if value.__class__ is list else table[value])
+        except (KeyError, TypeError):
+            raise _unmapped(field, value) from None
+    return values
+
+
+def analyze_features(features: Mapping[str, Any]) -> AnalysisKeywords:
+    return AnalysisKeywords(
+        travel_keywords=_collect(TRAVEL_KEYWORD_SPEC, features),
+        personal_keywords=_collect(PERSONAL_KEYWORD_SPEC, features),
+        travel_purposes=_collect(TRAVEL_PURPOSE_SPEC, features),
+        polygon_values=_polygon(features),
+    )
+
+
+def build_analysis_payload(features: Mapping[str, Any]) -> Dict[str, Any]:
+    """UserFeaturesAnalysisResponse 의 분석 필드 (user_id 제외). 매핑에 없는 값은 ValueError."""
+    analysis = analyze_features(features)
+    return {
+        "travel_keywords": analysis.travel_keywords,
+        "personal_keywords": analysis.personal_keywords,
+        "travel_purposes": analysis.travel_purposes,
+        "polygon_labels": list(POLYGON_LABELS),
+        "polygon_values": analysis.polygon_values,
+    }
+
+
+def analyze_features_batch(features_list: Iterable[Mapping[str, Any]]) -> List[AnalysisKeywords]:
+    return [analyze_features(features) for features in features_list]
+
+
+def profile_keywords(features: Mapping[str, Any]) -> Dict[str, Any]:
+    """프로필 카드용 키워드. 비어 있는 필드는 생략하고, 리스트 값(여행희망지역 / 여행목적)은 원소별로 매핑합니다."""
+    keywords: Dict[str, Any] = {}
+    for field, table in PROFILE_SPEC:
+        value = features.get(field)
+        if not value:
+            continue
+        try:
+            if value.__class__ is list:
+                keywords[field] = [table.get(v, v) for v in value]
+            else:
+                keywords[field] = table.get(value, value)
+        except TypeError:
+            # 해시할 수 없는 값(리스트 안의 dict 등)은 원본 그대로
+            keywords[field] = value
+    return keywords
+
+
+def profile_keywords_batch(features_list: Iterable[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    return [profile_keywords(features) for features in features_list]
@@ -0,0 +1,140 @@
+"""Redis 기반 LLM 응답 캐시
+
+(model, temperature, prompt) 해시를 키로 LLM 응답 텍스트를 저장합니다.
+- TTL: 항목별 만료
+- 크기 제한: 최근 접근 시각을 점수로 하는 sorted set 인덱스로 LRU 제거
+  (만료 시각 인덱스를 따로 두어 TTL이 지난 항목은 저장 시 LRU 인덱스에서도 함께 정리)
+- hit/miss 카운터: Redis 통계 해시(워커 공통) + 프로세스 메트릭
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from redis.asyncio import Redis
+
+from ..core import metrics
+from ..core.config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# KEYS: 항목, LRU 인덱스, 통계 / ARGV: 캐시 키, 현재 시각
+# 조회 + 최근 접근 시각 갱신 + hit/miss 카운터를 한 번의 왕복으로
+_GET_LUA = """
+local value = redis.call('GET', KEYS[1])
+if value then
+    redis.call('ZADD', KEYS[2], 'XX', ARGV[2], ARGV[1])
+    redis.call('HINCRBY', KEYS[3], 'hits', 1)
+else
+    redis.call('HINCRBY', KEYS[3], 'misses', 1)
+end
+return value
+"""
+
+# KEYS: 항목, LRU 인덱스, 만료 인덱스 / ARGV: 캐시 키, 값, TTL, 현재 시각, 최대 항목 수, 항목 키 prefix
+# 저장 후 TTL이 지난 항목을 두 인덱스에서 지우고, 그래도 넘치면 가장 오래 접근하지 않은 항목부터 제거
+_SET_LUA = """
+local now = tonumber(ARGV[4])
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+redis.call('ZADD', KEYS[3], now + tonumber(ARGV[3]), ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now, 'LIMIT', 0, 1000)
+if #expired > 0 then
+    redis.call('ZREM', KEYS[2], unpack(expired))
+    redis.call('ZREM', KEYS[3], unpack(expired))
+end
+local overflow = redis.call('ZCARD', KEYS[2]) - tonumber(ARGV[5])
+local evicted = 0
+if overflow > 0 then
+    local popped = redis.call('ZPOPMIN', KEYS[2], overflow)
+    for i = 1, #popped, 2 do
+        redis.call('DEL', ARGV[6] .. popped[i])
+        redis.call('ZREM', KEYS[3], popped[i])
+        evicted = evicted + 1
+    end
+end
+return evicted
+"""
+
+
+class LLMResponseCache:
+    def __init__(self, redis: Redis, *, ttl_seconds: int, max_entries: int, namespace: str = "llm_cache"):
+        self.redis = redis
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self._index_key = f"{namespace}:index"
+        self._expiry_key = f"{namespace}:expiry"
+        self._stats_key = f"{namespace}:stats"
+
+    @staticmethod
+    def make_key(model: str, temperature: float | None, prompt: str) -> str:
+        raw = json.dumps([model, temperature, prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.namespace}:entry:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        try:
+            script = self.redis.register_script(_GET_LUA)
+            value = await script(keys=[self._entry_key(key), self._index_key, self._stats_key], args=[key, time.time()])
+        except Exception as exc:
+            logger.warning(f"LLM cache get failed; bypassing cache. error={exc}")
+            return None
+        metrics.incr("llm_cache_requests_total", result="hit" if value is not None else "miss")
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        try:
+            script = self.redis.register_script(_SET_LUA)
+            evicted = await script(
+                keys=[self._entry_key(key), self._index_key, self._expiry_key],
+                args=[key, value, self.ttl_seconds, time.time(), self.max_entries, self._entry_key("")],
+            )
+            if int(evicted):
+                metrics.incr("llm_cache_evictions_total", int(evicted))
+        except Exception as exc:
+            logger.warning(f"LLM cache set failed. error={exc}")
+
+    async def stats(self) -> Dict[str, Any]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._stats_key)
+            pipe.zcard(self._index_key)
+            counters, size = await pipe.execute()
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        total = hits + misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else None,
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+
+
+def init_llm_cache(redis: Optional[Redis], settings: Settings) -> Optional[LLMResponseCache]:
+    """lifespan 시작 시 호출. Redis가 없거나 비활성화면 캐시 없이 동작합니다."""
+    global _cache
+    if redis is None or not settings.llm_cache_enabled:
+        _cache = None
+    else:
+        _cache = LLMResponseCache(
+            redis,
+            ttl_seconds=settings.llm_cache_ttl_seconds,
+            max_entries=settings.llm_cache_max_entries,
+        )
+    return _cache
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    return _cache
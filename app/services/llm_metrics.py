@@ -0,0 +1,116 @@
+"""LLM 호출 계측: 지연시간 / 첫 토큰 시간 / 토큰 수(provider prompt cache 적중 포함) / 비용
+
+모든 채팅 LLM 호출(chat_prompts)은 LLMCallRecord를 남기며, 이는
+- 프로세스 메트릭(/metrics)의 히스토그램/카운터로 집계되고
+- 세션 state의 "_llm_usage" 에 누적되어 라우터가 세션 필드(llm_*)로 저장합니다.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from ..core import metrics
+from ..core.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+SESSION_USAGE_FIELDS = (
+    "llm_calls",
+    "llm_seconds",
+    "llm_prompt_tokens",
+    "llm_cached_prompt_tokens",
+    "llm_completion_tokens",
+    "llm_cost_usd",
+)
+
+TOKEN_BUCKETS: Tuple[float, ...] = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+CACHE_RATIO_BUCKETS: Tuple[float, ...] = (0.0, 0.25, 0.5, 0.75, 0.9, 1.0)
+
+
+@dataclass
+class LLMCallRecord:
+    kind: str
+    model: str
+    cache: str  # hit / miss / bypass
+    seconds: float
+    ttft_seconds: Optional[float] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # 입력 토큰 중 provider의 prompt cache에서 읽은 토큰 (prompt_tokens에 포함됨)
+    cached_prompt_tokens: int = 0
+
+    @property
+    def cost_usd(self) -> float:
+        if self.cache == "hit":
+            return 0.0
+        prices = get_settings().llm_pricing_per_1k_tokens.get(self.model)
+        if not prices:
+            return 0.0
+        input_price, output_price = prices[0], prices[1]
+        cached_input_price = prices[2] if len(prices) > 2 else input_price
+        uncached_tokens = self.prompt_tokens - self.cached_prompt_tokens
+        return (
+            uncached_tokens * input_price
+            + self.cached_prompt_tokens * cached_input_price
+            + self.completion_tokens * output_price
+        ) / 1000
+
+
+def usage_tokens(usage: Optional[Dict[str, Any]]) -> Tuple[int, int, int]:
+    """langchain usage_metadata에서 (입력 토큰, 출력 토큰, 캐시에서 읽은 입력 토큰)을 꺼냅니다."""
+    if not usage:
+        return 0, 0, 0
+    details = usage.get("input_token_details") or {}
+    return (
+        int(usage.get("input_tokens") or 0),
+        int(usage.get("output_tokens") or 0),
+        int(details.get("cache_read") or 0),
+    )
+
+
+def record_llm_call(record: LLMCallRecord, state: Optional[Dict[str, Any]] = None) -> None:
+    labels = {"kind": record.kind, "model": record.model, "cache": record.cache}
+    metrics.incr("llm_calls_total", **labels)
+    metrics.observe("llm_call_seconds", record.seconds, **labels)
+    if record.ttft_seconds is not None:
+        metrics.observe("llm_ttft_seconds", record.ttft_seconds, **labels)
+    if record.cache != "hit":
+        metrics.observe("llm_prompt_tokens", record.prompt_tokens, buckets=TOKEN_BUCKETS, kind=record.kind, model=record.model)
+        metrics.observe("llm_completion_tokens", record.completion_tokens, buckets=TOKEN_BUCKETS, kind=record.kind, model=record.model)
+        metrics.incr("llm_prompt_tokens_total", record.prompt_tokens, kind=record.kind, model=record.model)
+        metrics.incr("llm_cached_prompt_tokens_total", record.cached_prompt_tokens, kind=record.kind, model=record.model)
+        if record.prompt_tokens:
+            metrics.observe(
+                "llm_prompt_cache_ratio",
+                record.cached_prompt_tokens / record.prompt_tokens,
+                buckets=CACHE_RATIO_BUCKETS,
+                kind=record.kind,
+                model=record.model,
+            )
+        metrics.incr("llm_completion_tokens_total", record.completion_tokens, kind=record.kind, model=record.model)
+        metrics.incr("llm_cost_usd_total", record.cost_usd, kind=record.kind, model=record.model)
+    logger.debug(f"LLM call: {record}")
+
+    if state is not None:
+        usage = state.setdefault("_llm_usage", {})
+        for field, value in (
+            ("llm_calls", 1),
+            ("llm_seconds", record.seconds),
+            ("llm_prompt_tokens", record.prompt_tokens),
+            ("llm_cached_prompt_tokens", record.cached_prompt_tokens),
+            ("llm_completion_tokens", record.completion_tokens),
+            ("llm_cost_usd", record.cost_usd),
+        ):
+            usage[field] = usage.get(field, 0) + value
+
+
+def pop_llm_usage(state: Dict[str, Any]) -> Dict[str, float]:
+    """state에 누적된 아직 저장되지 않은 사용량을 꺼냅니다 (세션 필드 증가량으로 사용)."""
+    return state.pop("_llm_usage", None) or {}
+
+
+def session_usage(state: Dict[str, Any]) -> Dict[str, float]:
+    """세션에 저장된 LLM 사용량 합계"""
+    return {field: state.get(field, 0) for field in SESSION_USAGE_FIELDS}
@@ -0,0 +1,205 @@
+"""Redis 기반 추천 결과 캐시 (stale-while-revalidate)
+
+user_id별 SNZ_RecSys 응답을 저장합니다.
+- fresh TTL 이내: 캐시 결과를 그대로 응답 (cache_status="fresh")
+- stale TTL 이내: 캐시 결과를 응답하고, 백그라운드에서 한 워커만 갱신 (SET NX 락, cache_status="stale")
+- 그 이후 / 캐시 없음: 동기 호출 후 저장 (cache_status="miss")
+- 동기 호출이 실패(서킷 open 포함)했지만 fallback TTL 안의 항목이 있으면 그 결과로 응답 (cache_status="fallback")
+- Redis 미연결 / 비활성화: 캐시 없이 호출 (cache_status="bypass")
+
+user_features / user_summary가 바뀌면 저장소 쓰기 함수가 invalidate_recommendations()로 항목을 지웁니다.
+세대(generation) 카운터를 함께 올려, 무효화 이전에 시작된 호출 결과가 뒤늦게 저장되지 않도록 합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from redis.asyncio import Redis
+
+from ..core import metrics
+from ..core.config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+# KEYS: 항목, 세대 / ARGV: 호출 시작 시 읽은 세대, 값, TTL
+# 그 사이 무효화되어 세대가 바뀌었으면 저장하지 않습니다
+_SET_IF_GENERATION_LUA = """
+local current = redis.call('GET', KEYS[2]) or '0'
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+Fetcher = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class RecommendationCache:
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        fresh_ttl_seconds: int,
+        stale_ttl_seconds: int,
+        refresh_lock_seconds: int,
+        fallback_ttl_seconds: int = 0,
+        namespace: str = "rec_cache",
+    ):
+        self.redis = redis
+        self.fresh_ttl_seconds = fresh_ttl_seconds
+        self.stale_ttl_seconds = max(stale_ttl_seconds, fresh_ttl_seconds)
+        self.refresh_lock_seconds = refresh_lock_seconds
+        # Redis 항목 수명: stale 구간 + 장애 대비 보관 구간
+        self.retention_seconds = self.stale_ttl_seconds + max(fallback_ttl_seconds, 0)
+        self.namespace = namespace
+        self._refreshing: Set[asyncio.Task] = set()
+
+    def _entry_key(self, user_id: str) -> str:
+        return f"{self.namespace}:entry:{user_id}"
+
+    def _generation_key(self, user_id: str) -> str:
+        return f"{self.namespace}:gen:{user_id}"
+
+    def _lock_key(self, user_id: str) -> str:
+        return f"{self.namespace}:lock:{user_id}"
+
+    async def get(self, user_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[float], str]:
+        """(캐시 값, 경과 시간, 세대)를 반환합니다. 세대는 이후 store()에 그대로 넘깁니다."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(self._entry_key(user_id))
+            pipe.get(self._generation_key(user_id))
+            raw, generation = await pipe.execute()
+        generation = generation or "0"
+        if raw is None:
+            return None, None, generation
+        entry = json.loads(raw)
+        return entry["data"], max(time.time() - entry["stored_at"], 0.0), generation
+
+    async def store(self, user_id: str, data: Dict[str, Any], generation: str) -> bool:
+        script = self.redis.register_script(_SET_IF_GENERATION_LUA)
+        value = json.dumps({"data": data, "stored_at": time.time()}, ensure_ascii=False)
+        stored = await script(
+            keys=[self._entry_key(user_id), self._generation_key(user_id)],
+            args=[generation, value, self.retention_seconds],
+        )
+        return bool(int(stored))
+
+    async def invalidate(self, user_id: str) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._entry_key(user_id))
+            pipe.incr(self._generation_key(user_id))
+            pipe.expire(self._generation_key(user_id), self.retention_seconds)
+            await pipe.execute()
+        metrics.incr("recommend_cache_invalidations_total")
+
+    async def get_or_fetch(self, user_id: str, fetch: Fetcher) -> Tuple[Dict[str, Any], str, Optional[float]]:
+        """(추천 결과, cache_status, cache_age_seconds)"""
+        try:
+            data, age, generation = await self.get(user_id)
+        except Exception as exc:
+            logger.warning(f"Recommendation cache get failed; bypassing cache. error={exc}")
+            metrics.incr("recommend_cache_requests_total", result="bypass")
+            return await fetch(), "bypass", None
+        if data is not None and age is not None and age < self.fresh_ttl_seconds:
+            metrics.incr("recommend_cache_requests_total", result="fresh")
+            return data, "fresh", age
+        if data is not None and age is not None and age < self.stale_ttl_seconds:
+            metrics.incr("recommend_cache_requests_total", result="stale")
+            await self._schedule_refresh(user_id, fetch, generation)
+            return data, "stale", age
+        try:
+            fetched = await fetch()
+        except Exception as exc:
+            if data is None:
+                raise
+            logger.warning(f"Recommendation fetch failed; serving cached fallback: user_id={user_id}, error={exc}")
+            metrics.incr("recommend_cache_requests_total", result="fallback")
+            return data, "fallback", age
+        metrics.incr("recommend_cache_requests_total", result="miss")
+        await self._store_quietly(user_id, fetched, generation)
+        return fetched, "miss", 0.0
+
+    async def _schedule_refresh(self, user_id: str, fetch: Fetcher, generation: str) -> None:
+        try:
+            acquired = await self.redis.set(self._lock_key(user_id), "1", nx=True, ex=self.refresh_lock_seconds)
+        except Exception as exc:
+            logger.warning(f"Recommendation cache lock failed. error={exc}")
+            return
+        if not acquired:
+            return
+        task = asyncio.create_task(self._refresh(user_id, fetch, generation))
+        # 태스크가 끝나기 전에 GC되지 않도록 참조를 유지
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def _refresh(self, user_id: str, fetch: Fetcher, generation: str) -> None:
+        started = time.perf_counter()
+        try:
+            data = await fetch()
+            await self._store_quietly(user_id, data, generation)
+            metrics.incr("recommend_cache_refresh_total", result="ok")
+            metrics.observe("recommend_cache_refresh_seconds", time.perf_counter() - started)
+        except Exception as exc:
+            metrics.incr("recommend_cache_refresh_total", result="error")
+            logger.warning(f"Recommendation refresh failed: user_id={user_id}, error={exc}")
+        finally:
+            try:
+                await self.redis.delete(self._lock_key(user_id))
+            except Exception:
+                pass
+
+    async def _store_quietly(self, user_id: str, data: Dict[str, Any], generation: str) -> None:
+        try:
+            if not await self.store(user_id, data, generation):
+                metrics.incr("recommend_cache_stale_writes_total")
+        except Exception as exc:
+            logger.warning(f"Recommendation cache set failed. error={exc}")
+
+
+_cache: Optional[RecommendationCache] = None
+
+
+def init_recommend_cache(redis: Optional[Redis], settings: Settings) -> Optional[RecommendationCache]:
+    """Redis 연결 시 호출. Redis가 없거나 비활성화면 캐시 없이 동작합니다."""
+    global _cache
+    if redis is None or not settings.recommend_cache_enabled:
+        _cache = None
+    else:
+        _cache = RecommendationCache(
+            redis,
+            fresh_ttl_seconds=settings.recommend_cache_fresh_ttl_seconds,
+            stale_ttl_seconds=settings.recommend_cache_stale_ttl_seconds,
+            refresh_lock_seconds=settings.recommend_cache_refresh_lock_seconds,
+            fallback_ttl_seconds=settings.recommend_cache_fallback_ttl_seconds,
+        )
+    return _cache
+
+
+def get_recommend_cache() -> Optional[RecommendationCache]:
+    return _cache
+
+
+async def cached_recommendations(user_id: str, fetch: Fetcher) -> Tuple[Dict[str, Any], str, Optional[float]]:
+    cache = get_recommend_cache()
+    if cache is None:
+        metrics.incr("recommend_cache_requests_total", result="bypass")
+        return await fetch(), "bypass", None
+    return await cache.get_or_fetch(user_id, fetch)
+
+
+async def invalidate_recommendations(*user_ids: Any) -> None:
+    """사용자 입력(user_features / user_summary)이 바뀐 경우 저장소 쓰기 함수에서 호출합니다."""
+    cache = get_recommend_cache()
+    if cache is None:
+        return
+    for user_id in {str(u) for u in user_ids if u is not None}:
+        try:
+            await cache.invalidate(user_id)
+        except Exception as exc:
+            logger.warning(f"Recommendation cache invalidation failed: user_id={user_id}, error={exc}")
@@ -0,0 +1,88 @@
+"""Redis 연결 감시 및 백그라운드 재연결
+
+기동 시 Redis에 연결하지 못해도 앱은 뜨며, 감시 태스크가 주기적으로 재연결을 시도합니다.
+연결에 성공하거나 장애에서 회복하면 on_connect 콜백으로 Redis에 의존하는 구성요소
+(LLM 캐시, 종료 워커, tiered 세션 저장소 resync 등)를 다시 연결합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+import redis.asyncio as aioredis
+from redis.asyncio import Redis
+
+from ..core import metrics
+from ..core.config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class RedisSupervisor:
+    def __init__(self, state: Any, settings: Settings, on_connect: Callable[[Redis], Awaitable[None]]):
+        # state: app.state (연결되면 state.redis를 설정)
+        self.state = state
+        self.redis_url = settings.redis_url
+        self.interval_seconds = settings.redis_reconnect_interval_seconds
+        self.on_connect = on_connect
+        # None: 아직 확인 전 (첫 상태와 상태 변화만 로깅)
+        self.healthy: Optional[bool] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> bool:
+        """연결을 한 번 시도합니다. 성공하면 state.redis를 설정하고 on_connect를 호출합니다."""
+        client = aioredis.from_url(self.redis_url, encoding="utf-8", decode_responses=True)
+        try:
+            await client.ping()
+        except Exception as exc:
+            await client.aclose()
+            self._mark(False, exc)
+            return False
+        self.state.redis = client
+        await self._recovered()
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                client: Optional[Redis] = getattr(self.state, "redis", None)
+                if client is None:
+                    await self.connect()
+                    continue
+                # 클라이언트는 다음 명령에서 스스로 재연결하므로, 여기서는 상태만 확인합니다
+                await client.ping()
+                if self.healthy is not True:
+                    await self._recovered()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._mark(False, exc)
+
+    async def _recovered(self) -> None:
+        self._mark(True)
+        try:
+            await self.on_connect(self.state.redis)
+        except Exception as exc:
+            logger.error(f"Redis reconnect hook failed: {exc}")
+
+    def _mark(self, healthy: bool, exc: Optional[BaseException] = None) -> None:
+        if healthy != self.healthy:
+            if healthy:
+                logger.info("Connected to Redis")
+            else:
+                logger.warning(f"Redis unavailable; retrying every {self.interval_seconds}s. error={exc}")
+        self.healthy = healthy
+        metrics.set_gauge("redis_available", 1 if healthy else 0)
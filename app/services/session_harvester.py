@@ -0,0 +1,126 @@
+"""만료 직전 채팅 세션 수거기
+
+`/chat/end` 없이 이탈한 사용자의 세션은 TTL이 지나면 답변과 함께 사라집니다.
+수거기는 세션 저장소의 만료 인덱스(Redis는 chat_session:expiry)를 주기적으로 확인해 곧 만료될 세션 중
+사용자 답변이 chat_harvest_min_answers 개 이상인 세션을 골라, 제한된 동시성으로 최종 요약을
+만들고 user_summary에 한 번의 bulk_write로 저장합니다.
+
+세션 자체는 삭제하지 않고 harvested_count 만 기록하므로, 사용자가 남은 TTL 안에 돌아와
+대화를 이어가도 문제가 없으며 이후 새 답변이 생기면 다시 수거 대상이 됩니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, List, NamedTuple, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ..core import metrics
+from ..core.config import Settings
+from ..repositories.session_store import SessionStore
+from ..repositories.user_summary_repository import bulk_upsert_user_summaries
+from .chat_prompts import make_final_summary
+from .llm_metrics import pop_llm_usage
+from .speculation import speculative_result
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Harvested(NamedTuple):
+    session_id: str
+    user_id: str
+    summary: str
+    count: int
+    usage: Dict[str, float]
+
+
+class SessionHarvester:
+    def __init__(self, store: SessionStore, db: AsyncIOMotorDatabase, settings: Settings):
+        self.store = store
+        self.db = db
+        self.interval_seconds = settings.chat_harvest_interval_seconds
+        self.window_seconds = settings.chat_harvest_window_seconds
+        self.min_answers = settings.chat_harvest_min_answers
+        self.batch_size = settings.chat_harvest_batch_size
+        self._semaphore = asyncio.Semaphore(settings.chat_harvest_concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Chat session harvester started")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.harvest_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"Session harvest failed: {exc}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def harvest_once(self) -> int:
+        """곧 만료될 세션을 한 배치 수거하고 저장한 요약 수를 반환합니다."""
+        session_ids = await self.store.claim_expiring(self.window_seconds, self.batch_size)
+        if not session_ids:
+            return 0
+        results = await asyncio.gather(*[self._summarize(sid) for sid in session_ids], return_exceptions=True)
+        harvested: List[_Harvested] = []
+        for session_id, result in zip(session_ids, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Session harvest skipped: session_id={session_id}, error={result}")
+                metrics.incr("chat_harvest_sessions_total", result="error")
+                await self.store.release_expiring(session_id)
+            elif result is not None:
+                harvested.append(result)
+        if not harvested:
+            return 0
+        try:
+            await bulk_upsert_user_summaries(self.db, [(item.user_id, item.summary) for item in harvested])
+        except Exception:
+            # 저장하지 못했으면 표시하지 않고 만료 인덱스에 되돌려 다음 회차에 다시 수거
+            for item in harvested:
+                await self.store.release_expiring(item.session_id)
+            metrics.incr("chat_harvest_sessions_total", len(harvested), result="error")
+            raise
+        # 저장에 성공한 뒤에만 수거 시점의 count를 기록 (TTL은 남은 시간 그대로 유지)
+        for item in harvested:
+            try:
+                ttl = await self.store.get_ttl(item.session_id)
+                await self.store.update_fields(
+                    item.session_id,
+                    {"harvested_count": item.count},
+                    increments=item.usage,
+                    ttl_seconds=max(ttl, 1),
+                )
+            except Exception as exc:
+                # 표시만 실패한 경우: 다음 회차에 같은 요약을 다시 upsert할 뿐 결과는 같음
+                logger.warning(f"Harvest marker update failed: session_id={item.session_id}, error={exc}")
+        metrics.incr("chat_harvest_sessions_total", len(harvested), result="harvested")
+        logger.info(f"Harvested {len(harvested)} expiring chat sessions")
+        return len(harvested)
+
+    async def _summarize(self, session_id: str) -> Optional[_Harvested]:
+        session = await self.store.get(session_id)
+        if session is None:
+            return None
+        count = int(session.get("count") or 0)
+        if (
+            count < self.min_answers
+            or session.get("final_summary") is not None
+            or int(session.get("harvested_count") or 0) >= count
+        ):
+            metrics.incr("chat_harvest_sessions_total", result="skipped")
+            return None
+        async with self._semaphore:
+            summary = speculative_result(session, "final") or await make_final_summary(session)
+        return _Harvested(session_id, session["user_id"], summary, count, pop_llm_usage(session))
@@ -0,0 +1,83 @@
+"""초안/최종 요약 선계산 (speculative precomputation)
+
+사용자 답변이 chat_speculative_min_count 회를 넘으면, 다음 질문을 만드는 동안 백그라운드에서
+초안 요약과 최종 요약을 미리 계산해 세션에 저장합니다. 결과에는 계산 시점의 count를 함께
+기록하고, 이후 /chat/draft, /chat/end 요청의 count가 같으면 LLM 호출 없이 바로 응답합니다.
+
+- 같은 세션에 새 답변이 오면 이 워커에서 진행 중인 선계산 작업은 취소됩니다.
+- 다른 워커에서 진행 중인 작업은 취소할 수 없지만, 저장 시 count를 비교하므로 오래된 결과는 버려집니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from ..core import metrics
+from ..core.config import get_settings
+from ..repositories.session_store import SessionStore
+from .chat_prompts import make_draft_summary, make_final_summary
+
+
+logger = logging.getLogger(__name__)
+
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def cancel_speculation(session_id: str) -> None:
+    task = _inflight.pop(session_id, None)
+    if task is not None and not task.done():
+        task.cancel()
+        metrics.incr("chat_speculation_total", result="cancelled")
+
+
+def schedule_speculation(store: SessionStore, session_id: str, state: Dict[str, Any]) -> None:
+    """현재 대화(사용자 답변까지)에 대한 초안/최종 요약 선계산을 시작합니다."""
+    cancel_speculation(session_id)
+    settings = get_settings()
+    if not settings.chat_speculative_enabled or state["count"] < settings.chat_speculative_min_count:
+        return
+    snapshot: Dict[str, Any] = {
+        "messages": list(state["messages"]),
+        "count": state["count"],
+        "rolling_summary": state.get("rolling_summary"),
+        "summarized_count": state.get("summarized_count"),
+    }
+    task = asyncio.create_task(_speculate(store, session_id, snapshot))
+    _inflight[session_id] = task
+
+    def _forget(done: asyncio.Task) -> None:
+        if _inflight.get(session_id) is done:
+            _inflight.pop(session_id, None)
+
+    task.add_done_callback(_forget)
+
+
+async def _speculate(store: SessionStore, session_id: str, snapshot: Dict[str, Any]) -> None:
+    try:
+        draft, final = await asyncio.gather(make_draft_summary(snapshot), make_final_summary(snapshot))
+        stored = await store.update_fields_if_count(
+            session_id,
+            snapshot["count"],
+            {
+                "spec_draft": draft,
+                "spec_draft_count": snapshot["count"],
+                "spec_final": final,
+                "spec_final_count": snapshot["count"],
+            },
+        )
+        metrics.incr("chat_speculation_total", result="stored" if stored else "stale")
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        metrics.incr("chat_speculation_total", result="error")
+        logger.warning(f"Speculative summary failed: session_id={session_id}, error={exc}")
+
+
+def speculative_result(state: Dict[str, Any], kind: str) -> Optional[str]:
+    """kind("draft"|"final")의 선계산 결과가 현재 대화와 같은 count로 계산되었으면 반환합니다."""
+    if state.get(f"spec_{kind}_count") != state.get("count"):
+        metrics.incr("chat_speculation_lookups_total", kind=kind, result="miss")
+        return None
+    metrics.incr("chat_speculation_lookups_total", kind=kind, result="hit")
+    return state.get(f"spec_{kind}")
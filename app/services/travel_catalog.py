@@ -0,0 +1,177 @@
+"""워커 단위 인메모리 여행 패키지 카탈로그
+
+travel_info(title, hashtags)와 travel_url(url)을 product_code 기준으로 합쳐 메모리에 보관합니다.
+카탈로그는 작고 거의 바뀌지 않으므로 `/recommend/travel`은 DB 왕복 없이 응답합니다.
+
+- 기동 시 전체 로드
+- 갱신: MongoDB change stream(두 컬렉션을 DB 단위 스트림 하나로 감시)으로 변경을 감지하면
+  debounce 후 전체를 다시 읽어 교체합니다. 레플리카셋이 아니어서 change stream을 쓸 수 없으면
+  travel_catalog_poll_interval_seconds 주기의 폴링으로 전환합니다.
+- 로드에 한 번도 성공하지 못한 동안(ready=False)은 호출 측이 DB에서 직접 조회합니다.
+
+크기 / 추정 메모리 / 마지막 로드 이후 경과 시간은 stats()와 `/metrics`의 travel_catalog 항목에서 확인합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+from ..core import metrics
+from ..core.config import Settings
+from ..repositories.travel_repository import INFO_COLLECTION, URL_COLLECTION, list_travel_packages
+from ..schemas.recommend import TravelInfo
+
+
+logger = logging.getLogger(__name__)
+
+# 레플리카셋 / 샤드 클러스터가 아니어서 $changeStream을 쓸 수 없음
+_CHANGE_STREAM_UNSUPPORTED_CODES = {40573}
+
+
+def _approx_size(obj: Any, seen: Optional[set] = None) -> int:
+    """객체 그래프의 대략적인 메모리 사용량 (bytes)"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_approx_size(k, seen) + _approx_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(_approx_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _approx_size(vars(obj), seen)
+    return size
+
+
+class TravelCatalog:
+    def __init__(self, db: AsyncIOMotorDatabase, settings: Settings):
+        self.db = db
+        self.poll_interval_seconds = settings.travel_catalog_poll_interval_seconds
+        self.debounce_seconds = settings.travel_catalog_reload_debounce_seconds
+        self.retry_interval_seconds = settings.travel_catalog_retry_interval_seconds
+        self._entries: Dict[str, TravelInfo] = {}
+        self._approx_bytes = 0
+        self.ready = False
+        self.mode = "starting"  # change_stream / polling
+        self.loaded_at: Optional[float] = None
+        self.last_change_at: Optional[float] = None
+        self.reloads = 0
+        self._reload_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        # 첫 로드 실패는 치명적이지 않음 (DB 직접 조회로 응답하며 백그라운드에서 재시도)
+        try:
+            await self.reload()
+        except Exception as exc:
+            logger.error(f"Travel catalog initial load failed: {exc}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def reload(self) -> int:
+        """두 컬렉션을 다시 읽어 카탈로그를 통째로 교체하고 항목 수를 반환합니다."""
+        async with self._reload_lock:
+            started = time.perf_counter()
+            entries: Dict[str, TravelInfo] = {
+                travel.product_code: travel for travel in await list_travel_packages(self.db)
+            }
+            self._entries = entries
+            self._approx_bytes = _approx_size(entries)
+            self.loaded_at = time.time()
+            self.ready = True
+            self.reloads += 1
+            metrics.incr("travel_catalog_reloads_total")
+            metrics.observe("travel_catalog_reload_seconds", time.perf_counter() - started)
+            metrics.set_gauge("travel_catalog_entries", len(entries))
+            metrics.set_gauge("travel_catalog_bytes", self._approx_bytes)
+            return len(entries)
+
+    def lookup(self, travel_ids: List[str]) -> List[TravelInfo]:
+        """요청 순서대로 반환합니다. 카탈로그에 없는 product_code는 건너뜁니다."""
+        entries = self._entries
+        return [entries[travel_id] for travel_id in travel_ids if travel_id in entries]
+
+    def stats(self) -> Dict[str, Any]:
+        age = time.time() - self.loaded_at if self.loaded_at is not None else None
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "entries": len(self._entries),
+            "approx_bytes": self._approx_bytes,
+            "loaded_at": self.loaded_at,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "last_change_at": self.last_change_at,
+            "reloads": self.reloads,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not self.ready:
+                    await self.reload()
+                # 컬렉션 drop / rename 등으로 스트림이 닫히면 다시 연결
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as exc:
+                if exc.code in _CHANGE_STREAM_UNSUPPORTED_CODES:
+                    logger.info("Change streams unavailable; travel catalog falls back to polling")
+                    await self._poll()
+                    return
+                logger.warning(f"Travel catalog change stream failed: {exc}")
+            except Exception as exc:
+                logger.warning(f"Travel catalog refresh failed: {exc}")
+            await asyncio.sleep(self.retry_interval_seconds)
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"ns.coll": {"$in": [INFO_COLLECTION, URL_COLLECTION]}}}]
+        async with self.db.watch(pipeline) as stream:
+            self.mode = "change_stream"
+            # 스트림을 여는 동안 놓친 변경이 없도록 한 번 더 읽음
+            await self.reload()
+            while stream.alive:
+                change = await stream.try_next()
+                if change is None:
+                    continue
+                self.last_change_at = time.time()
+                metrics.incr("travel_catalog_changes_total", op=change.get("operationType", "unknown"))
+                # 일괄 반영처럼 몰려오는 변경은 debounce 동안 모아서 한 번만 다시 읽음
+                await asyncio.sleep(self.debounce_seconds)
+                while await stream.try_next() is not None:
+                    pass
+                await self.reload()
+
+    async def _poll(self) -> None:
+        self.mode = "polling"
+        while True:
+            await asyncio.sleep(self.poll_interval_seconds)
+            try:
+                await self.reload()
+            except Exception as exc:
+                logger.warning(f"Travel catalog poll failed: {exc}")
+
+
+_catalog: Optional[TravelCatalog] = None
+
+
+def init_travel_catalog(db: AsyncIOMotorDatabase, settings: Settings) -> Optional[TravelCatalog]:
+    global _catalog
+    _catalog = TravelCatalog(db, settings) if settings.travel_catalog_enabled else None
+    return _catalog
+
+
+def get_travel_catalog() -> Optional[TravelCatalog]:
+    return _catalog
@@ -0,0 +1,84 @@
+"""SNZ_RecSys `/agent/recommend` 대체 서버 (로컬 부하 테스트용)
+
+실행:
+    uvicorn benchmarks.fake_recsys:app --port 8001
+    WINEAR_AI_BACKEND_URL=http://localhost:8001 uvicorn app.main:app
+
+환경 변수
+- FAKE_RECSYS_LATENCY_MS_MEDIAN / FAKE_RECSYS_LATENCY_SIGMA : 로그정규 지연 분포 (기본 300ms / 0.5)
+- FAKE_RECSYS_ERROR_RATE : 500 응답 비율 (기본 0)
+- FAKE_RECSYS_NUM_PEOPLE / FAKE_RECSYS_NUM_TRAVEL : 응답 ID 개수 (기본 5 / 5)
+
+시작 시 WINEAR_MONGODB_* 설정으로 로컬 Mongo의 user_features.ID, travel_info.product_code를 읽어
+실제 존재하는 ID를 돌려주므로 /recommend/user-profile, /recommend/travel 까지 그대로 이어서 테스트할 수 있습니다.
+Mongo에 접속할 수 없으면 가짜 ID를 생성합니다.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import random
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import FastAPI, HTTPException
+from motor.motor_asyncio import AsyncIOMotorClient
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+
+
+logger = logging.getLogger("uvicorn.error")
+
+LATENCY_MS_MEDIAN = float(os.getenv("FAKE_RECSYS_LATENCY_MS_MEDIAN", "300"))
+LATENCY_SIGMA = float(os.getenv("FAKE_RECSYS_LATENCY_SIGMA", "0.5"))
+ERROR_RATE = float(os.getenv("FAKE_RECSYS_ERROR_RATE", "0"))
+NUM_PEOPLE = int(os.getenv("FAKE_RECSYS_NUM_PEOPLE", "5"))
+NUM_TRAVEL = int(os.getenv("FAKE_RECSYS_NUM_TRAVEL", "5"))
+
+
+class RecommendPayload(BaseModel):
+    user_id: str
+
+
+async def _load_id_pools() -> tuple[list[str], list[str]]:
+    settings = get_settings()
+    client = AsyncIOMotorClient(settings.mongodb_uri, serverSelectionTimeoutMS=2000)
+    try:
+        db = client[settings.mongodb_db]
+        people = [str(doc["ID"]) async for doc in db["user_features"].find({}, {"ID": 1}).limit(1000) if "ID" in doc]
+        travel = [doc["product_code"] async for doc in db["travel_info"].find({}, {"product_code": 1}).limit(1000) if "product_code" in doc]
+        return people, travel
+    except Exception as exc:
+        logger.warning(f"Mongo unavailable; using synthetic ids. error={exc}")
+        return [], []
+    finally:
+        client.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    people, travel = await _load_id_pools()
+    app.state.people = people or [str(i) for i in range(1, 101)]
+    app.state.travel = travel or [f"FAKE{i:04d}" for i in range(1, 101)]
+    logger.info(f"Fake RecSys ready: people={len(app.state.people)}, travel={len(app.state.travel)}")
+    yield
+
+
+app = FastAPI(title="Fake SNZ_RecSys", lifespan=lifespan)
+
+
+@app.post("/agent/recommend")
+async def recommend(payload: RecommendPayload) -> dict[str, Any]:
+    await asyncio.sleep(random.lognormvariate(math.log(LATENCY_MS_MEDIAN), LATENCY_SIGMA) / 1000)
+    if random.random() < ERROR_RATE:
+        raise HTTPException(status_code=500, detail="fake recsys error")
+    people = [p for p in app.state.people if p != payload.user_id]
+    return {
+        "user_id": payload.user_id,
+        "rec_people": random.sample(people, min(NUM_PEOPLE, len(people))),
+        "rec_travel": random.sample(app.state.travel, min(NUM_TRAVEL, len(app.state.travel))),
+        "status": "success",
+    }
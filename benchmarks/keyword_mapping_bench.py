@@ -0,0 +1,157 @@
+"""키워드 매핑 마이크로벤치마크 (문서당 비용, 변경 전 / 후)
+
+    python -m benchmarks.keyword_mapping_bench --docs 1000 --repeat 20
+
+- legacy: 기존 analysis_result.map_doc_to_keyword + flatten_mapped_values (필드마다 중첩 dict 탐색)
+          / 기존 /recommend/user-profile 인라인 매핑
+- engine: app.services.keyword_engine (import 시 컴파일된 평탄 테이블, 배치 매핑)
+
+DB / 네트워크 없이 상수 매핑만 사용합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from app.constants.result_keyword_ver2 import (
+    NUMERIC_MAPPINGS,
+    PERSONAL_KEYWORD_MAPPINGS,
+    POLYGON_LABELS,
+    TRAVEL_KEYWORD_MAPPINGS,
+    TRAVEL_PURPOSE_MAPPINGS,
+)
+from app.services.keyword_engine import analyze_features_batch, profile_keywords_batch
+
+
+# ---- 변경 전 구현 (비교용으로 그대로 옮김) ----
+
+def legacy_map_doc_to_keyword(key: str, value: Any, mappings: dict) -> Any:
+    if isinstance(value, int):
+        return value
+    if key in mappings:
+        if type(value) == list:
+            mapped_value = []
+            for v in value:
+                if v not in mappings[key]:
+                    raise ValueError(f"value list에서 매핑을 찾을 수 없습니다: key='{key}', value='{v}'")
+                mapped_value.append(mappings[key][v])
+            return mapped_value
+        if value not in mappings[key]:
+            raise ValueError(f"value에서 매핑을 찾을 수 없습니다: key='{key}', value='{value}'")
+        return mappings[key][value]
+    return 0
+
+
+def legacy_flatten_mapped_values(values: List[Any]) -> List[str]:
+    flattened = []
+    for value in values:
+        if isinstance(value, list):
+            flattened.extend(value)
+        elif isinstance(value, str):
+            flattened.append(value)
+        elif value != 0:
+            flattened.append(str(value))
+    return flattened
+
+
+def legacy_analysis(features: Dict[str, Any]) -> tuple:
+    polygon_values = [legacy_map_doc_to_keyword(label, features.get(label, 0), NUMERIC_MAPPINGS) for label in POLYGON_LABELS]
+    travel = legacy_flatten_mapped_values([legacy_map_doc_to_keyword(k, features.get(k, 0), TRAVEL_KEYWORD_MAPPINGS) for k in TRAVEL_KEYWORD_MAPPINGS.keys()])
+    personal = legacy_flatten_mapped_values([legacy_map_doc_to_keyword(k, features.get(k, 0), PERSONAL_KEYWORD_MAPPINGS) for k in PERSONAL_KEYWORD_MAPPINGS.keys()])
+    purposes = legacy_flatten_mapped_values([legacy_map_doc_to_keyword(k, features.get(k, 0), TRAVEL_PURPOSE_MAPPINGS) for k in TRAVEL_PURPOSE_MAPPINGS.keys()])
+    return travel, personal, purposes, polygon_values
+
+
+def legacy_profile(features: Dict[str, Any]) -> Dict[str, Any]:
+    # 기존 핸들러는 여행희망지역이 리스트면 unhashable 오류가 나므로, 비교용으로 문자열만 매핑합니다
+    keywords: Dict[str, Any] = {}
+    for key in ("시간약속", "의견수용"):
+        raw = features.get(key, "")
+        if raw:
+            keywords[key] = PERSONAL_KEYWORD_MAPPINGS.get(key, {}).get(raw, raw)
+    region = features.get("여행희망지역", [])
+    if region and isinstance(region, str):
+        keywords["여행희망지역"] = TRAVEL_KEYWORD_MAPPINGS.get("여행희망지역", {}).get(region, region)
+    purposes = features.get("여행목적", [])
+    if purposes:
+        if isinstance(purposes, str):
+            keywords["여행목적"] = TRAVEL_PURPOSE_MAPPINGS.get("여행목적", {}).get(purposes, purposes)
+        elif isinstance(purposes, list):
+            keywords["여행목적"] = [TRAVEL_PURPOSE_MAPPINGS.get("여행목적", {}).get(p, p) for p in purposes]
+    return keywords
+
+
+# ---- 입력 생성 / 측정 ----
+
+LIST_FIELDS = {"여행희망지역", "싫어하는기후", "여행목적", "숙소유형"}
+
+
+def make_features(rng: random.Random) -> Dict[str, Any]:
+    features: Dict[str, Any] = {}
+    for mappings in (NUMERIC_MAPPINGS, TRAVEL_KEYWORD_MAPPINGS, PERSONAL_KEYWORD_MAPPINGS, TRAVEL_PURPOSE_MAPPINGS):
+        for field, values in mappings.items():
+            choices = list(values)
+            if field in LIST_FIELDS:
+                features[field] = rng.sample(choices, k=rng.randint(1, min(3, len(choices))))
+            else:
+                features[field] = rng.choice(choices)
+    return features
+
+
+def measure(fn: Callable[[List[Dict[str, Any]]], Any], docs: List[Dict[str, Any]], repeat: int) -> float:
+    """문서당 평균 소요 시간 (마이크로초, repeat 회 중 중앙값)"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(docs)
+        samples.append((time.perf_counter() - started) / len(docs) * 1e6)
+    return statistics.median(samples)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000, help="배치당 문서 수")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    docs = [make_features(rng) for _ in range(args.docs)]
+
+    # 분석 결과가 기존 구현과 같은지 먼저 확인
+    for doc, result in zip(docs, analyze_features_batch(docs)):
+        assert tuple(result) == legacy_analysis(doc), doc
+
+    cases = {
+        "analysis": (lambda ds: [legacy_analysis(d) for d in ds], analyze_features_batch),
+        "profile": (lambda ds: [legacy_profile(d) for d in ds], profile_keywords_batch),
+    }
+    report: Dict[str, Any] = {"docs": args.docs, "repeat": args.repeat, "per_doc_us": {}}
+    for name, (legacy_fn, engine_fn) in cases.items():
+        legacy_us = measure(legacy_fn, docs, args.repeat)
+        engine_us = measure(engine_fn, docs, args.repeat)
+        report["per_doc_us"][name] = {
+            "legacy": round(legacy_us, 3),
+            "engine": round(engine_us, 3),
+            "speedup": round(legacy_us / engine_us, 2) if engine_us else None,
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print(f"docs={args.docs} repeat={args.repeat} (문서당 µs, 중앙값)")
+    print(f"{'case':<10} {'legacy':>10} {'engine':>10} {'speedup':>8}")
+    for name, row in report["per_doc_us"].items():
+        print(f"{name:<10} {row['legacy']:>10.3f} {row['engine']:>10.3f} {row['speedup']:>7}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""채팅 → 추천 전체 여정 부하 테스트
+
+여정: /chat/start → /chat/reply × N → /chat/end → /recommend
+목표 동시성으로 여정을 반복 실행하고 엔드포인트별 p50/p95/p99 지연시간과 처리량을 출력합니다.
+OpenAI/SNZ_RecSys 없이 오프라인으로 돌리려면 API를 가짜 백엔드로 띄웁니다.
+
+    uvicorn benchmarks.fake_recsys:app --port 8001 &
+    WINEAR_LLM_BACKEND=fake WINEAR_AI_BACKEND_URL=http://localhost:8001 \\
+        uvicorn app.main:app --port 8000 --workers 2 &
+    python -m benchmarks.load_test --concurrency 20 --journeys 200 --max-p95 /chat/reply=1500
+
+--max-p95 / --max-error-rate 기준을 넘으면 종료 코드 1을 반환하므로 성능 회귀 게이트로 쓸 수 있습니다.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+import httpx
+
+
+REPLY_SAMPLES = [
+    "비 오는 날 일정이 다 취소돼서 숙소에만 있었던 게 최악이었어요.",
+    "조용하고 깨끗한 숙소는 꼭 있었으면 좋겠어요.",
+    "시간 약속을 잘 지키고 배려심 있는 사람이면 좋겠어요.",
+    "현지 음식을 천천히 즐기는 시간이 제일 기대돼요.",
+    "은퇴 후 처음 가는 여행이라 새로운 시작 같은 의미예요.",
+]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs: Any) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+            resp.raise_for_status()
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        finally:
+            self.latencies[name].append(time.perf_counter() - started)
+        return resp
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_journey(client: httpx.AsyncClient, rec: Recorder, user_id: str, replies: int) -> bool:
+    resp = await rec.call(client, "/chat/start", "POST", "/chat/start", json={"user_id": user_id})
+    if resp is None:
+        return False
+    session_id = resp.json()["session_id"]
+    for i in range(replies):
+        message = REPLY_SAMPLES[i % len(REPLY_SAMPLES)]
+        if await rec.call(client, "/chat/reply", "POST", "/chat/reply", json={"session_id": session_id, "message": message}) is None:
+            return False
+    if await rec.call(client, "/chat/end", "POST", "/chat/end", json={"session_id": session_id}) is None:
+        return False
+    return await rec.call(client, "/recommend", "POST", "/recommend", json={"user_id": user_id}) is not None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    rec = Recorder()
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(args.journeys):
+        queue.put_nowait(i)
+    completed = 0
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+
+        async def worker() -> None:
+            nonlocal completed
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                user_id = random.choice(args.user_ids) if args.user_ids else f"bench-{i}"
+                if await run_journey(client, rec, user_id, args.replies):
+                    completed += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name, values in rec.latencies.items():
+        endpoints[name] = {
+            "requests": len(values),
+            "errors": rec.errors.get(name, 0),
+            "error_rate": rec.errors.get(name, 0) / len(values) if values else 0.0,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "rps": len(values) / elapsed,
+        }
+    return {
+        "concurrency": args.concurrency,
+        "journeys": args.journeys,
+        "completed_journeys": completed,
+        "elapsed_seconds": elapsed,
+        "journeys_per_second": completed / elapsed if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"journeys={report['completed_journeys']}/{report['journeys']} "
+        f"concurrency={report['concurrency']} elapsed={report['elapsed_seconds']:.1f}s "
+        f"throughput={report['journeys_per_second']:.2f} journeys/s"
+    )
+    print(f"{'endpoint':<14}{'reqs':>7}{'errs':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'rps':>8}")
+    for name in ("/chat/start", "/chat/reply", "/chat/end", "/recommend"):
+        row = report["endpoints"].get(name)
+        if row is None:
+            continue
+        print(
+            f"{name:<14}{row['requests']:>7}{row['errors']:>6}"
+            f"{row['p50_ms']:>10.0f}{row['p95_ms']:>10.0f}{row['p99_ms']:>10.0f}{row['rps']:>8.1f}"
+        )
+
+
+def check_thresholds(report: Dict[str, Any], args: argparse.Namespace) -> List[str]:
+    failures = []
+    for spec in args.max_p95:
+        name, limit = spec.split("=", 1)
+        row = report["endpoints"].get(name)
+        if row is not None and row["p95_ms"] > float(limit):
+            failures.append(f"{name} p95 {row['p95_ms']:.0f}ms > {limit}ms")
+    for name, row in report["endpoints"].items():
+        if row["error_rate"] > args.max_error_rate:
+            failures.append(f"{name} error rate {row['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    return failures
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="WiNear chat → recommend load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--journeys", type=int, default=100)
+    parser.add_argument("--replies", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--user-ids", nargs="*", default=[], help="여정에 사용할 user_id 목록 (기본: bench-N)")
+    parser.add_argument("--max-p95", nargs="*", default=[], metavar="ENDPOINT=MS", help="엔드포인트별 p95 상한")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    failures = check_thresholds(report, args)
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
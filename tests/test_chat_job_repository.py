@@ -0,0 +1,61 @@
+"""채팅 종료 작업 큐: 실패 후 재시도 백오프 테스트"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.repositories import chat_job_repository as jobs
+
+fakeredis = pytest.importorskip("fakeredis.aioredis")
+
+
+class _Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_failed_job_is_not_taken_before_its_backoff(monkeypatch):
+    clock = _Clock(1_000.0)
+    monkeypatch.setattr(jobs.time, "time", clock)
+
+    async def scenario() -> None:
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        job_id = await jobs.enqueue_end_job(redis, "s1", "u1", ttl_seconds=3600)
+        assert await jobs.take_job(redis, lease_seconds=60) == job_id
+
+        await jobs.fail_job(redis, job_id, "llm down", retry=True, retry_delay_seconds=30)
+        job = await jobs.get_job(redis, job_id)
+        assert job["status"] == jobs.JOB_QUEUED
+        assert float(job["not_before"]) == 1_030.0
+
+        clock.now = 1_029.0
+        assert await jobs.take_job(redis, lease_seconds=60) is None
+
+        clock.now = 1_030.0
+        assert await jobs.take_job(redis, lease_seconds=60) == job_id
+        job = await jobs.get_job(redis, job_id)
+        assert job["status"] == jobs.JOB_RUNNING
+        assert job["attempts"] == "2"
+        assert "not_before" not in job
+        assert await redis.zcard(jobs.DELAYED_KEY) == 0
+
+    asyncio.run(scenario())
+
+
+def test_non_retry_failure_is_not_requeued():
+    async def scenario() -> None:
+        redis = fakeredis.FakeRedis(decode_responses=True)
+        job_id = await jobs.enqueue_end_job(redis, "s1", "u1", ttl_seconds=3600)
+        await jobs.take_job(redis, lease_seconds=60)
+
+        await jobs.fail_job(redis, job_id, "llm down", retry=False)
+
+        assert (await jobs.get_job(redis, job_id))["status"] == jobs.JOB_FAILED
+        assert await jobs.take_job(redis, lease_seconds=60) is None
+        assert await redis.zcard(jobs.DELAYED_KEY) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+"""가짜 채팅 모델: 스트리밍 지연이 비스트리밍과 같은 분포를 따르는지 테스트"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import HumanMessage
+
+from app.services import fake_llm
+from app.services.fake_llm import FakeChatModel
+
+
+def test_astream_spends_sampled_latency_with_scaled_ttft(monkeypatch):
+    sleeps: list[float] = []
+
+    async def fake_sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(fake_llm.asyncio, "sleep", fake_sleep)
+    # 중앙값의 3배(꼬리)로 뽑힌 경우
+    monkeypatch.setattr(fake_llm.random, "lognormvariate", lambda mu, sigma: 2400.0)
+    model = FakeChatModel(latency_ms_median=800.0, ttft_ms=200.0)
+
+    async def collect() -> str:
+        return "".join([chunk.content async for chunk in model.astream([HumanMessage(content="안녕하세요")])])
+
+    text = asyncio.run(collect())
+
+    assert text in fake_llm._CANNED_RESPONSES
+    assert sleeps[0] == pytest.approx(0.6)
+    assert sum(sleeps) == pytest.approx(2.4)
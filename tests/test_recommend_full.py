@@ -0,0 +1,83 @@
+"""/recommend/full 추천 호출 마감 시간 테스트"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings
+from app.dependencies.db import get_db, get_user_features_collection
+from app.routers import recommend
+from app.services import recommend_cache, travel_catalog
+from app.services.ai_recommend_client import get_ai_recommend_client
+
+
+class _SlowClient:
+    async def get_user_recommendations(self, user_id: str) -> dict[str, Any]:
+        await asyncio.sleep(5)
+        return {"user_id": user_id, "rec_people": [], "rec_travel": [], "status": "success"}
+
+
+class _EmptyCursor:
+    def __aiter__(self) -> "_EmptyCursor":
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        raise StopAsyncIteration
+
+
+class _Collection:
+    def find(self, *args: Any, **kwargs: Any) -> _EmptyCursor:
+        return _EmptyCursor()
+
+    def aggregate(self, *args: Any, **kwargs: Any) -> _EmptyCursor:
+        return _EmptyCursor()
+
+
+def _client(monkeypatch) -> TestClient:
+    monkeypatch.setattr(recommend, "get_settings", lambda: Settings(recommend_full_recommend_timeout_seconds=0.05))
+    monkeypatch.setattr(travel_catalog, "_catalog", None)
+    app = FastAPI()
+    app.include_router(recommend.router)
+    app.dependency_overrides[get_ai_recommend_client] = _SlowClient
+    app.dependency_overrides[get_db] = lambda: {"travel_info": _Collection()}
+    app.dependency_overrides[get_user_features_collection] = _Collection
+    return TestClient(app)
+
+
+def test_full_returns_503_when_recommendation_misses_deadline(monkeypatch):
+    monkeypatch.setattr(recommend_cache, "_cache", None)
+    client = _client(monkeypatch)
+
+    started = time.perf_counter()
+    resp = client.post("/recommend/full", json={"user_id": "u1"})
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert time.perf_counter() - started < 2
+
+
+def test_full_serves_cached_fallback_when_recommendation_misses_deadline(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis.aioredis")
+    client = _client(monkeypatch)
+    cache = recommend_cache.RecommendationCache(
+        fakeredis.FakeRedis(decode_responses=True),
+        fresh_ttl_seconds=0,
+        stale_ttl_seconds=0,
+        refresh_lock_seconds=1,
+        fallback_ttl_seconds=600,
+    )
+    cached = {"user_id": "u1", "rec_people": [], "rec_travel": ["T1"], "status": "success"}
+    asyncio.run(cache.store("u1", cached, "0"))
+    monkeypatch.setattr(recommend_cache, "_cache", cache)
+
+    resp = client.post("/recommend/full", json={"user_id": "u1"})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["cache_status"] == "fallback"
+    assert body["rec_travel"] == ["T1"]
@@ -0,0 +1,63 @@
+"""/recommend/travel DB 경로 (카탈로그 미사용) 라우트 테스트"""
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.dependencies.db import get_db
+from app.routers import recommend
+from app.services import travel_catalog
+
+
+class _Cursor:
+    def __init__(self, docs: list[dict[str, Any]]):
+        self._docs = iter(docs)
+
+    def __aiter__(self) -> "_Cursor":
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class _Collection:
+    def __init__(self, docs: list[dict[str, Any]]):
+        self.docs = docs
+        self.pipelines: list[list[dict[str, Any]]] = []
+
+    def aggregate(self, pipeline: list[dict[str, Any]]) -> _Cursor:
+        self.pipelines.append(pipeline)
+        codes = pipeline[0]["$match"]["product_code"]["$in"]
+        return _Cursor([doc for doc in self.docs if doc["product_code"] in codes])
+
+
+class _Database(dict):
+    pass
+
+
+def _client(db: _Database) -> TestClient:
+    app = FastAPI()
+    app.include_router(recommend.router)
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def test_travel_packages_db_path_preserves_request_order(monkeypatch):
+    monkeypatch.setattr(travel_catalog, "_catalog", None)
+    info = _Collection([
+        {"product_code": "A", "title": "알프스", "hashtags": ["#산"], "url": "https://a"},
+        {"product_code": "B", "title": "발리", "hashtags": [], "url": ""},
+    ])
+    db = _Database(travel_info=info)
+
+    resp = _client(db).post("/recommend/travel", json={"travel_ids": ["B", "missing", "A"]})
+
+    assert resp.status_code == 200
+    assert [t["product_code"] for t in resp.json()["travels"]] == ["B", "A"]
+    assert resp.json()["travels"][1] == {"product_code": "A", "title": "알프스", "hashtags": ["#산"], "url": "https://a"}
+    assert len(info.pipelines) == 1
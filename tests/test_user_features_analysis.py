@@ -0,0 +1,87 @@
+"""user_features 쓰기 경로의 분석 결과(Analysis) 저장 / 조회 폴백 테스트"""
+from __future__ import annotations
+
+import asyncio
+import random
+from typing import Any
+
+from app.repositories import user_features_repository as repo
+from app.schemas.user_features import UserFeaturesCreate, UserFeaturesUpdate
+from app.services.analysis_result import get_user_analysis_data
+from app.services.keyword_engine import MAPPING_VERSION, build_analysis_payload
+from benchmarks.keyword_mapping_bench import make_features
+
+
+class _Collection:
+    """find_one / find_one_and_update / update_one 만 흉내 내는 인메모리 컬렉션 (ID $in 필터만 지원)"""
+
+    def __init__(self, docs: list[dict[str, Any]]):
+        self.docs = docs
+        self.update_one_calls = 0
+
+    def _match(self, filter: dict[str, Any]) -> dict[str, Any] | None:
+        ids = filter["ID"]["$in"]
+        return next((doc for doc in self.docs if doc.get("ID") in ids), None)
+
+    async def find_one(self, filter: dict[str, Any], projection: dict[str, Any] | None = None) -> dict[str, Any] | None:
+        doc = self._match(filter)
+        if doc is None or projection is None:
+            return dict(doc) if doc else None
+        return {key: doc[key] for key in ("_id", *projection) if key in doc}
+
+    async def find_one_and_update(self, filter, update, return_document=None, upsert=False):
+        doc = self._match(filter)
+        if doc is None:
+            if not upsert:
+                return None
+            doc = {"_id": f"oid-{len(self.docs)}", **update.get("$setOnInsert", {})}
+            self.docs.append(doc)
+        doc.update(update.get("$set", {}))
+        for key in update.get("$unset", {}):
+            doc.pop(key, None)
+        return dict(doc)
+
+    async def update_one(self, filter, update):
+        self.update_one_calls += 1
+        raise ConnectionError("mongo unavailable")
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_failed_materialization_falls_back_to_compute_on_read(monkeypatch):
+    monkeypatch.setattr(repo, "invalidate_recommendations", _noop)
+    features = make_features(random.Random(1))
+    # 이전 features로 계산된 (현재 매핑 버전의) 분석 결과가 남아 있는 문서
+    stale = {"mapping_version": MAPPING_VERSION, "payload": {**build_analysis_payload(features), "travel_keywords": ["stale"]}}
+    col = _Collection([{"_id": "oid-0", "ID": 7, "features": features, repo.ANALYSIS_FIELD: stale}])
+    db = {repo.COLLECTION: col}
+
+    _run(repo.update_user_features_by_user_id(db, "7", UserFeaturesUpdate(features={"말수": "많음"})))
+
+    assert col.update_one_calls == 1
+    assert repo.ANALYSIS_FIELD not in col.docs[0]
+    result = _run(get_user_analysis_data(db, "7"))
+    assert result.travel_keywords == build_analysis_payload(features)["travel_keywords"]
+    assert result.travel_keywords != ["stale"]
+
+
+def test_upsert_writes_analysis_in_the_same_update(monkeypatch):
+    monkeypatch.setattr(repo, "invalidate_recommendations", _noop)
+    old = make_features(random.Random(1))
+    new = make_features(random.Random(2))
+    stale = {"mapping_version": MAPPING_VERSION, "payload": build_analysis_payload(old)}
+    col = _Collection([{"_id": "oid-0", "ID": "7", "features": old, repo.ANALYSIS_FIELD: stale}])
+    db = {repo.COLLECTION: col}
+
+    _run(repo.upsert_user_features(db, UserFeaturesCreate(ID="7", Features=new)))
+
+    assert col.update_one_calls == 0
+    assert col.docs[0][repo.ANALYSIS_FIELD]["payload"] == build_analysis_payload(new)
+    result = _run(get_user_analysis_data(db, "7"))
+    assert result.polygon_values == build_analysis_payload(new)["polygon_values"]
+
+
+async def _noop(*args: Any, **kwargs: Any) -> None:
+    return None